@@ -0,0 +1,89 @@
+"""
+Engine Benchmark for Automation Studio
+Measures pure executor throughput using the in-memory recording backend,
+so it runs without a display (e.g. on CI).
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.lib.script_parser import ScriptParser
+from src.lib.script_executor import ScriptExecutor
+from src.lib.input_backends import RecordingBackend
+
+
+def build_script(step_count):
+    """Build a synthetic script that cycles through the input actions."""
+    template = [
+        {'action': 'click', 'x': 100, 'y': 200, 'description': 'Click field'},
+        {'action': 'type', 'text': 'benchmark text'},
+        {'action': 'hotkey', 'keys': ['ctrl', 'a']},
+        {'action': 'press', 'key': 'tab', 'presses': 1},
+        {'action': 'set_clipboard', 'text': 'value'},
+        {'action': 'paste'},
+        {'action': 'scroll', 'amount': -3},
+        {'action': 'move_to', 'x': 300, 'y': 400},
+    ]
+    steps = [dict(template[i % len(template)]) for i in range(step_count)]
+    return {'name': 'Benchmark', 'steps': steps}
+
+
+def run_benchmark(step_count, runs, script_path=None):
+    """Run the benchmark and print throughput figures."""
+    if script_path:
+        parser = ScriptParser()
+        if not parser.parse_file(script_path):
+            print("✗ Failed to parse script:")
+            for error in parser.get_errors():
+                print(f"  {error}")
+            return False
+        script = parser.get_script_data()
+    else:
+        script = build_script(step_count)
+    
+    backend = RecordingBackend()
+    executor = ScriptExecutor(backend=backend, pacing='turbo')
+    executor.on_log = lambda message: None
+    
+    plan = executor.compile(script)
+    total_steps = len(plan)
+    
+    print(f"=== Engine Benchmark ({total_steps} steps x {runs} runs) ===")
+    
+    timings = []
+    for _ in range(runs):
+        backend.clear()
+        start = time.perf_counter()
+        if not executor.execute_script(plan):
+            print("✗ Run failed")
+            return False
+        timings.append(time.perf_counter() - start)
+    
+    best = min(timings)
+    mean = sum(timings) / len(timings)
+    
+    print(f"Best run:          {best * 1000:.2f} ms")
+    print(f"Mean run:          {mean * 1000:.2f} ms")
+    print(f"Steps/sec (best):  {total_steps / best:,.0f}")
+    print(f"Per-step overhead: {best / total_steps * 1e6:.2f} µs")
+    return True
+
+
+def main():
+    """Main benchmark entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark the script executor engine")
+    parser.add_argument('--steps', type=int, default=200, help="Synthetic script length")
+    parser.add_argument('--runs', type=int, default=50, help="Number of timed runs")
+    parser.add_argument('--script', help="Benchmark a YAML script instead of a synthetic one")
+    args = parser.parse_args()
+    
+    success = run_benchmark(args.steps, args.runs, args.script)
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Import-Time Budget Check for Automation Studio
+Measures `python -X importtime` for each entry point and fails when an entry
+point is over budget or eagerly imports a module that should load lazily.
+"""
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+
+ROOT = Path(__file__).parent
+
+# Entry point module -> (budget in ms, modules that must not be imported)
+ENTRY_POINTS = {
+    'src.cli': (
+        100,
+        ('tkinter', 'pyautogui', 'pyperclip', 'keyboard', 'yaml', 'numpy', 'PIL'),
+    ),
+    'src.ui.main_window': (
+        300,
+        ('pyautogui', 'pyperclip', 'keyboard', 'yaml', 'numpy', 'PIL'),
+    ),
+}
+
+
+def measure(module, runs):
+    """
+    Import a module in fresh interpreters and collect -X importtime output.
+    
+    Args:
+        module: Dotted module name
+        runs: Number of interpreters to start; the fastest run is kept
+    
+    Returns:
+        Tuple of (cumulative ms, set of imported module names), or None if
+        the module cannot be imported here
+    """
+    best = None
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+            cwd=ROOT,
+            capture_output=True,
+            text=True
+        )
+        if result.returncode != 0:
+            return None
+        
+        imported = {}
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            _, cumulative, name = line[len('import time:'):].split('|')
+            imported[name.strip()] = int(cumulative) / 1000.0
+        
+        total = imported.get(module, 0.0)
+        if best is None or total < best[0]:
+            best = (total, set(imported))
+    
+    return best
+
+
+def run_check(runs, scale):
+    """Measure every entry point and report budget and lazy-import violations."""
+    print(f"=== Import Budget ({runs} runs each, fastest kept) ===")
+    
+    ok = True
+    for module, (budget, forbidden) in ENTRY_POINTS.items():
+        measured = measure(module, runs)
+        if measured is None:
+            print(f"- {module}: skipped (cannot be imported in this environment)")
+            continue
+        
+        total, imported = measured
+        limit = budget * scale
+        eager = sorted(name for name in forbidden if name in imported)
+        
+        status = "✓" if total <= limit and not eager else "✗"
+        print(f"{status} {module}: {total:.1f} ms (budget {limit:.0f} ms)")
+        if eager:
+            print(f"    imported eagerly: {', '.join(eager)}")
+        
+        ok = ok and status == "✓"
+    
+    return ok
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Check entry point import times against their budgets")
+    parser.add_argument('--runs', type=int, default=5, help="Interpreters started per entry point")
+    parser.add_argument('--scale', type=float, default=1.0, help="Multiply every budget (for slow machines)")
+    args = parser.parse_args()
+    
+    success = run_check(args.runs, args.scale)
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()
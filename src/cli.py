@@ -0,0 +1,253 @@
+"""
+Automation Studio - Command Line Runner
+
+Runs scripts headlessly, without tkinter or any GUI module:
+    
+    python -m src.cli run script.yaml --repeat 3 --speed 2 --json -
+    python -m src.cli run huge_script.jsonl
+"""
+
+import argparse
+import json
+import math
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.lib.pacing import resolve_pacing
+from src.lib.script_parser import ScriptParser
+from src.lib.script_executor import ScriptExecutor
+from src.lib.script_stream import ScriptStream, stream_format
+
+
+# Exit codes
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_INVALID = 2
+EXIT_STOPPED = 130
+
+
+def _numbered_path(path: str, run: int, runs: int) -> str:
+    """Insert the run number before the extension when there are several runs."""
+    if runs == 1:
+        return path
+    p = Path(path)
+    return str(p.with_name(f"{p.stem}.run{run}{p.suffix}"))
+
+
+def _run_once(executor: ScriptExecutor, plan: Any) -> Dict[str, Any]:
+    """
+    Execute a plan on a worker thread so Ctrl+C can stop it cleanly.
+    
+    Returns:
+        Result dictionary for the run
+    """
+    outcome: Dict[str, Any] = {}
+    
+    def target():
+        outcome['success'] = executor.execute_script(plan)
+    
+    start = time.perf_counter()
+    worker = threading.Thread(target=target, name="ScriptRunner", daemon=True)
+    worker.start()
+    
+    interrupted = False
+    while worker.is_alive():
+        try:
+            worker.join(0.1)
+        except KeyboardInterrupt:
+            interrupted = True
+            executor.stop()
+    
+    stopped = interrupted
+    progress = executor.progress.snapshot()
+    return {
+        'success': bool(outcome.get('success')) and not stopped,
+        'stopped': stopped,
+        'steps_completed': executor.steps_completed,
+        'total_steps': progress['total'],
+        'elapsed_ms': round((time.perf_counter() - start) * 1000.0, 3),
+        'error': executor.last_error,
+        'timing': executor.timing_report,
+        'dataset': executor.dataset_report,
+    }
+
+
+def run_command(args: argparse.Namespace) -> int:
+    """
+    Handle 'run': validate, compile and execute a script.
+    
+    JSON Lines scripts, and YAML scripts given --stream, are streamed: they
+    are validated in one pass and then read, compiled and run a chunk at a
+    time instead of being loaded whole.
+    
+    Returns:
+        Process exit code
+    """
+    script_path = Path(args.script)
+    result: Dict[str, Any] = {'script': str(script_path), 'runs': []}
+    
+    stream = None
+    if args.stream or stream_format(str(script_path)) == 'jsonl':
+        try:
+            stream = ScriptStream(str(script_path))
+            errors = stream.validate()
+        except ValueError as e:
+            errors = [str(e)]
+        if errors:
+            return _invalid(args.json, result, errors)
+        result['name'] = stream.name
+    else:
+        parser = ScriptParser()
+        if not parser.parse_file(str(script_path)):
+            return _invalid(args.json, result, parser.get_errors())
+        script = parser.get_script_data()
+        result['name'] = script.get('name', 'Untitled')
+    
+    executor = ScriptExecutor(
+        fail_safe=not args.no_fail_safe,
+        pacing=args.pacing,
+        timing=args.timing,
+        speed=args.speed
+    )
+    executor.base_dir = str(script_path.resolve().parent)
+    if args.quiet:
+        executor.on_log = lambda message: None
+    else:
+        # Keep stdout free for --json -
+        executor.on_log = lambda message: print(message, file=sys.stderr)
+    
+    if stream is not None:
+        plan = stream
+    else:
+        try:
+            plan = executor.compile(script, parser.get_templates(), parser.get_program())
+        except (KeyError, OSError, ValueError) as e:
+            return _invalid(args.json, result, [str(e)])
+    
+    exit_code = EXIT_OK
+    runs: List[Dict[str, Any]] = result['runs']
+    for run in range(1, args.repeat + 1):
+        executor.trace_file = _numbered_path(args.trace, run, args.repeat) if args.trace else None
+        executor.metrics_file = _numbered_path(args.metrics, run, args.repeat) if args.metrics else None
+        
+        outcome = _run_once(executor, plan)
+        outcome['run'] = run
+        runs.append(outcome)
+        
+        if outcome['stopped']:
+            exit_code = EXIT_STOPPED
+            break
+        if not outcome['success']:
+            exit_code = EXIT_FAILED
+            break
+    
+    result['success'] = exit_code == EXIT_OK
+    result['exit_code'] = exit_code
+    result['elapsed_ms'] = round(sum(r['elapsed_ms'] for r in runs), 3)
+    _write_result(args.json, result)
+    return exit_code
+
+
+def _invalid(destination: Optional[str], result: Dict[str, Any], errors: List[str]) -> int:
+    """Report validation errors and return EXIT_INVALID."""
+    for error in errors:
+        print(f"error: {error}", file=sys.stderr)
+    result.update({'success': False, 'exit_code': EXIT_INVALID, 'errors': errors})
+    _write_result(destination, result)
+    return EXIT_INVALID
+
+
+def _write_result(destination: Optional[str], result: Dict[str, Any]) -> None:
+    """Write the JSON result to a file, or to stdout for '-'."""
+    if not destination:
+        return
+    
+    text = json.dumps(result, indent=2)
+    if destination == '-':
+        print(text)
+    else:
+        with open(destination, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+
+
+def _positive_float(value: str) -> float:
+    number = float(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError("must be greater than 0")
+    return number
+
+
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError("must be at least 1")
+    return number
+
+
+def _pacing(value: str) -> Any:
+    # Numbers are milliseconds; anything else must name a profile
+    try:
+        pacing = int(value)
+    except ValueError:
+        try:
+            pacing = float(value)
+        except ValueError:
+            pacing = value
+        else:
+            if not math.isfinite(pacing):
+                raise argparse.ArgumentTypeError(f"invalid pacing: {value!r}")
+    try:
+        resolve_pacing(pacing)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+    return pacing
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Create the argument parser."""
+    parser = argparse.ArgumentParser(
+        prog='python -m src.cli',
+        description="Run Automation Studio scripts without the GUI"
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    run = commands.add_parser('run', help="Run a YAML or JSON Lines script")
+    run.add_argument('script', help="Path to the script file")
+    run.add_argument('--repeat', type=_positive_int, default=1, help="Number of times to run the script")
+    run.add_argument('--speed', type=_positive_float, default=1.0,
+                     help="Delay multiplier: 2 runs delays, pauses and motion twice as fast")
+    run.add_argument('--pacing', type=_pacing, help="Override the script's pacing (profile name or milliseconds)")
+    run.add_argument('--timing', choices=['relative', 'scheduled'], help="Override the script's timing mode")
+    run.add_argument('--trace', metavar='FILE', help="Write a Chrome trace-event JSON file per run")
+    run.add_argument('--metrics', metavar='FILE', help="Write per-step timings (.json or .csv) per run")
+    run.add_argument('--json', metavar='FILE', help="Write the run results as JSON ('-' for stdout)")
+    run.add_argument('--stream', action='store_true',
+                     help="Stream a multi-document YAML script instead of loading it whole (.jsonl always streams)")
+    run.add_argument('--no-fail-safe', action='store_true', help="Disable the mouse-corner fail-safe")
+    run.add_argument('--quiet', '-q', action='store_true', help="Do not print the execution log")
+    run.set_defaults(handler=run_command)
+    
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Command line entry point.
+    
+    Args:
+        argv: Arguments without the program name; defaults to sys.argv[1:]
+    
+    Returns:
+        Process exit code
+    """
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+"""
+Control Flow
+
+Compiles repeat, while, if, label and goto steps into a flat instruction
+list with resolved jump targets, so loops cost no more to run than the
+steps inside them.
+"""
+
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+CONTROL_ACTIONS = ('repeat', 'while', 'if', 'label', 'goto')
+
+# Control actions with nested 'steps' (and 'else' for if)
+BLOCK_ACTIONS = ('repeat', 'while', 'if')
+
+CONDITION_TYPES = ('pixel', 'image', 'clipboard', 'variable')
+
+# Instruction opcodes
+STEP = 'step'        # Run a script step
+BRANCH = 'branch'    # Test a condition; jump to target when it is false
+JUMP = 'jump'        # Jump to target unconditionally
+LOOP = 'loop'        # Start a repeat counter; jump past the body for 0 times
+NEXT = 'next'        # Count down a repeat; jump back to target while iterations remain
+
+
+class Instruction:
+    """One entry of a compiled program."""
+    
+    __slots__ = ('op', 'number', 'step', 'target', 'slot')
+    
+    def __init__(
+        self,
+        op: str,
+        number: int,
+        step: Dict[str, Any],
+        target: Optional[int] = None,
+        slot: Optional[int] = None
+    ):
+        """
+        Initialize an instruction.
+        
+        Args:
+            op: Opcode (STEP, BRANCH, JUMP, LOOP or NEXT)
+            number: 1-based number of the script step it came from
+            step: That step's dictionary
+            target: Instruction index to jump to, for control opcodes
+            slot: Repeat counter index, for LOOP and NEXT
+        """
+        self.op = op
+        self.number = number
+        self.step = step
+        self.target = target
+        self.slot = slot
+    
+    def __repr__(self) -> str:
+        return f"Instruction({self.op!r}, {self.number}, target={self.target})"
+
+
+class Program:
+    """Flat instruction list for a script."""
+    
+    __slots__ = ('instructions', 'steps', 'counters')
+    
+    def __init__(self, instructions: List[Instruction], steps: int, counters: int):
+        """
+        Initialize a program.
+        
+        Args:
+            instructions: Instructions in execution order
+            steps: Number of script steps, nested ones included
+            counters: Number of repeat counters the program needs
+        """
+        self.instructions = instructions
+        self.steps = steps
+        self.counters = counters
+
+
+def walk(steps: List[Any]) -> Iterator[Any]:
+    """
+    Every step of a script in document order, nested steps included.
+    
+    Step numbers used in logs and errors are positions in this order.
+    
+    Args:
+        steps: Top-level steps
+    
+    Yields:
+        Step values (dictionaries in a valid script)
+    """
+    for step in steps:
+        yield step
+        if isinstance(step, dict) and step.get('action') in BLOCK_ACTIONS:
+            for key in ('steps', 'else'):
+                body = step.get(key)
+                if isinstance(body, list):
+                    yield from walk(body)
+
+
+def parse_color(value: Any) -> Optional[Tuple[int, int, int]]:
+    """
+    Read a color given as '#rrggbb' or [r, g, b].
+    
+    Args:
+        value: Color value from a condition
+    
+    Returns:
+        (r, g, b) tuple, or None if the value is not a color
+    """
+    if isinstance(value, str):
+        text = value[1:] if value.startswith('#') else value
+        if len(text) != 6:
+            return None
+        try:
+            return (int(text[0:2], 16), int(text[2:4], 16), int(text[4:6], 16))
+        except ValueError:
+            return None
+    
+    if (
+        isinstance(value, list) and len(value) == 3
+        and all(isinstance(v, int) and not isinstance(v, bool) and 0 <= v <= 255 for v in value)
+    ):
+        return tuple(value)
+    
+    return None
+
+
+def compile_program(steps: List[Dict[str, Any]], start: int = 0) -> Program:
+    """
+    Flatten a validated script into instructions with resolved jumps.
+    
+    Args:
+        steps: Top-level steps
+        start: Number of steps before these ones, when compiling part of a
+            script; step numbers continue from it
+    
+    Returns:
+        Compiled program
+    
+    Raises:
+        ValueError: If a label is defined twice or a goto names no label
+    """
+    instructions: List[Instruction] = []
+    labels: Dict[str, int] = {}
+    gotos: List[Tuple[Instruction, str]] = []
+    number = start
+    counters = 0
+    
+    def emit(block: List[Dict[str, Any]]) -> None:
+        nonlocal number, counters
+        
+        for step in block:
+            number += 1
+            n = number
+            action = step.get('action')
+            
+            if action == 'label':
+                name = step['name']
+                if name in labels:
+                    raise ValueError(f"Step {n}: Duplicate label '{name}'")
+                labels[name] = len(instructions)
+            
+            elif action == 'goto':
+                jump = Instruction(JUMP, n, step)
+                instructions.append(jump)
+                gotos.append((jump, step['label']))
+            
+            elif action == 'repeat':
+                slot = counters
+                counters += 1
+                start = Instruction(LOOP, n, step, slot=slot)
+                instructions.append(start)
+                body = len(instructions)
+                emit(step['steps'])
+                instructions.append(Instruction(NEXT, n, step, body, slot))
+                start.target = len(instructions)
+            
+            elif action == 'while':
+                head = len(instructions)
+                test = Instruction(BRANCH, n, step)
+                instructions.append(test)
+                emit(step['steps'])
+                instructions.append(Instruction(JUMP, n, step, head))
+                test.target = len(instructions)
+            
+            elif action == 'if':
+                test = Instruction(BRANCH, n, step)
+                instructions.append(test)
+                emit(step['steps'])
+                if step.get('else'):
+                    skip = Instruction(JUMP, n, step)
+                    instructions.append(skip)
+                    test.target = len(instructions)
+                    emit(step['else'])
+                    skip.target = len(instructions)
+                else:
+                    test.target = len(instructions)
+            
+            else:
+                instructions.append(Instruction(STEP, n, step))
+    
+    emit(steps)
+    
+    for jump, label in gotos:
+        if label not in labels:
+            raise ValueError(f"Step {jump.number}: Unknown label '{label}'")
+        jump.target = labels[label]
+    
+    return Program(instructions, number - start, counters)
@@ -0,0 +1,208 @@
+"""
+Dataset
+
+Row sources and results output for data-driven runs, where a script's steps
+are executed once per row of a CSV or JSON Lines file.
+"""
+
+import csv
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+
+DATASET_FORMATS = ('csv', 'jsonl')
+
+# File extensions recognised when a dataset does not name its format
+FORMAT_EXTENSIONS = {
+    '.csv': 'csv',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+}
+
+ON_ERROR_MODES = ('continue', 'stop')
+
+def dataset_format(config: Dict[str, Any]) -> Optional[str]:
+    """
+    Work out a dataset's file format.
+    
+    Args:
+        config: The script's 'dataset' section
+    
+    Returns:
+        'csv' or 'jsonl', or None if it cannot be determined
+    """
+    fmt = config.get('format')
+    if fmt:
+        return fmt if fmt in DATASET_FORMATS else None
+    return FORMAT_EXTENSIONS.get(Path(str(config.get('file', ''))).suffix.lower())
+
+
+def iter_rows(path: Path, fmt: str) -> Iterator[Dict[str, Any]]:
+    """
+    Stream rows from a dataset file, one at a time.
+    
+    Args:
+        path: CSV (with a header row) or JSON Lines file
+        fmt: 'csv' or 'jsonl'
+    
+    Yields:
+        One dictionary per row
+    
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If a JSON Lines record is not an object
+    """
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if fmt == 'csv':
+            yield from csv.DictReader(f)
+            return
+        
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError(f"{path.name} line {line_number}: expected a JSON object")
+            yield record
+
+
+def read_columns(path: Path, fmt: str) -> List[str]:
+    """
+    Read a dataset's column names.
+    
+    A CSV file is read up to its header; a JSON Lines file is read in full,
+    since its records may each carry different keys.
+    
+    Args:
+        path: Dataset file
+        fmt: 'csv' or 'jsonl'
+    
+    Returns:
+        The CSV header, or every key used by a JSON Lines record, in the
+        order they first appear
+    
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If a JSON Lines record is not an object
+    """
+    if fmt == 'csv':
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            return next(csv.reader(f), [])
+    
+    columns: Dict[str, None] = {}
+    for record in iter_rows(path, fmt):
+        columns.update(dict.fromkeys(record))
+    return list(columns)
+
+
+class ResultsWriter:
+    """
+    Writes one JSON line per processed row, and copies failed rows to a
+    second file in the dataset's own format so they can be re-run.
+    """
+    
+    def __init__(self, path: Path, failed_path: Path, fmt: str):
+        """
+        Open the results file.
+        
+        Args:
+            path: JSON Lines results file
+            failed_path: File receiving the failed rows (created on first failure)
+            fmt: Dataset format used for the failed rows
+        """
+        self.failed_path = failed_path
+        self.fmt = fmt
+        self.counts = {'ok': 0, 'failed': 0, 'stopped': 0}
+        
+        self._file = open(path, 'w', encoding='utf-8')
+        self._failed_file: Optional[Any] = None
+        self._failed_writer: Optional[Any] = None
+    
+    def write(
+        self,
+        row_number: int,
+        status: str,
+        duration: float,
+        steps: int,
+        error: Optional[str],
+        row: Dict[str, Any]
+    ) -> None:
+        """
+        Record the outcome of a row.
+        
+        Args:
+            row_number: 1-based row number in the dataset
+            status: 'ok', 'failed' or 'stopped'
+            duration: Seconds the row took
+            steps: Steps completed for the row
+            error: Failure message, if any
+            row: The row's values
+        """
+        self.counts[status] += 1
+        
+        record = {
+            'row': row_number,
+            'status': status,
+            'duration_ms': round(duration * 1000.0, 3),
+            'steps': steps,
+        }
+        if error:
+            record['error'] = error
+        if status == 'failed':
+            record['data'] = row
+            self._write_failed(row)
+        
+        # Flushed per row so progress can be followed while a batch runs
+        self._file.write(json.dumps(record, default=str) + '\n')
+        self._file.flush()
+    
+    def _write_failed(self, row: Dict[str, Any]) -> None:
+        if self._failed_file is None:
+            self._failed_file = open(self.failed_path, 'w', encoding='utf-8', newline='')
+            if self.fmt == 'csv':
+                self._failed_writer = csv.DictWriter(self._failed_file, fieldnames=list(row))
+                self._failed_writer.writeheader()
+        
+        if self._failed_writer is not None:
+            self._failed_writer.writerow(row)
+        else:
+            self._failed_file.write(json.dumps(row, default=str) + '\n')
+        self._failed_file.flush()
+    
+    def close(self) -> None:
+        """Close the output files."""
+        self._file.close()
+        if self._failed_file is not None:
+            self._failed_file.close()
+    
+    def __enter__(self) -> 'ResultsWriter':
+        return self
+    
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def results_paths(dataset_path: Path, results: Optional[str], base_dir: Path) -> List[Path]:
+    """
+    Choose the results and failed-rows files for a dataset.
+    
+    Args:
+        dataset_path: Resolved dataset file
+        results: The section's 'results' value, if given
+        base_dir: Directory relative paths are resolved against
+    
+    Returns:
+        [results path, failed-rows path]; results default to
+        '<dataset>.results.jsonl' next to the dataset, and failed rows go to
+        '<dataset>.failed.<ext>' next to the results
+    """
+    if results:
+        path = Path(results)
+        if not path.is_absolute():
+            path = base_dir / path
+    else:
+        path = dataset_path.with_name(f"{dataset_path.stem}.results.jsonl")
+    
+    failed = path.parent / f"{dataset_path.stem}.failed{dataset_path.suffix}"
+    return [path, failed]
@@ -0,0 +1,93 @@
+"""
+Execution Plan
+
+Compiled, slot-based representation of a validated automation script.
+"""
+
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+class CompiledStep:
+    """A single step or control instruction with its handler and arguments already resolved."""
+    
+    __slots__ = ('number', 'action', 'handler', 'args', 'messages', 'pause', 'source', 'target')
+    
+    def __init__(
+        self,
+        number: int,
+        action: str,
+        handler: Callable,
+        args: Tuple[Any, ...],
+        messages: Tuple[str, ...],
+        pause: float,
+        source: Dict[str, Any],
+        target: Optional[int] = None
+    ):
+        """
+        Initialize a compiled step.
+        
+        Args:
+            number: 1-based step number
+            action: Action name
+            handler: Callable that performs the action
+            args: Positional arguments passed to the handler
+            messages: Pre-formatted log lines emitted when the step runs
+            pause: Seconds to wait after the handler returns
+            source: Original step dictionary
+            target: For control instructions, the index to jump to when the
+                handler returns False; None for ordinary steps
+        """
+        self.number = number
+        self.action = action
+        self.handler = handler
+        self.args = args
+        self.messages = messages
+        self.pause = pause
+        self.source = source
+        self.target = target
+    
+    def __repr__(self) -> str:
+        return f"CompiledStep({self.number}, {self.action!r})"
+
+
+class ExecutionPlan:
+    """Flat list of compiled steps ready to be run by ScriptExecutor."""
+    
+    __slots__ = ('name', 'steps', 'owner', 'timing', 'dataset', 'total', 'counters')
+    
+    def __init__(
+        self,
+        name: str,
+        steps: List[CompiledStep],
+        owner: Optional[Any] = None,
+        timing: str = 'relative',
+        dataset: Optional[Dict[str, Any]] = None,
+        total: Optional[int] = None,
+        counters: int = 0
+    ):
+        """
+        Initialize an execution plan.
+        
+        Args:
+            name: Script name
+            steps: Compiled steps and control instructions in execution order
+            owner: Executor the step handlers are bound to
+            timing: Timing mode ('relative' or 'scheduled')
+            dataset: Resolved dataset section when the steps run once per row
+            total: Number of script steps, nested ones included; defaults
+                to the number of compiled steps
+            counters: Number of repeat counters the steps use
+        """
+        self.name = name
+        self.steps = steps
+        self.owner = owner
+        self.timing = timing
+        self.dataset = dataset
+        self.total = len(steps) if total is None else total
+        self.counters = counters
+    
+    def __len__(self) -> int:
+        return self.total
+    
+    def __iter__(self) -> Iterator[CompiledStep]:
+        return iter(self.steps)
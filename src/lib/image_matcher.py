@@ -0,0 +1,329 @@
+"""
+Image Matcher
+
+Locates template images on screen frames using normalized cross-correlation
+over coarse-to-fine image pyramids.
+"""
+
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+
+
+# Smallest template side allowed at the coarsest pyramid level
+MIN_COARSE_SIZE = 12
+
+# Maximum number of pyramid levels above full resolution
+MAX_LEVELS = 3
+
+# Search radius (pixels) around each candidate when refining on a finer level
+REFINE_RADIUS = 2
+
+# Number of coarse candidates carried through refinement
+MAX_CANDIDATES = 5
+
+# How much lower than the final threshold a coarse candidate may score
+COARSE_SLACK = 0.25
+
+
+class Match:
+    """Location of a template on a frame."""
+    
+    __slots__ = ('left', 'top', 'width', 'height', 'confidence')
+    
+    def __init__(self, left: int, top: int, width: int, height: int, confidence: float):
+        """
+        Initialize a match.
+        
+        Args:
+            left: Left edge in screen coordinates
+            top: Top edge in screen coordinates
+            width: Template width
+            height: Template height
+            confidence: Normalized correlation score in [-1, 1]
+        """
+        self.left = left
+        self.top = top
+        self.width = width
+        self.height = height
+        self.confidence = confidence
+    
+    @property
+    def center(self) -> Tuple[int, int]:
+        """Center point in screen coordinates."""
+        return (self.left + self.width // 2, self.top + self.height // 2)
+    
+    def __repr__(self) -> str:
+        return f"Match(left={self.left}, top={self.top}, confidence={self.confidence:.3f})"
+
+
+def to_gray(image: Any) -> np.ndarray:
+    """
+    Convert an image to a float32 grayscale array.
+    
+    Args:
+        image: PIL image or NumPy array (H x W, H x W x 3 or H x W x 4)
+    
+    Returns:
+        2-D float32 array
+    """
+    array = np.asarray(image)
+    
+    if array.ndim == 2:
+        return array.astype(np.float32, copy=False)
+    
+    rgb = array[..., :3].astype(np.float32)
+    return rgb @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+def downsample(gray: np.ndarray) -> np.ndarray:
+    """
+    Halve an image's resolution by averaging 2x2 blocks.
+    
+    Args:
+        gray: 2-D float32 array
+    
+    Returns:
+        Array of half the height and width (odd edges are dropped)
+    """
+    h, w = gray.shape[0] // 2 * 2, gray.shape[1] // 2 * 2
+    g = gray[:h, :w]
+    return (g[0::2, 0::2] + g[1::2, 0::2] + g[0::2, 1::2] + g[1::2, 1::2]) * 0.25
+
+
+def build_pyramid(gray: np.ndarray, levels: int) -> List[np.ndarray]:
+    """
+    Build an image pyramid.
+    
+    Args:
+        gray: Full-resolution grayscale array
+        levels: Number of downsampled levels to add
+    
+    Returns:
+        List of arrays, full resolution first
+    """
+    pyramid = [gray]
+    for _ in range(levels):
+        pyramid.append(downsample(pyramid[-1]))
+    return pyramid
+
+
+def pyramid_levels(height: int, width: int) -> int:
+    """
+    Choose how many pyramid levels a template of the given size supports.
+    
+    Args:
+        height: Template height
+        width: Template width
+    
+    Returns:
+        Number of downsampled levels
+    """
+    levels = 0
+    side = min(height, width)
+    while levels < MAX_LEVELS and side // 2 >= MIN_COARSE_SIZE:
+        side //= 2
+        levels += 1
+    return levels
+
+
+class Template:
+    """A template image prepared for matching."""
+    
+    def __init__(self, image: Any, name: str = ''):
+        """
+        Prepare a template: grayscale conversion, pyramid and zero-mean
+        normalization for every level.
+        
+        Args:
+            image: PIL image or NumPy array
+            name: Label used in log messages
+        
+        Raises:
+            ValueError: If the template is empty or has no contrast
+        """
+        gray = to_gray(image)
+        if gray.size == 0:
+            raise ValueError(f"Template '{name}' is empty")
+        
+        self.name = name
+        self.height, self.width = gray.shape
+        self.levels = pyramid_levels(self.height, self.width)
+        
+        # Per level: (zero-mean template, its L2 norm)
+        self.pyramid: List[Tuple[np.ndarray, float]] = []
+        for level in build_pyramid(gray, self.levels):
+            centered = level - level.mean()
+            norm = float(np.sqrt((centered * centered).sum()))
+            if norm == 0.0:
+                raise ValueError(f"Template '{name}' has no contrast and cannot be matched")
+            self.pyramid.append((centered.astype(np.float32), norm))
+    
+    @classmethod
+    def from_pyramid(
+        cls,
+        pyramid: List[Tuple[np.ndarray, float]],
+        height: int,
+        width: int,
+        name: str = ''
+    ) -> 'Template':
+        """
+        Rebuild a template from previously prepared pyramid levels.
+        
+        Args:
+            pyramid: (zero-mean level, L2 norm) pairs, full resolution first
+            height: Template height
+            width: Template width
+            name: Label used in log messages
+            
+        Returns:
+            Template ready for matching
+        """
+        template = cls.__new__(cls)
+        template.name = name
+        template.height = height
+        template.width = width
+        template.levels = len(pyramid) - 1
+        template.pyramid = pyramid
+        return template
+
+
+def _ncc_full(frame: np.ndarray, template: np.ndarray, norm: float) -> np.ndarray:
+    """
+    Normalized cross-correlation of a zero-mean template at every position.
+    
+    Uses FFT correlation for the numerator and integral images for the
+    per-window frame statistics.
+    """
+    th, tw = template.shape
+    fh, fw = frame.shape
+    n = th * tw
+    
+    shape = (fh + th - 1, fw + tw - 1)
+    spectrum = np.fft.rfft2(frame, shape) * np.conj(np.fft.rfft2(template, shape))
+    numerator = np.fft.irfft2(spectrum, shape)[:fh - th + 1, :fw - tw + 1]
+    
+    frame64 = frame.astype(np.float64)
+    integral = np.pad(frame64.cumsum(0).cumsum(1), ((1, 0), (1, 0)))
+    integral_sq = np.pad((frame64 * frame64).cumsum(0).cumsum(1), ((1, 0), (1, 0)))
+    
+    def window_sum(table: np.ndarray) -> np.ndarray:
+        return table[th:, tw:] - table[:-th, tw:] - table[th:, :-tw] + table[:-th, :-tw]
+    
+    sums = window_sum(integral)
+    variance = window_sum(integral_sq) - sums * sums / n
+    
+    denominator = np.sqrt(np.maximum(variance, 0.0)) * norm
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scores = np.where(denominator > 1e-6, numerator / denominator, 0.0)
+    return scores
+
+
+def _ncc_window(
+    frame: np.ndarray,
+    template: np.ndarray,
+    norm: float,
+    x: int,
+    y: int,
+    radius: int
+) -> Tuple[int, int, float]:
+    """
+    Best NCC score within a small square of positions around (x, y).
+    
+    Returns:
+        Tuple of (x, y, score) for the best position
+    """
+    th, tw = template.shape
+    fh, fw = frame.shape
+    
+    x0, y0 = max(x - radius, 0), max(y - radius, 0)
+    x1, y1 = min(x + radius, fw - tw), min(y + radius, fh - th)
+    if x1 < x0 or y1 < y0:
+        return (x, y, -1.0)
+    
+    patch = frame[y0:y1 + th, x0:x1 + tw]
+    windows = np.lib.stride_tricks.sliding_window_view(patch, (th, tw))
+    centered = windows - windows.mean(axis=(2, 3), keepdims=True)
+    
+    numerator = np.einsum('ijkl,kl->ij', centered, template)
+    denominator = np.sqrt(np.einsum('ijkl,ijkl->ij', centered, centered)) * norm
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scores = np.where(denominator > 1e-6, numerator / denominator, 0.0)
+    
+    iy, ix = np.unravel_index(int(np.argmax(scores)), scores.shape)
+    return (x0 + int(ix), y0 + int(iy), float(scores[iy, ix]))
+
+
+def _top_candidates(scores: np.ndarray, count: int, min_score: float, spacing: Tuple[int, int]) -> List[Tuple[int, int]]:
+    """Pick the best-scoring positions, suppressing neighbours of earlier picks."""
+    flat = scores.ravel()
+    eligible = np.flatnonzero(flat >= min_score)
+    if eligible.size == 0:
+        return []
+    
+    order = eligible[np.argsort(flat[eligible])[::-1]]
+    width = scores.shape[1]
+    sy, sx = spacing
+    
+    picked: List[Tuple[int, int]] = []
+    for index in order[:count * 50]:
+        y, x = divmod(int(index), width)
+        if all(abs(x - px) >= sx or abs(y - py) >= sy for px, py in picked):
+            picked.append((x, y))
+            if len(picked) == count:
+                break
+    return picked
+
+
+def find_template(
+    frame: Any,
+    template: Template,
+    threshold: float = 0.9,
+    offset: Tuple[int, int] = (0, 0)
+) -> Optional[Match]:
+    """
+    Locate a template on a frame.
+    
+    The frame is matched exhaustively at the coarsest pyramid level, then the
+    best candidates are refined level by level within a few pixels.
+    
+    Args:
+        frame: Screen capture (PIL image or NumPy array), already limited to
+            the region of interest
+        template: Prepared template
+        threshold: Minimum confidence for a match
+        offset: Screen position of the frame's top-left corner
+    
+    Returns:
+        Best match at or above the threshold, or None
+    """
+    gray = frame if isinstance(frame, np.ndarray) and frame.ndim == 2 else to_gray(frame)
+    
+    if gray.shape[0] < template.height or gray.shape[1] < template.width:
+        return None
+    
+    levels = template.levels
+    pyramid = build_pyramid(gray, levels)
+    
+    coarse, coarse_norm = template.pyramid[levels]
+    if pyramid[levels].shape[0] < coarse.shape[0] or pyramid[levels].shape[1] < coarse.shape[1]:
+        return None
+    
+    scores = _ncc_full(pyramid[levels], coarse, coarse_norm)
+    min_score = threshold - COARSE_SLACK if levels else threshold
+    candidates = _top_candidates(scores, MAX_CANDIDATES, min_score, coarse.shape)
+    
+    best: Optional[Tuple[int, int, float]] = None
+    for x, y in candidates:
+        score = float(scores[y, x])
+        for level in range(levels - 1, -1, -1):
+            level_template, level_norm = template.pyramid[level]
+            x, y, score = _ncc_window(pyramid[level], level_template, level_norm, x * 2, y * 2, REFINE_RADIUS)
+        if best is None or score > best[2]:
+            best = (x, y, score)
+    
+    if best is None or best[2] < threshold:
+        return None
+    
+    x, y, score = best
+    return Match(x + offset[0], y + offset[1], template.width, template.height, score)
@@ -0,0 +1,295 @@
+"""
+Input Backends
+
+Abstraction over the mouse, keyboard, clipboard and screen primitives used by
+ScriptExecutor, so the engine can run against a live desktop or in memory.
+"""
+
+import time
+from typing import Any, Callable, List, Optional, Tuple
+
+
+class FailSafeTriggered(Exception):
+    """Raised by a backend when its fail-safe aborts execution."""
+
+
+class InputBackend:
+    """Base class for input backends. Subclasses implement every primitive."""
+    
+    # Exception type the executor treats as a fail-safe abort
+    FailSafeException = FailSafeTriggered
+    
+    def click(self, x: int, y: int) -> None:
+        raise NotImplementedError
+    
+    def double_click(self, x: int, y: int) -> None:
+        raise NotImplementedError
+    
+    def right_click(self, x: int, y: int) -> None:
+        raise NotImplementedError
+    
+    def move_to(self, x: int, y: int, duration: float = 0) -> None:
+        raise NotImplementedError
+    
+    def drag_to(self, x: int, y: int, duration: float = 0.5) -> None:
+        raise NotImplementedError
+    
+    def mouse_down(self) -> None:
+        raise NotImplementedError
+    
+    def mouse_up(self) -> None:
+        raise NotImplementedError
+    
+    def position(self) -> Tuple[int, int]:
+        raise NotImplementedError
+    
+    def write(self, text: str, interval: float = 0) -> None:
+        raise NotImplementedError
+    
+    def hotkey(self, *keys: str) -> None:
+        raise NotImplementedError
+    
+    def press(self, key: str, presses: int = 1) -> None:
+        raise NotImplementedError
+    
+    def scroll(self, amount: int, x: Optional[int] = None, y: Optional[int] = None) -> None:
+        raise NotImplementedError
+    
+    def set_clipboard(self, text: str) -> None:
+        raise NotImplementedError
+    
+    def get_clipboard(self) -> str:
+        raise NotImplementedError
+    
+    def screenshot(self, region: Optional[Tuple[int, int, int, int]] = None) -> Any:
+        """
+        Capture the screen.
+        
+        Args:
+            region: Optional (left, top, width, height) to capture
+        
+        Returns:
+            PIL image or H x W x 3 RGB NumPy array
+        """
+        raise NotImplementedError
+
+
+class PyAutoGUIBackend(InputBackend):
+    """
+    Drives the real desktop through pyautogui and pyperclip.
+    
+    Both modules are loaded on first use, so creating the backend costs
+    nothing until a step actually runs.
+    """
+    
+    def __init__(self, fail_safe: bool = True, pause: float = 0.1):
+        """
+        Initialize the pyautogui backend.
+        
+        Args:
+            fail_safe: Enable PyAutoGUI fail-safe feature
+            pause: Seconds pyautogui sleeps after each call
+        """
+        self.fail_safe = fail_safe
+        self.pause = pause
+        self._gui: Any = None
+        self._clip: Any = None
+    
+    @property
+    def gui(self) -> Any:
+        """The pyautogui module, imported and configured on first access."""
+        if self._gui is None:
+            import pyautogui
+            
+            pyautogui.FAILSAFE = self.fail_safe
+            pyautogui.PAUSE = self.pause
+            self.FailSafeException = pyautogui.FailSafeException
+            self._gui = pyautogui
+        return self._gui
+    
+    @property
+    def clip(self) -> Any:
+        """The pyperclip module, imported on first access."""
+        if self._clip is None:
+            import pyperclip
+            self._clip = pyperclip
+        return self._clip
+    
+    def click(self, x: int, y: int) -> None:
+        self.gui.click(x, y)
+    
+    def double_click(self, x: int, y: int) -> None:
+        self.gui.doubleClick(x, y)
+    
+    def right_click(self, x: int, y: int) -> None:
+        self.gui.rightClick(x, y)
+    
+    def move_to(self, x: int, y: int, duration: float = 0) -> None:
+        self.gui.moveTo(x, y, duration=duration)
+    
+    def drag_to(self, x: int, y: int, duration: float = 0.5) -> None:
+        self.gui.dragTo(x, y, duration=duration)
+    
+    def mouse_down(self) -> None:
+        self.gui.mouseDown()
+    
+    def mouse_up(self) -> None:
+        self.gui.mouseUp()
+    
+    def position(self) -> Tuple[int, int]:
+        x, y = self.gui.position()
+        return (x, y)
+    
+    def write(self, text: str, interval: float = 0) -> None:
+        self.gui.write(text, interval=interval)
+    
+    def hotkey(self, *keys: str) -> None:
+        self.gui.hotkey(*keys)
+    
+    def press(self, key: str, presses: int = 1) -> None:
+        self.gui.press(key, presses=presses)
+    
+    def scroll(self, amount: int, x: Optional[int] = None, y: Optional[int] = None) -> None:
+        if x is not None and y is not None:
+            self.gui.scroll(amount, x=x, y=y)
+        else:
+            self.gui.scroll(amount)
+    
+    def set_clipboard(self, text: str) -> None:
+        self.clip.copy(text)
+    
+    def get_clipboard(self) -> str:
+        return self.clip.paste()
+    
+    def screenshot(self, region: Optional[Tuple[int, int, int, int]] = None) -> Any:
+        if region is not None:
+            return self.gui.screenshot(region=region)
+        return self.gui.screenshot()
+
+
+class InputEvent:
+    """A primitive call captured by RecordingBackend."""
+    
+    __slots__ = ('timestamp', 'name', 'args')
+    
+    def __init__(self, timestamp: float, name: str, args: Tuple[Any, ...]):
+        self.timestamp = timestamp
+        self.name = name
+        self.args = args
+    
+    def __repr__(self) -> str:
+        return f"InputEvent({self.timestamp:.6f}, {self.name!r}, {self.args!r})"
+
+
+class RecordedScreenshot:
+    """Image returned by RecordingBackend.screenshot()."""
+    
+    def __init__(
+        self,
+        backend: 'RecordingBackend',
+        region: Optional[Tuple[int, int, int, int]],
+        pixels: Any = None
+    ):
+        self._backend = backend
+        self.region = region
+        self.pixels = pixels
+    
+    def save(self, filename: str, *args: Any, **kwargs: Any) -> None:
+        self._backend._record('save_screenshot', (filename,))
+    
+    def tobytes(self) -> bytes:
+        return self.pixels.tobytes() if self.pixels is not None else b''
+    
+    def __array__(self, dtype: Any = None, copy: Any = None) -> Any:
+        import numpy as np
+        
+        if self.pixels is None:
+            return np.zeros((1, 1, 3), dtype=dtype or np.uint8)
+        return np.asarray(self.pixels, dtype=dtype)
+
+
+class RecordingBackend(InputBackend):
+    """
+    In-memory backend that records every call with a timestamp.
+    
+    Nothing touches the display, which makes it suitable for tests and for
+    benchmarking the engine itself on headless machines.
+    """
+    
+    def __init__(self, clock: Callable[[], float] = time.perf_counter, screen: Any = None):
+        """
+        Initialize the recording backend.
+        
+        Args:
+            clock: Function returning the current time in seconds
+            screen: Optional H x W x 3 array served by screenshot()
+        """
+        self.screen = screen
+        self.events: List[InputEvent] = []
+        self.clipboard = ''
+        self.cursor: Tuple[int, int] = (0, 0)
+        self._clock = clock
+    
+    def _record(self, name: str, args: Tuple[Any, ...]) -> None:
+        self.events.append(InputEvent(self._clock(), name, args))
+    
+    def clear(self) -> None:
+        """Discard all recorded events."""
+        self.events.clear()
+    
+    def click(self, x: int, y: int) -> None:
+        self.cursor = (x, y)
+        self._record('click', (x, y))
+    
+    def double_click(self, x: int, y: int) -> None:
+        self.cursor = (x, y)
+        self._record('double_click', (x, y))
+    
+    def right_click(self, x: int, y: int) -> None:
+        self.cursor = (x, y)
+        self._record('right_click', (x, y))
+    
+    def move_to(self, x: int, y: int, duration: float = 0) -> None:
+        self.cursor = (x, y)
+        self._record('move_to', (x, y, duration))
+    
+    def drag_to(self, x: int, y: int, duration: float = 0.5) -> None:
+        self.cursor = (x, y)
+        self._record('drag_to', (x, y, duration))
+    
+    def mouse_down(self) -> None:
+        self._record('mouse_down', ())
+    
+    def mouse_up(self) -> None:
+        self._record('mouse_up', ())
+    
+    def position(self) -> Tuple[int, int]:
+        return self.cursor
+    
+    def write(self, text: str, interval: float = 0) -> None:
+        self._record('write', (text, interval))
+    
+    def hotkey(self, *keys: str) -> None:
+        self._record('hotkey', keys)
+    
+    def press(self, key: str, presses: int = 1) -> None:
+        self._record('press', (key, presses))
+    
+    def scroll(self, amount: int, x: Optional[int] = None, y: Optional[int] = None) -> None:
+        self._record('scroll', (amount, x, y))
+    
+    def set_clipboard(self, text: str) -> None:
+        self.clipboard = text
+        self._record('set_clipboard', (text,))
+    
+    def get_clipboard(self) -> str:
+        self._record('get_clipboard', ())
+        return self.clipboard
+    
+    def screenshot(self, region: Optional[Tuple[int, int, int, int]] = None) -> Any:
+        self._record('screenshot', (region,))
+        pixels = self.screen
+        if pixels is not None and region is not None:
+            left, top, width, height = region
+            pixels = pixels[top:top + height, left:left + width]
+        return RecordedScreenshot(self, region, pixels)
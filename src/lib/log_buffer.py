@@ -0,0 +1,211 @@
+"""
+Log Buffer
+
+Keeps the most recent log lines in memory and spills older ones to a
+rotating set of compressed files on disk.
+"""
+
+import gzip
+import os
+from collections import deque
+from pathlib import Path
+from typing import Deque, Iterator, List, Optional
+
+
+DEFAULT_LOG_DIR = Path.home() / '.automation_studio' / 'logs'
+
+# Lines kept in memory (and in the log panel) before spilling to disk
+DEFAULT_MAX_LINES = 5000
+
+
+class LogArchive:
+    """
+    Append-only log file that rotates into gzip-compressed segments.
+    
+    The active segment is 'execution.log'; full segments become
+    'execution.1.log.gz' (newest) up to 'execution.<backups>.log.gz' (oldest),
+    and anything older is deleted.
+    """
+    
+    def __init__(
+        self,
+        directory: Path = DEFAULT_LOG_DIR,
+        max_bytes: int = 1024 * 1024,
+        backups: int = 5
+    ):
+        """
+        Initialize the archive.
+        
+        Args:
+            directory: Folder for the log files (created on first write)
+            max_bytes: Size at which the active segment is rotated
+            backups: Number of compressed segments to keep
+        """
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.path = self.directory / 'execution.log'
+    
+    def write(self, lines: List[str]) -> None:
+        """
+        Append lines to the active segment, rotating it when full.
+        
+        Args:
+            lines: Log lines without trailing newlines
+        
+        Raises:
+            OSError: If the log folder cannot be written
+        """
+        if not lines:
+            return
+        
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+            size = f.tell()
+        
+        if size >= self.max_bytes:
+            self._rotate()
+    
+    def read_newest(self, count: int, skip: int = 0) -> List[str]:
+        """
+        Read archived lines, newest first.
+        
+        Args:
+            count: Maximum number of lines to return
+            skip: Number of newest lines to pass over (already shown)
+        
+        Returns:
+            Up to count lines in chronological order
+        """
+        lines: List[str] = []
+        for segment in self._segments_newest_first():
+            if len(lines) >= count:
+                break
+            
+            segment_lines = segment[::-1]
+            if skip >= len(segment_lines):
+                skip -= len(segment_lines)
+                continue
+            
+            lines.extend(segment_lines[skip:skip + count - len(lines)])
+            skip = 0
+        
+        lines.reverse()
+        return lines
+    
+    def _segment_path(self, number: int) -> Path:
+        return self.directory / f'execution.{number}.log.gz'
+    
+    def _rotate(self) -> None:
+        """Compress the active segment and shift older segments down."""
+        oldest = self._segment_path(self.backups)
+        if oldest.exists():
+            oldest.unlink()
+        
+        for number in range(self.backups - 1, 0, -1):
+            source = self._segment_path(number)
+            if source.exists():
+                os.replace(source, self._segment_path(number + 1))
+        
+        if self.backups > 0:
+            target = self._segment_path(1)
+            temp_path = target.with_name(target.name + '.tmp')
+            with open(self.path, 'rb') as src, gzip.open(temp_path, 'wb') as dst:
+                dst.write(src.read())
+            os.replace(temp_path, target)
+        
+        self.path.unlink()
+    
+    def _segments_newest_first(self) -> Iterator[List[str]]:
+        """Yield the lines of each segment, starting with the active one."""
+        if self.path.exists():
+            yield self.path.read_text(encoding='utf-8').splitlines()
+        
+        for number in range(1, self.backups + 1):
+            segment = self._segment_path(number)
+            if not segment.exists():
+                break
+            with gzip.open(segment, 'rt', encoding='utf-8') as f:
+                yield f.read().splitlines()
+
+
+class LogBuffer:
+    """
+    Ring buffer of the lines shown in the log panel.
+    
+    Lines pushed out of the buffer are written to the archive. Older lines
+    can be paged back in from the archive; they sit above the live lines and
+    are the first to go when the buffer overflows again.
+    """
+    
+    def __init__(self, max_lines: int = DEFAULT_MAX_LINES, archive: Optional[LogArchive] = None):
+        """
+        Initialize the buffer.
+        
+        Args:
+            max_lines: Number of live lines kept in memory
+            archive: Where evicted lines are written; None discards them
+        """
+        self.max_lines = max_lines
+        self.archive = archive
+        self.lines: Deque[str] = deque()
+        
+        # Archived lines currently shown above the live lines
+        self.history_lines = 0
+        self.archive_errors = 0
+    
+    def append(self, lines: List[str]) -> int:
+        """
+        Add new lines, evicting the oldest once the buffer is full.
+        
+        Args:
+            lines: New log lines, oldest first
+        
+        Returns:
+            Number of lines to remove from the top of the display
+        """
+        self.lines.extend(lines)
+        
+        overflow = len(self.lines) - self.max_lines
+        if overflow <= 0:
+            return 0
+        
+        popleft = self.lines.popleft
+        evicted = [popleft() for _ in range(overflow)]
+        if self.archive is not None:
+            try:
+                self.archive.write(evicted)
+            except OSError:
+                # Keep logging to the panel even if the disk is unavailable
+                self.archive_errors += 1
+        
+        removed = self.history_lines + overflow
+        self.history_lines = 0
+        return removed
+    
+    def load_older(self, count: int) -> List[str]:
+        """
+        Fetch archived lines older than everything currently shown.
+        
+        Args:
+            count: Maximum number of lines to fetch
+        
+        Returns:
+            Lines to insert at the top of the display, oldest first
+        """
+        if self.archive is None:
+            return []
+        
+        try:
+            older = self.archive.read_newest(count, skip=self.history_lines)
+        except (OSError, EOFError):
+            return []
+        
+        self.history_lines += len(older)
+        return older
+    
+    def clear(self) -> None:
+        """Forget the displayed lines; archived lines are kept."""
+        self.lines.clear()
+        self.history_lines = 0
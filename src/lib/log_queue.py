@@ -0,0 +1,70 @@
+"""
+Log Queue
+
+Hands log messages from worker threads to the UI thread without locking,
+so the UI can insert them in batches on its own schedule.
+"""
+
+from collections import deque
+from datetime import datetime
+from typing import Deque, List, Optional
+
+
+class LogQueue:
+    """
+    Multi-producer, single-consumer queue of timestamped log lines.
+    
+    Built on deque.append/popleft, which are atomic, so producers never block
+    and never wait on the consumer.
+    """
+    
+    def __init__(self, timestamp_format: str = '%H:%M:%S'):
+        """
+        Initialize the queue.
+        
+        Args:
+            timestamp_format: strftime format for the line prefix
+        """
+        self.timestamp_format = timestamp_format
+        self._lines: Deque[str] = deque()
+    
+    def push(self, message: str) -> None:
+        """
+        Add a message, stamped with the time it was produced.
+        
+        A message with several lines (exception text, YAML errors) is queued
+        as one stamped entry per line, so every entry is exactly one line of
+        the log panel and the archive.
+        
+        Safe to call from any thread.
+        
+        Args:
+            message: Log message
+        """
+        timestamp = datetime.now().strftime(self.timestamp_format)
+        if '\n' not in message and '\r' not in message:
+            self._lines.append(f"[{timestamp}] {message}")
+            return
+        
+        # Extending with a list is atomic too, so the lines stay together
+        self._lines.extend([f"[{timestamp}] {line}" for line in message.splitlines()])
+    
+    def drain(self, limit: Optional[int] = None) -> List[str]:
+        """
+        Remove and return queued lines, oldest first.
+        
+        Args:
+            limit: Maximum number of lines to take, or None for all
+        
+        Returns:
+            List of formatted log lines (possibly empty)
+        """
+        lines = []
+        popleft = self._lines.popleft
+        count = len(self._lines) if limit is None else min(limit, len(self._lines))
+        for _ in range(count):
+            lines.append(popleft())
+        return lines
+    
+    def __len__(self) -> int:
+        return len(self._lines)
@@ -0,0 +1,62 @@
+"""
+Pacing Policy
+
+Settle time inserted after input actions, declared per script or per step.
+"""
+
+import math
+from typing import Any, Dict
+
+
+# Pause after each input action, in milliseconds
+PACING_PROFILES: Dict[str, int] = {
+    'turbo': 0,
+    'default': 100,
+    'safe': 250,
+}
+
+DEFAULT_PACING = 'default'
+
+# Actions that send input to the desktop and therefore get a pause afterwards
+PACED_ACTIONS = frozenset({
+    'click', 'double_click', 'right_click',
+    'move_to', 'drag_to',
+    'type', 'hotkey', 'press',
+    'scroll', 'paste',
+    'click_image',
+})
+
+
+def resolve_pacing(value: Any) -> float:
+    """
+    Resolve a pacing value to a pause in seconds.
+    
+    Args:
+        value: Profile name ('turbo', 'default', 'safe') or milliseconds
+    
+    Returns:
+        Pause duration in seconds
+    
+    Raises:
+        ValueError: If the value is not a known profile or a finite,
+            non-negative number
+    """
+    if isinstance(value, str):
+        if value not in PACING_PROFILES:
+            raise ValueError(
+                f"Unknown pacing profile '{value}'. "
+                f"Valid profiles: {', '.join(PACING_PROFILES)}"
+            )
+        return PACING_PROFILES[value] / 1000.0
+    
+    if (
+        isinstance(value, bool)
+        or not isinstance(value, (int, float))
+        or (isinstance(value, float) and not math.isfinite(value))
+        or value < 0
+    ):
+        raise ValueError(
+            f"Pacing must be a profile name or a finite, non-negative number of milliseconds, got {value!r}"
+        )
+    
+    return value / 1000.0
@@ -0,0 +1,117 @@
+"""
+Progress Channel
+
+Latest-value progress reporting between the executor thread and the UI.
+The executor overwrites a single state tuple per step; readers sample it
+whenever they like, so reporting cost does not depend on script speed.
+"""
+
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+class ProgressChannel:
+    """Holds the most recent step counter and derives rate and ETA from it."""
+    
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        """
+        Initialize the channel.
+        
+        Args:
+            clock: Monotonic clock in seconds
+        """
+        self.clock = clock
+        self.total = 0
+        # Dataset row being run, or 0 outside dataset runs
+        self.row = 0
+        self.running = False
+        self._started = clock()
+        self._finished: Optional[float] = None
+        self._paused_at: Optional[float] = None
+        # Seconds spent paused in this run, updated on resume
+        self.paused_total = 0.0
+        
+        # (current step, completed steps, time of last update); replaced
+        # as a whole so a reader never sees a half-written update
+        self._state = (0, 0, self._started)
+    
+    def start(self, total: int, row: int = 0) -> None:
+        """
+        Begin a new run.
+        
+        Args:
+            total: Number of steps in the run
+            row: Dataset row number, when the run is one row of a dataset
+        """
+        now = self.clock()
+        self.total = total
+        self.row = row
+        self._started = now
+        self._finished = None
+        self._paused_at = None
+        self.paused_total = 0.0
+        self._state = (0, 0, now)
+        self.running = True
+    
+    def publish(self, current: int, completed: int) -> None:
+        """
+        Record the latest position. Called from the executor thread.
+        
+        Args:
+            current: Step number being executed
+            completed: Number of steps finished
+        """
+        self._state = (current, completed, self.clock())
+    
+    def pause(self) -> None:
+        """Stop the clock used for rate and ETA."""
+        if self._paused_at is None:
+            self._paused_at = self.clock()
+    
+    def resume(self) -> None:
+        """Restart the clock after pause()."""
+        if self._paused_at is not None:
+            self.paused_total += self.clock() - self._paused_at
+            self._paused_at = None
+    
+    def finish(self) -> None:
+        """Mark the run as over and freeze the elapsed time."""
+        self.resume()
+        self._finished = self.clock()
+        self.running = False
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Sample the current progress.
+        
+        Returns:
+            Dictionary with current, completed, total, elapsed (seconds,
+            excluding pauses), steps_per_sec, eta (seconds or None), row
+            (0 outside dataset runs) and running
+        """
+        current, completed, _ = self._state
+        
+        if self._finished is not None:
+            end = self._finished
+        elif self._paused_at is not None:
+            end = self._paused_at
+        else:
+            end = self.clock()
+        elapsed = max(end - self._started - self.paused_total, 0.0)
+        
+        rate = completed / elapsed if elapsed > 0 else 0.0
+        remaining = max(self.total - completed, 0)
+        # A stream run without a validation pass does not know its length,
+        # so it has no ETA
+        eta = remaining / rate if rate > 0 and self.total else None
+        
+        return {
+            'current': current,
+            'completed': completed,
+            'total': self.total,
+            'elapsed': elapsed,
+            'steps_per_sec': rate,
+            'eta': eta,
+            'row': self.row,
+            'running': self.running,
+        }
@@ -0,0 +1,183 @@
+"""
+Field Schema
+
+Type and range rules for step fields, and the compiler that turns the fields
+every action declares into a lookup table, so validating a step is one loop
+over its action's rules.
+"""
+
+import math
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+
+class Rule:
+    """A check on a field value and the phrase its error message uses."""
+    
+    __slots__ = ('check', 'expected')
+    
+    def __init__(self, check: Callable[[Any], bool], expected: str):
+        """
+        Initialize a rule.
+        
+        Args:
+            check: Returns True for an acceptable value
+            expected: What the value must be, e.g. "an integer from 0 to 9"
+        """
+        self.check = check
+        self.expected = expected
+    
+    def __repr__(self) -> str:
+        return f"Rule({self.expected!r})"
+
+
+def _bounds(minimum: Optional[float], maximum: Optional[float]) -> str:
+    """Describe a range for an error message."""
+    if minimum is not None and maximum is not None:
+        return f" from {minimum} to {maximum}"
+    if minimum is not None:
+        return f" of {minimum} or more"
+    if maximum is not None:
+        return f" of {maximum} or less"
+    return ""
+
+
+def integer(minimum: Optional[int] = None, maximum: Optional[int] = None) -> Rule:
+    """
+    An int (not a bool) within an optional inclusive range.
+    
+    Args:
+        minimum: Smallest allowed value
+        maximum: Largest allowed value
+    
+    Returns:
+        Rule
+    """
+    low = float('-inf') if minimum is None else minimum
+    high = float('inf') if maximum is None else maximum
+    
+    def check(value: Any) -> bool:
+        return type(value) is int and low <= value <= high
+    
+    return Rule(check, "an integer" + _bounds(minimum, maximum))
+
+
+def number(minimum: Optional[float] = None, maximum: Optional[float] = None) -> Rule:
+    """
+    An int or finite float (not a bool) within an optional inclusive range.
+    
+    Args:
+        minimum: Smallest allowed value
+        maximum: Largest allowed value
+    
+    Returns:
+        Rule
+    """
+    low = float('-inf') if minimum is None else minimum
+    high = float('inf') if maximum is None else maximum
+    
+    def check(value: Any) -> bool:
+        if type(value) is float:
+            return math.isfinite(value) and low <= value <= high
+        return type(value) is int and low <= value <= high
+    
+    return Rule(check, "a finite number" + _bounds(minimum, maximum))
+
+
+def string(allow_empty: bool = True) -> Rule:
+    """
+    A str, optionally required to be non-empty.
+    
+    Args:
+        allow_empty: Whether '' is acceptable
+    
+    Returns:
+        Rule
+    """
+    if allow_empty:
+        return Rule(lambda value: isinstance(value, str), "a string")
+    return Rule(lambda value: isinstance(value, str) and value != '', "a non-empty string")
+
+
+def one_of(values: Iterable[str]) -> Rule:
+    """
+    One of a fixed set of strings.
+    
+    Args:
+        values: Accepted values, in the order they are listed in messages
+    
+    Returns:
+        Rule
+    """
+    accepted = tuple(values)
+    allowed = frozenset(accepted)
+    return Rule(
+        lambda value: isinstance(value, str) and value in allowed,
+        f"one of: {', '.join(accepted)}"
+    )
+
+
+def integer_list(length: int, expected: str) -> Rule:
+    """
+    A list of exactly `length` ints.
+    
+    Args:
+        length: Number of items
+        expected: Message phrase, e.g. "a list of 2 integers [dx, dy]"
+    
+    Returns:
+        Rule
+    """
+    def check(value: Any) -> bool:
+        return (
+            isinstance(value, (list, tuple)) and len(value) == length
+            and all(type(item) is int for item in value)
+        )
+    
+    return Rule(check, expected)
+
+
+def string_list() -> Rule:
+    """A non-empty list of non-empty strings."""
+    def check(value: Any) -> bool:
+        return (
+            isinstance(value, list) and len(value) > 0
+            and all(isinstance(item, str) and item != '' for item in value)
+        )
+    
+    return Rule(check, "a non-empty list of strings")
+
+
+def step_list() -> Rule:
+    """A non-empty list; the steps in it are validated on their own."""
+    return Rule(lambda value: isinstance(value, list) and len(value) > 0, "a non-empty list of steps")
+
+
+def mapping() -> Rule:
+    """A dictionary; its contents are validated separately."""
+    return Rule(lambda value: isinstance(value, dict), "a mapping")
+
+
+# (key, required, accepts None, rule) for each field of an action
+FieldCheck = Tuple[str, bool, bool, Rule]
+
+
+def compile_rules(step_types: Dict[str, Any], required: Any) -> Dict[str, Tuple[FieldCheck, ...]]:
+    """
+    Build the validation table from the fields each step class declares.
+    
+    Args:
+        step_types: Action name to step class, whose FIELDS are
+            (attribute, default, rule) triples and KEYS maps attributes to
+            dictionary keys
+        required: Marker default of required fields
+    
+    Returns:
+        Action name to the checks of its fields, in declaration order
+    """
+    table = {}
+    for action, cls in step_types.items():
+        table[action] = tuple(
+            (cls.KEYS.get(name, name), default is required, default is None, rule)
+            for name, default, rule in cls.FIELDS
+        )
+    return table
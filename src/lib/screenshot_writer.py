@@ -0,0 +1,143 @@
+"""
+Screenshot Writer
+
+Encodes and saves screenshots on background threads so the executor only
+pays for the capture itself.
+"""
+
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+
+# File formats accepted by the screenshot action, mapped to PIL format names
+SCREENSHOT_FORMATS = {
+    'png': 'PNG',
+    'jpg': 'JPEG',
+    'jpeg': 'JPEG',
+    'bmp': 'BMP',
+    'webp': 'WEBP',
+}
+
+_STOP = None
+
+
+class ScreenshotWriter:
+    """
+    Pool of worker threads fed through a bounded queue.
+    
+    Submitters and workers share one lock: workers signal when they take a
+    screenshot off the queue, and interrupt() wakes submitters waiting for
+    space so a stop request is seen at once.
+    """
+    
+    def __init__(
+        self,
+        workers: int = 2,
+        max_queue: int = 8,
+        on_error: Optional[Callable[[str], None]] = None
+    ):
+        """
+        Start the writer threads.
+        
+        Args:
+            workers: Number of encoder threads
+            max_queue: Screenshots allowed to wait before submit() blocks;
+                0 means no limit
+            on_error: Called with a message when a file cannot be written
+        """
+        self.on_error = on_error
+        self._max_queue = max_queue
+        self._items: Deque[Optional[tuple]] = deque()
+        lock = threading.Lock()
+        self._not_empty = threading.Condition(lock)
+        self._not_full = threading.Condition(lock)
+        self._threads: List[threading.Thread] = []
+        
+        for i in range(workers):
+            thread = threading.Thread(target=self._work, name=f"ScreenshotWriter-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+    
+    def submit(
+        self,
+        image: Any,
+        filename: str,
+        options: Dict[str, Any],
+        stop_event: Optional[threading.Event] = None
+    ) -> bool:
+        """
+        Queue a screenshot for saving, blocking only while the queue is full.
+        
+        Args:
+            image: PIL image or NumPy array; arrays are copied because capture
+                backends may reuse their buffers
+            filename: Output path
+            options: 'format', 'compress_level' and 'quality' settings
+            stop_event: Abandon the wait for queue space when this is set;
+                call interrupt() after setting it to wake a waiting submit()
+        
+        Returns:
+            True if queued, False if abandoned because of stop_event
+        """
+        if not hasattr(image, 'save'):
+            import numpy as np
+            image = np.array(image)
+        
+        items = self._items
+        with self._not_full:
+            while 0 < self._max_queue <= len(items):
+                if stop_event is not None and stop_event.is_set():
+                    return False
+                self._not_full.wait()
+            items.append((image, filename, options))
+            self._not_empty.notify()
+        return True
+    
+    def interrupt(self) -> None:
+        """Wake submit() calls waiting for queue space to recheck their stop event."""
+        with self._not_full:
+            self._not_full.notify_all()
+    
+    def close(self) -> None:
+        """Write everything still queued, then stop the threads."""
+        with self._not_empty:
+            self._items.extend(_STOP for _ in self._threads)
+            self._not_empty.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self._threads.clear()
+    
+    def _work(self) -> None:
+        items = self._items
+        while True:
+            with self._not_empty:
+                while not items:
+                    self._not_empty.wait()
+                item = items.popleft()
+                self._not_full.notify()
+            
+            if item is _STOP:
+                return
+            
+            image, filename, options = item
+            try:
+                self._save(image, filename, options)
+            except Exception as e:
+                if self.on_error:
+                    self.on_error(f"Failed to save screenshot {filename}: {e}")
+    
+    @staticmethod
+    def _save(image: Any, filename: str, options: Dict[str, Any]) -> None:
+        if not hasattr(image, 'save'):
+            from PIL import Image
+            image = Image.fromarray(image)
+        
+        fmt = options.get('format')
+        params: Dict[str, Any] = {}
+        if 'compress_level' in options:
+            params['compress_level'] = options['compress_level']
+        if 'quality' in options:
+            params['quality'] = options['quality']
+        
+        image.save(filename, format=SCREENSHOT_FORMATS.get(fmt) if fmt else None, **params)
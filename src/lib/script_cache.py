@@ -0,0 +1,143 @@
+"""
+Script Cache
+
+On-disk cache of validated script data keyed by the script's content hash,
+so unchanged scripts skip YAML parsing and step validation.
+"""
+
+import hashlib
+import marshal
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+# Bump when the stored layout changes
+CACHE_FORMAT = 1
+
+DEFAULT_CACHE_DIR = Path.home() / '.automation_studio' / 'script_cache'
+
+ENTRY_SUFFIX = '.script'
+
+
+class ScriptCache:
+    """
+    Stores parsed script dictionaries in marshal format.
+    
+    marshal only handles plain built-in types, which is all a YAML script
+    normally contains; scripts holding anything else are simply not cached.
+    """
+    
+    def __init__(self, directory: Optional[Path] = None, max_entries: int = 64):
+        """
+        Initialize the cache.
+        
+        Args:
+            directory: Folder holding the entries; defaults to
+                ~/.automation_studio/script_cache
+            max_entries: Entries kept before the least recently used are deleted
+        """
+        self.directory = Path(directory) if directory else DEFAULT_CACHE_DIR
+        self.max_entries = max_entries
+        self.stats: Dict[str, int] = {'hits': 0, 'misses': 0}
+    
+    @staticmethod
+    def key(content: bytes, version: int) -> str:
+        """
+        Cache key for a script.
+        
+        Args:
+            content: Raw script file bytes
+            version: Parser version the entry must have been produced by
+        
+        Returns:
+            Key combining the content hash, parser version and storage format
+        """
+        digest = hashlib.sha256(content).hexdigest()
+        return f"{digest}.p{version}.f{CACHE_FORMAT}.m{marshal.version}"
+    
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Read a cached script.
+        
+        Args:
+            key: Key from key()
+        
+        Returns:
+            Script data, or None if there is no usable entry
+        """
+        entry = self.directory / (key + ENTRY_SUFFIX)
+        try:
+            data = marshal.loads(entry.read_bytes())
+            # Refresh the access time used for eviction
+            os.utime(entry)
+        except (OSError, EOFError, ValueError, TypeError):
+            self.stats['misses'] += 1
+            return None
+        
+        if not isinstance(data, dict):
+            self.stats['misses'] += 1
+            return None
+        
+        self.stats['hits'] += 1
+        return data
+    
+    def store(self, key: str, script_data: Dict[str, Any]) -> None:
+        """
+        Write a validated script to the cache.
+        
+        Args:
+            key: Key from key()
+            script_data: Parsed and validated script data
+        """
+        try:
+            payload = marshal.dumps(script_data)
+        except ValueError:
+            # Holds a type marshal cannot store (e.g. a YAML timestamp)
+            return
+        
+        entry = self.directory / (key + ENTRY_SUFFIX)
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            
+            temp_path = entry.with_name(entry.name + '.tmp')
+            temp_path.write_bytes(payload)
+            os.replace(temp_path, entry)
+            
+            self._evict()
+        except OSError:
+            # The cache is an optimisation; a read-only folder just means no reuse
+            pass
+    
+    def clear(self) -> None:
+        """Delete every entry."""
+        for entry in self._entries():
+            try:
+                entry.unlink()
+            except OSError:
+                pass
+    
+    def _entries(self) -> List[Path]:
+        try:
+            return list(self.directory.glob('*' + ENTRY_SUFFIX))
+        except OSError:
+            return []
+    
+    def _evict(self) -> None:
+        """Delete the least recently used entries beyond max_entries."""
+        entries = self._entries()
+        if len(entries) <= self.max_entries:
+            return
+        
+        def last_used(entry: Path) -> float:
+            try:
+                return entry.stat().st_mtime
+            except OSError:
+                return 0.0
+        
+        entries.sort(key=last_used)
+        for entry in entries[:len(entries) - self.max_entries]:
+            try:
+                entry.unlink()
+            except OSError:
+                pass
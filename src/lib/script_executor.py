@@ -4,30 +4,148 @@ Script Executor Engine
 Executes automation scripts parsed by ScriptParser.
 """
 
-import pyautogui
-import pyperclip
+import hashlib
+import threading
 import time
-from typing import Dict, Any, Optional, Callable
+from typing import Dict, Any, List, Optional, Callable, Tuple, Union
 from datetime import datetime
+from pathlib import Path
+
+from src.lib.control_flow import JUMP, LOOP, NEXT, STEP, Instruction, Program, compile_program, parse_color, walk
+from src.lib.dataset import ON_ERROR_MODES, ResultsWriter, dataset_format, iter_rows, results_paths
+from src.lib.execution_plan import CompiledStep, ExecutionPlan
+from src.lib.input_backends import InputBackend, PyAutoGUIBackend
+from src.lib.pacing import DEFAULT_PACING, PACED_ACTIONS, resolve_pacing
+from src.lib.progress import ProgressChannel
+from src.lib.script_stream import ScriptStream
+from src.lib.step_metrics import StepMetrics
+from src.lib.steps import (
+    Click, ClickImage, Delay, Hotkey, Input, Message, MoveTo, Press, Screenshot, Scroll, SetClipboard,
+    Step, TypeText, WaitForImage, WaitUntilStable, step_from_dict
+)
+from src.lib.templates import Template, compile_templates, render_value
+from src.lib.timing import DEFAULT_TIMING, SPIN_THRESHOLD, TIMING_MODES, DeadlineScheduler, sleep_until
+from src.lib.tracer import Tracer
+
+
+# Actions traced as a single 'input' span (click_image traces its own click)
+INPUT_ACTIONS = PACED_ACTIONS - {'click_image'}
+
+
+class ExecutionStopped(Exception):
+    """Raised inside a step when a stop request interrupts it."""
 
 
 class ScriptExecutor:
     """Executes automation scripts step by step."""
     
-    def __init__(self, fail_safe: bool = True):
+    # Seconds between intermediate cursor positions of a timed move or drag
+    MOTION_INTERVAL = 0.01
+    
+    # Maps each action to the method that compiles it into a handler call
+    _COMPILERS = {
+        'click': '_compile_click',
+        'double_click': '_compile_double_click',
+        'right_click': '_compile_right_click',
+        'move_to': '_compile_move_to',
+        'drag_to': '_compile_drag_to',
+        'type': '_compile_type',
+        'hotkey': '_compile_hotkey',
+        'press': '_compile_press',
+        'delay': '_compile_delay',
+        'wait': '_compile_delay',
+        'scroll': '_compile_scroll',
+        'set_clipboard': '_compile_set_clipboard',
+        'paste': '_compile_paste',
+        'screenshot': '_compile_screenshot',
+        'message': '_compile_message',
+        'input': '_compile_input',
+        'wait_until_stable': '_compile_wait_until_stable',
+        'click_image': '_compile_click_image',
+        'wait_for_image': '_compile_wait_for_image',
+    }
+    
+    def __init__(
+        self,
+        fail_safe: bool = True,
+        backend: Optional[InputBackend] = None,
+        pacing: Optional[Any] = None,
+        timing: Optional[str] = None,
+        speed: float = 1.0
+    ):
         """
         Initialize the script executor.
         
         Args:
             fail_safe: Enable PyAutoGUI fail-safe feature
+            backend: Input backend to drive; defaults to PyAutoGUIBackend
+            pacing: Pacing profile or milliseconds overriding the script's own
+            timing: Timing mode overriding the script's own ('relative' or 'scheduled')
+            speed: Multiplier for delays, pauses, motion and typing intervals
+                (2.0 runs them twice as fast); timeouts are not affected
         """
-        pyautogui.FAILSAFE = fail_safe
-        pyautogui.PAUSE = 0.1
+        if backend is None:
+            # Pacing is applied by the executor, not by pyautogui.PAUSE
+            backend = PyAutoGUIBackend(fail_safe=fail_safe, pause=0)
+        self.backend = backend
+        self.pacing = pacing
+        self.timing = timing
+        self.speed = speed
+        
+        # Directory relative image paths in scripts are resolved against
+        self.base_dir: Optional[str] = None
+        # Prepared templates, created on first image step
+        self.template_cache: Optional[Any] = None
+        
+        # Background screenshot encoding, created on first screenshot step
+        self.screenshot_workers = 2
+        self.screenshot_queue_size = 8
+        self._screenshot_writer: Optional[Any] = None
         
         self.is_running = False
         self.is_paused = False
         self.current_step = 0
         self.total_steps = 0
+        # Steps finished in the current or last run, repeats included
+        self.steps_completed = 0
+        # Why the last run failed, if it did
+        self.last_error: Optional[str] = None
+        
+        # Latest step counter for UIs to sample at their own rate
+        self.progress = ProgressChannel()
+        # Per-step latency samples of the current or last run
+        self.metrics = StepMetrics()
+        # Where to export the metrics after each run (.json or .csv), if anywhere
+        self.metrics_file: Optional[str] = None
+        
+        # Chrome trace-event output; tracing is off unless trace_file is set
+        self.trace_file: Optional[str] = None
+        self.tracer: Optional[Tracer] = None
+        self._trace_step: Optional[Tuple[float, int, str]] = None
+        
+        # Values substituted into ${column} fields during a dataset run
+        self._row: Dict[str, Any] = {}
+        # Compiled ${column} fields of the step being compiled
+        self._fields: Dict[str, Any] = {}
+        # Remaining iterations of each repeat block in the running plan
+        self._counters: List[int] = []
+        self.current_row = 0
+        # Row counts and output files of the last dataset run
+        self.dataset_report: Optional[Dict[str, Any]] = None
+        # Top-level steps compiled and run at a time from a ScriptStream
+        self.stream_chunk_size = 256
+        
+        # Deadline tracking for 'scheduled' timing; None in 'relative' mode
+        self._scheduler: Optional[DeadlineScheduler] = None
+        self.timing_report: Optional[Dict[str, float]] = None
+        
+        # Set by stop(); every blocking wait in the executor watches it
+        self._stop_event = threading.Event()
+        # Cleared while paused
+        self._resume_event = threading.Event()
+        self._resume_event.set()
+        # Set by pause() or stop() to wake sleeps early
+        self._interrupt_event = threading.Event()
         
         # Callbacks
         self.on_step_start: Optional[Callable] = None
@@ -36,54 +154,262 @@ class ScriptExecutor:
         self.on_error: Optional[Callable] = None
         self.on_log: Optional[Callable] = None
     
-    def execute_script(self, script_data: Dict[str, Any]) -> bool:
+    def compile(
+        self,
+        script_data: Dict[str, Any],
+        templates: Optional[List[Dict[str, Any]]] = None,
+        program: Optional[Program] = None
+    ) -> ExecutionPlan:
+        """
+        Compile validated script data into an execution plan.
+        
+        Every step is resolved to a bound handler and its arguments once, so
+        running the plan repeatedly does no further dictionary lookups or
+        log formatting. Handlers are bound to the current backend. Control
+        steps (repeat, while, if, goto) become jump instructions, so a loop
+        runs its body without re-reading any step.
+        
+        Args:
+            script_data: Parsed and validated script data dictionary
+            templates: Compiled ${column} fields from ScriptParser.get_templates();
+                compiled here when omitted. Only used with a dataset
+            program: Instruction list from ScriptParser.get_program();
+                compiled here when omitted
+            
+        Returns:
+            Execution plan bound to this executor
+            
+        Raises:
+            KeyError: If a step is missing a required field
+            ValueError: If a step uses an unknown action
+        """
+        steps = script_data.get('steps', [])
+        if program is None:
+            program = compile_program(steps)
+        script_pause = self._script_pause(script_data)
+        timing = self._timing_mode(script_data)
+        
+        dataset = self._resolve_dataset(script_data.get('dataset'))
+        # Placeholders are only substituted when there are rows to fill them
+        if dataset is None:
+            templates = None
+        elif templates is None:
+            templates = compile_templates(list(walk(steps)))
+        
+        compiled = self._compile_program(program, program.steps, script_pause, templates)
+        return ExecutionPlan(
+            script_data.get('name', 'Untitled'), compiled, self, timing, dataset, program.steps, program.counters
+        )
+    
+    def _compile_program(
+        self,
+        program: Program,
+        total: Optional[int],
+        script_pause: float,
+        templates: Optional[List[Dict[str, Any]]] = None,
+        following_step: Optional[Step] = None
+    ) -> List[CompiledStep]:
+        """
+        Compile a program's instructions into steps bound to this executor.
+        
+        Args:
+            program: Instructions to compile
+            total: Number of steps in the script for log lines, or None if unknown
+            script_pause: Pause from the script-level pacing policy
+            templates: Compiled ${column} fields indexed by step number - 1
+            following_step: Typed step that runs after the last instruction,
+                when compiling one chunk of a longer script
+            
+        Returns:
+            Compiled steps in instruction order
+            
+        Raises:
+            KeyError: If a step is missing a required field
+            ValueError: If a step uses an unknown action
+        """
+        instructions = program.instructions
+        compiled = []
+        
+        # Typed steps of the STEP instructions, None for control instructions
+        typed = [self._typed_step(ins.step, ins.number) if ins.op == STEP else None for ins in instructions]
+        if following_step is not None:
+            typed.append(following_step)
+        
+        for index, instruction in enumerate(instructions):
+            i = instruction.number
+            step = instruction.step
+            action = step.get('action')
+            
+            if instruction.op != STEP:
+                try:
+                    handler, args = self._compile_control(instruction)
+                except KeyError as e:
+                    raise KeyError(f"Step {i}: Missing required field: {e}") from None
+                compiled.append(CompiledStep(i, action, handler, args, (), 0.0, step, instruction.target))
+                continue
+            
+            compiler = self._COMPILERS.get(action)
+            if compiler is None:
+                raise ValueError(f"Step {i}: Unknown action: {action}")
+            
+            model = typed[index]
+            self._fields = templates[i - 1] if templates else {}
+            try:
+                handler, args, detail = getattr(self, compiler)(model)
+            finally:
+                self._fields = {}
+            
+            messages = [f"Step {i}/{total}: {action}" if total is not None else f"Step {i}: {action}"]
+            if model.description:
+                messages.append(f"  → {model.description}")
+            messages.append(detail)
+            
+            next_step = typed[index + 1] if index + 1 < len(typed) else None
+            pause = self._step_pause(model, next_step, script_pause)
+            
+            compiled.append(CompiledStep(i, action, handler, args, tuple(messages), pause, step))
+        
+        return compiled
+    
+    @staticmethod
+    def _typed_step(step: Dict[str, Any], number: int) -> Step:
+        """
+        Convert a step dictionary to its typed step.
+        
+        Args:
+            step: Step dictionary
+            number: Step number for error messages
+            
+        Returns:
+            Typed step
+            
+        Raises:
+            KeyError: If the step is missing a required field
+            ValueError: If the step uses an unknown action
+        """
+        try:
+            return step_from_dict(step)
+        except KeyError as e:
+            raise KeyError(f"Step {number}: Missing required field: {e}") from None
+        except ValueError as e:
+            raise ValueError(f"Step {number}: {e}") from None
+    
+    def _script_pause(self, script_data: Dict[str, Any]) -> float:
+        """Pause from the pacing override, or from the script's own pacing."""
+        if self.pacing is not None:
+            return resolve_pacing(self.pacing)
+        return resolve_pacing(script_data.get('pacing', DEFAULT_PACING))
+    
+    def _timing_mode(self, script_data: Dict[str, Any]) -> str:
+        """
+        Timing mode from the override, or from the script.
+        
+        Raises:
+            ValueError: If the mode is unknown
+        """
+        timing = self.timing or script_data.get('timing', DEFAULT_TIMING)
+        if timing not in TIMING_MODES:
+            raise ValueError(f"Unknown timing mode: {timing}")
+        return timing
+    
+    def _resolve_dataset(self, config: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Resolve a script's 'dataset' section to files and options.
+        
+        Args:
+            config: The section, or None
+            
+        Returns:
+            Dictionary with file, format, on_error, results and failed, or None
+            
+        Raises:
+            KeyError: If the section has no 'file'
+            ValueError: If the format or on_error mode is unknown
+        """
+        if config is None:
+            return None
+        
+        base_dir = Path(self.base_dir) if self.base_dir else Path.cwd()
+        path = Path(config['file'])
+        if not path.is_absolute():
+            path = base_dir / path
+        
+        fmt = dataset_format(config)
+        if fmt is None:
+            raise ValueError(f"Unknown dataset format: {config.get('format') or path.suffix}")
+        
+        on_error = config.get('on_error', 'continue')
+        if on_error not in ON_ERROR_MODES:
+            raise ValueError(f"Unknown dataset on_error mode: {on_error}")
+        
+        results, failed = results_paths(path, config.get('results'), base_dir)
+        return {'file': path, 'format': fmt, 'on_error': on_error, 'results': results, 'failed': failed}
+    
+    def execute_script(self, script_data: Union[Dict[str, Any], ExecutionPlan, ScriptStream]) -> bool:
         """
         Execute an automation script.
         
         Args:
-            script_data: Parsed script data dictionary
+            script_data: Parsed script data dictionary, a compiled plan, or a
+                stream that is read, compiled and run a chunk at a time
             
         Returns:
             True if execution successful, False otherwise
         """
         try:
             self.is_running = True
+            self.is_paused = False
             self.current_step = 0
+            self.steps_completed = 0
+            self.last_error = None
+            self.tracer = None
+            self._stop_event.clear()
+            self._interrupt_event.clear()
+            self._resume_event.set()
+            
+            stream = None
+            if isinstance(script_data, ExecutionPlan):
+                plan = script_data
+            elif isinstance(script_data, ScriptStream):
+                # Steps are compiled chunk by chunk; the length is known only
+                # if the stream was validated first
+                stream = script_data
+                plan = ExecutionPlan(
+                    stream.name, [], self, self._timing_mode(stream.header), total=stream.total_steps or 0
+                )
+            else:
+                plan = self.compile(script_data)
+            
+            self.total_steps = len(plan)
+            self.progress.start(self.total_steps)
+            self.metrics.clear()
+            self.tracer = Tracer() if self.trace_file else None
+            self._trace_step = None
             
-            steps = script_data.get('steps', [])
-            self.total_steps = len(steps)
-            
-            self._log(f"Starting script: {script_data.get('name', 'Untitled')}")
-            self._log(f"Total steps: {self.total_steps}")
-            
-            for i, step in enumerate(steps, 1):
-                if not self.is_running:
-                    self._log("Script execution stopped by user")
-                    break
-                
-                # Handle pause
-                while self.is_paused and self.is_running:
-                    time.sleep(0.1)
-                
-                if not self.is_running:
-                    break
-                
-                self.current_step = i
-                
-                if self.on_step_start:
-                    self.on_step_start(i, step)
-                
-                self._log(f"Step {i}/{self.total_steps}: {step.get('action', 'unknown')}")
-                
-                # Execute the step
-                success = self._execute_step(step, i)
-                
-                if not success:
-                    self._log(f"Step {i} failed, stopping execution")
+            self._log(f"Starting script: {plan.name}")
+            if stream is not None:
+                self._log(f"Streaming steps from {stream.path.name}")
+            if stream is None or self.total_steps:
+                self._log(f"Total steps: {self.total_steps}")
+            
+            self.timing_report = None
+            if plan.timing == 'scheduled':
+                self._scheduler = DeadlineScheduler()
+            else:
+                self._scheduler = None
+            
+            if stream is not None:
+                if not self._run_stream(stream, plan):
                     return False
-                
-                if self.on_step_complete:
-                    self.on_step_complete(i, step)
+            elif plan.dataset is None:
+                if not self._run_steps(plan):
+                    return False
+            elif not self._run_dataset(plan):
+                return False
+            
+            if self._scheduler is not None:
+                self._report_timing()
+            self._report_metrics()
             
             if self.is_running:
                 self._log("Script execution completed successfully")
@@ -92,160 +418,969 @@ class ScriptExecutor:
             
             return True
             
-        except pyautogui.FailSafeException:
+        except ExecutionStopped:
+            self._log("Script execution stopped by user")
+            return True
+            
+        except self.backend.FailSafeException:
             self._log("FAIL-SAFE triggered! Mouse moved to corner.")
+            self.last_error = "Fail-safe triggered"
             if self.on_error:
                 self.on_error("Fail-safe triggered")
             return False
             
         except Exception as e:
             self._log(f"Error during execution: {str(e)}")
+            self.last_error = str(e)
             if self.on_error:
                 self.on_error(str(e))
             return False
             
         finally:
+            self._scheduler = None
+            self._close_screenshot_writer()
+            self.progress.finish()
+            if self.tracer is not None:
+                self._finish_trace()
             self.is_running = False
             self.is_paused = False
     
-    def _execute_step(self, step: Dict[str, Any], step_number: int) -> bool:
+    def _run_steps(self, plan: ExecutionPlan) -> bool:
         """
-        Execute a single step.
+        Run every step of a plan once.
         
         Args:
-            step: Step dictionary
-            step_number: Current step number
+            plan: Compiled plan
             
         Returns:
-            True if successful, False otherwise
+            True if all steps ran or a stop was requested between steps,
+            False if a step failed
         """
-        try:
-            action = step.get('action')
-            description = step.get('description', '')
-            
-            if description:
-                self._log(f"  → {description}")
-            
-            # Mouse actions
-            if action == 'click':
-                x, y = step['x'], step['y']
-                self._log(f"  Clicking at ({x}, {y})")
-                pyautogui.click(x, y)
-            
-            elif action == 'double_click':
-                x, y = step['x'], step['y']
-                self._log(f"  Double-clicking at ({x}, {y})")
-                pyautogui.doubleClick(x, y)
-            
-            elif action == 'right_click':
-                x, y = step['x'], step['y']
-                self._log(f"  Right-clicking at ({x}, {y})")
-                pyautogui.rightClick(x, y)
-            
-            elif action == 'move_to':
-                x, y = step['x'], step['y']
-                duration = step.get('duration', 0)
-                self._log(f"  Moving to ({x}, {y})")
-                pyautogui.moveTo(x, y, duration=duration)
-            
-            elif action == 'drag_to':
-                x, y = step['x'], step['y']
-                duration = step.get('duration', 0.5)
-                self._log(f"  Dragging to ({x}, {y})")
-                pyautogui.dragTo(x, y, duration=duration)
-            
-            # Keyboard actions
-            elif action == 'type':
-                text = step['text']
-                interval = step.get('interval', 0)
-                self._log(f"  Typing: {text[:50]}{'...' if len(text) > 50 else ''}")
-                pyautogui.write(text, interval=interval)
-            
-            elif action == 'hotkey':
-                keys = step['keys']
-                self._log(f"  Pressing hotkey: {'+'.join(keys)}")
-                pyautogui.hotkey(*keys)
-            
-            elif action == 'press':
-                key = step['key']
-                presses = step.get('presses', 1)
-                self._log(f"  Pressing key: {key} ({presses}x)")
-                pyautogui.press(key, presses=presses)
-            
-            # Timing
-            elif action in ['delay', 'wait']:
-                ms = step['milliseconds']
-                self._log(f"  Waiting {ms}ms")
-                time.sleep(ms / 1000.0)
-            
-            # Scroll
-            elif action == 'scroll':
-                amount = step['amount']
-                x = step.get('x')
-                y = step.get('y')
-                self._log(f"  Scrolling {amount}")
-                if x is not None and y is not None:
-                    pyautogui.scroll(amount, x=x, y=y)
-                else:
-                    pyautogui.scroll(amount)
-            
-            # Clipboard
-            elif action == 'set_clipboard':
-                text = step['text']
-                self._log(f"  Setting clipboard: {text[:50]}{'...' if len(text) > 50 else ''}")
-                pyperclip.copy(text)
-            
-            elif action == 'paste':
-                self._log("  Pasting from clipboard")
-                pyautogui.hotkey('ctrl', 'v')
-            
-            # Screenshot
-            elif action == 'screenshot':
-                filename = step.get('filename', f'screenshot_{datetime.now().strftime("%Y%m%d_%H%M%S")}.png')
-                self._log(f"  Taking screenshot: {filename}")
-                screenshot = pyautogui.screenshot()
-                screenshot.save(filename)
-            
-            # User interaction
-            elif action == 'message':
-                message = step['text']
-                self._log(f"  Showing message: {message}")
-                # This would need GUI integration
-                print(f"MESSAGE: {message}")
-            
-            elif action == 'input':
-                prompt = step['prompt']
-                self._log(f"  Requesting input: {prompt}")
-                # This would need GUI integration
-                print(f"INPUT NEEDED: {prompt}")
+        log = self._log
+        progress = self.progress
+        publish = progress.publish
+        record = self.metrics.record
+        clock = time.perf_counter
+        tracer = self.tracer
+        stop_event = self._stop_event
+        resume_event = self._resume_event
+        
+        steps = plan.steps
+        end = len(steps)
+        pc = 0
+        self._counters = [0] * plan.counters
+        
+        while pc < end:
+            compiled = steps[pc]
+            pc += 1
             
-            else:
-                self._log(f"  Unknown action: {action}")
+            # Handle pause; stop() also sets the resume event
+            if not resume_event.is_set():
+                paused_at = clock()
+                resume_event.wait()
+                # Later deadlines move with the pause instead of counting it as drift
+                if self._scheduler is not None:
+                    self._scheduler.shift(clock() - paused_at)
+            
+            if stop_event.is_set():
+                log("Script execution stopped by user")
+                break
+            
+            i = compiled.number
+            
+            if compiled.target is not None:
+                # Control instruction: fall through while its handler returns True
+                try:
+                    if not compiled.handler(*compiled.args):
+                        pc = compiled.target
+                except (ExecutionStopped, self.backend.FailSafeException):
+                    raise
+                except Exception as e:
+                    log(f"  ERROR: {str(e)}")
+                    self.last_error = f"Step {i} ({compiled.action}): {e}"
+                    log(f"Step {i} failed, stopping execution")
+                    return False
+                continue
+            
+            self.current_step = i
+            publish(i, i - 1)
+            
+            if self.on_step_start:
+                self.on_step_start(i, compiled.source)
+            if tracer is not None:
+                self._trace_step = (tracer.now(), i, compiled.action)
+            
+            for message in compiled.messages:
+                log(message)
+            
+            # Execute the step, timing the action and the pause separately
+            paused = progress.paused_total
+            started = clock()
+            success = self._run_step(compiled)
+            acted = clock()
+            action_time = acted - started - (progress.paused_total - paused)
+            
+            if not success:
+                record(i, compiled.action, action_time, 0.0)
+                if tracer is not None:
+                    self._end_trace_step({'failed': True})
+                log(f"Step {i} failed, stopping execution")
                 return False
             
-            return True
+            paused = progress.paused_total
+            if compiled.pause:
+                self._sleep(compiled.pause)
+            record(i, compiled.action, action_time, clock() - acted - (progress.paused_total - paused))
             
-        except KeyError as e:
-            self._log(f"  ERROR: Missing required field: {e}")
+            publish(i, i)
+            self.steps_completed += 1
+            
+            if self.on_step_complete:
+                self.on_step_complete(i, compiled.source)
+            if tracer is not None:
+                self._end_trace_step()
+        
+        return True
+    
+    def _run_stream(self, stream: ScriptStream, plan: ExecutionPlan) -> bool:
+        """
+        Run a streamed script, compiling stream_chunk_size steps at a time.
+        
+        One step is read ahead of each chunk so the pause after its last step
+        is the same as in a fully loaded script. Step timings are only kept
+        when they are exported, so memory does not grow with the script.
+        
+        Args:
+            stream: Script stream
+            plan: Header-only plan giving the name and timing mode
+            
+        Returns:
+            True if all steps ran or a stop was requested between steps,
+            False if a step failed
+            
+        Raises:
+            ValueError: If a step read from the stream is invalid
+        """
+        script_pause = self._script_pause(stream.header)
+        keep_metrics = bool(self.metrics_file)
+        chunk: List[Dict[str, Any]] = []
+        first = 1
+        
+        def run(following: Optional[Step]) -> bool:
+            program = compile_program(chunk, first - 1)
+            compiled = self._compile_program(program, None, script_pause, None, following)
+            success = self._run_steps(
+                ExecutionPlan(plan.name, compiled, self, plan.timing, None, 0, program.counters)
+            )
+            if not keep_metrics:
+                self.metrics.clear()
+            return success
+        
+        for number, step in stream:
+            if len(chunk) >= self.stream_chunk_size:
+                if not run(self._typed_step(step, number)):
+                    return False
+                if self._stop_event.is_set():
+                    return True
+                chunk = []
+                first = number
+            chunk.append(step)
+        
+        if chunk:
+            return run(None)
+        return True
+    
+    def _run_dataset(self, plan: ExecutionPlan) -> bool:
+        """
+        Run a plan once per dataset row, streaming rows from the file.
+        
+        Every row's outcome is written to the results file as it finishes,
+        and failed rows are copied to a separate file for re-running.
+        
+        Args:
+            plan: Compiled plan with a dataset
+            
+        Returns:
+            True if every row succeeded or a stop was requested between steps,
+            False if a row failed
+        """
+        dataset = plan.dataset
+        on_error = dataset['on_error']
+        log = self._log
+        clock = time.perf_counter
+        tracer = self.tracer
+        
+        self.dataset_report = None
+        self.current_row = 0
+        log(f"Dataset: {dataset['file'].name} ({dataset['format']})")
+        
+        with ResultsWriter(dataset['results'], dataset['failed'], dataset['format']) as results:
+            try:
+                for row_number, row in enumerate(iter_rows(dataset['file'], dataset['format']), 1):
+                    if self._stop_event.is_set():
+                        break
+                    
+                    self._row = row
+                    self.current_row = row_number
+                    self.progress.start(len(plan), row_number)
+                    self.last_error = None
+                    log(f"Row {row_number}")
+                    
+                    started = clock()
+                    trace_start = tracer.now() if tracer is not None else 0.0
+                    completed = self.steps_completed
+                    try:
+                        success = self._run_steps(plan)
+                    except (ExecutionStopped, self.backend.FailSafeException):
+                        results.write(row_number, 'stopped', clock() - started,
+                                      self.steps_completed - completed, None, row)
+                        raise
+                    
+                    if success and self._stop_event.is_set():
+                        status = 'stopped'
+                    else:
+                        status = 'ok' if success else 'failed'
+                    steps = self.steps_completed - completed
+                    results.write(row_number, status, clock() - started, steps, self.last_error, row)
+                    if tracer is not None:
+                        tracer.complete(f"Row {row_number}", 'row', trace_start, {'status': status})
+                    
+                    if status == 'failed' and on_error == 'stop':
+                        log(f"Row {row_number} failed, stopping dataset")
+                        break
+            finally:
+                self._row = {}
+                self.dataset_report = {
+                    **results.counts,
+                    'results': str(dataset['results']),
+                    'failed_rows': str(dataset['failed']) if results.counts['failed'] else None,
+                }
+        
+        counts = results.counts
+        log(f"Dataset finished: {counts['ok']} ok, {counts['failed']} failed, {counts['stopped']} stopped")
+        log(f"Results: {dataset['results']}")
+        if counts['failed']:
+            log(f"Failed rows: {dataset['failed']}")
+            self.last_error = f"{counts['failed']} dataset row(s) failed"
             return False
+        return True
+    
+    def _step_pause(
+        self,
+        step: Step,
+        next_step: Optional[Step],
+        script_pause: float
+    ) -> float:
+        """
+        Work out the settle time that follows a step.
+        
+        Args:
+            step: Typed step
+            next_step: Following step, if it is not a control instruction
+            script_pause: Pause from the script-level pacing policy
+            
+        Returns:
+            Pause in seconds
+        """
+        if step.action not in PACED_ACTIONS:
+            return 0.0
+        
+        if self.pacing is None and step.pacing is not None:
+            pause = resolve_pacing(step.pacing)
+        else:
+            pause = script_pause
+        
+        # An explicit delay right after the step already covers the settle time
+        if isinstance(next_step, Delay):
+            pause -= next_step.milliseconds / 1000.0
+        
+        return max(pause, 0.0)
+    
+    def _compile_control(self, instruction: Instruction) -> Tuple[Callable, tuple]:
+        """
+        Resolve a control instruction to a handler and its arguments.
+        
+        The handler returns True to fall through to the next instruction and
+        False to jump to the instruction's target.
+        
+        Args:
+            instruction: BRANCH, JUMP, LOOP or NEXT instruction
+            
+        Returns:
+            Tuple of (handler, args)
+        """
+        if instruction.op == JUMP:
+            return self._jump, ()
+        if instruction.op == LOOP:
+            return self._loop_start, (instruction.slot, instruction.step['times'])
+        if instruction.op == NEXT:
+            return self._loop_next, (instruction.slot,)
+        return self._compile_condition(instruction.step['condition'])
+    
+    def _compile_condition(self, condition: Dict[str, Any]) -> Tuple[Callable, tuple]:
+        """
+        Resolve a while/if condition to a predicate and its arguments.
+        
+        Args:
+            condition: Condition dictionary
+            
+        Returns:
+            Tuple of (predicate, args)
+            
+        Raises:
+            ValueError: If the condition type or color is invalid
+        """
+        kind = condition['type']
+        
+        if kind == 'pixel':
+            color = parse_color(condition['color'])
+            if color is None:
+                raise ValueError(f"Invalid color: {condition['color']}")
+            handler = self._pixel_matches
+            args = (condition['x'], condition['y'], color, condition.get('tolerance', 0))
+        elif kind == 'image':
+            region = condition.get('region')
+            handler = self._image_present
+            args = (
+                self._load_template(condition['image']),
+                condition.get('confidence', 0.9),
+                tuple(region) if region else None,
+                condition.get('timeout_ms', 0) / 1000.0,
+                condition.get('poll_ms', 100) / 1000.0,
+            )
+        elif kind == 'clipboard':
+            handler = self._clipboard_matches
+            args = (condition.get('equals'), condition.get('contains'))
+        elif kind == 'variable':
+            handler = self._variable_matches
+            args = (condition['name'], condition.get('equals'), condition.get('contains'))
+        else:
+            raise ValueError(f"Unknown condition type: {kind}")
+        
+        if condition.get('negate'):
+            return self._negate, (handler, args)
+        return handler, args
+    
+    @staticmethod
+    def _jump() -> bool:
+        """Unconditional jump (goto, end of a while body, skipping an else)."""
+        return False
+    
+    def _loop_start(self, slot: int, times: int) -> bool:
+        """Start a repeat block; skip it entirely for 0 times."""
+        self._counters[slot] = times
+        return times > 0
+    
+    def _loop_next(self, slot: int) -> bool:
+        """Count down a repeat block; jump back while iterations remain."""
+        self._counters[slot] -= 1
+        return self._counters[slot] <= 0
+    
+    @staticmethod
+    def _negate(handler: Callable, args: tuple) -> bool:
+        """Invert a predicate (conditions with 'negate: true')."""
+        return not handler(*args)
+    
+    def _pixel_matches(self, x: int, y: int, color: Tuple[int, int, int], tolerance: int) -> bool:
+        """Whether the screen pixel at (x, y) is within tolerance of a color."""
+        import numpy as np
+        
+        pixel = np.asarray(self._capture((x, y, 1, 1)))[0, 0, :3]
+        return all(abs(int(value) - expected) <= tolerance for value, expected in zip(pixel, color))
+    
+    def _image_present(
+        self,
+        template: Any,
+        confidence: float,
+        region: Optional[Tuple[int, int, int, int]],
+        timeout: float,
+        poll: float
+    ) -> bool:
+        """Whether a template is on screen, searching for up to timeout seconds."""
+        try:
+            self._locate(template, confidence, region, timeout, poll)
+        except TimeoutError:
+            return False
+        return True
+    
+    def _clipboard_matches(self, equals: Optional[Any], contains: Optional[Any]) -> bool:
+        """Test the clipboard text."""
+        return _text_matches(self.backend.get_clipboard(), equals, contains)
+    
+    def _variable_matches(self, name: str, equals: Optional[Any], contains: Optional[Any]) -> bool:
+        """Test a variable (a column of the current dataset row)."""
+        value = self._row.get(name)
+        return _text_matches('' if value is None else str(value), equals, contains)
+    
+    def _run_step(self, compiled: CompiledStep) -> bool:
+        """
+        Run a single compiled step.
+        
+        Args:
+            compiled: Compiled step
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            tracer = self.tracer
+            if tracer is not None and compiled.action in INPUT_ACTIONS:
+                with tracer.span(compiled.action, 'input'):
+                    compiled.handler(*compiled.args)
+            else:
+                compiled.handler(*compiled.args)
+            return True
+        except (ExecutionStopped, self.backend.FailSafeException):
+            raise
         except Exception as e:
             self._log(f"  ERROR: {str(e)}")
+            self.last_error = f"Step {compiled.number} ({compiled.action}): {e}"
             return False
     
+    # Step compilers. Each takes a typed step and returns (handler, args, log line).
+    
+    def _compile_click(self, step: Click) -> Tuple[Callable, tuple, str]:
+        x, y = step.x, step.y
+        return self.backend.click, (x, y), f"  Clicking at ({x}, {y})"
+    
+    def _compile_double_click(self, step: Click) -> Tuple[Callable, tuple, str]:
+        x, y = step.x, step.y
+        return self.backend.double_click, (x, y), f"  Double-clicking at ({x}, {y})"
+    
+    def _compile_right_click(self, step: Click) -> Tuple[Callable, tuple, str]:
+        x, y = step.x, step.y
+        return self.backend.right_click, (x, y), f"  Right-clicking at ({x}, {y})"
+    
+    def _compile_move_to(self, step: MoveTo) -> Tuple[Callable, tuple, str]:
+        x, y = step.x, step.y
+        return self._move_to, (x, y, step.duration), f"  Moving to ({x}, {y})"
+    
+    def _compile_drag_to(self, step: MoveTo) -> Tuple[Callable, tuple, str]:
+        x, y = step.x, step.y
+        return self._drag_to, (x, y, step.duration), f"  Dragging to ({x}, {y})"
+    
+    def _compile_type(self, step: TypeText) -> Tuple[Callable, tuple, str]:
+        text = step.text
+        if 'text' in self._fields:
+            return self._write_row, (self._fields['text'], step.interval), f"  Typing: {_preview(text)}"
+        return self._write, (text, step.interval), f"  Typing: {_preview(text)}"
+    
+    def _compile_hotkey(self, step: Hotkey) -> Tuple[Callable, tuple, str]:
+        keys = step.keys
+        if 'keys' in self._fields:
+            return self._hotkey_row, (self._fields['keys'],), f"  Pressing hotkey: {'+'.join(keys)}"
+        return self.backend.hotkey, tuple(keys), f"  Pressing hotkey: {'+'.join(keys)}"
+    
+    def _compile_press(self, step: Press) -> Tuple[Callable, tuple, str]:
+        key, presses = step.key, step.presses
+        return self.backend.press, (key, presses), f"  Pressing key: {key} ({presses}x)"
+    
+    def _compile_delay(self, step: Delay) -> Tuple[Callable, tuple, str]:
+        ms = step.milliseconds
+        return self._sleep, (ms / 1000.0,), f"  Waiting {ms}ms"
+    
+    def _compile_scroll(self, step: Scroll) -> Tuple[Callable, tuple, str]:
+        amount = step.amount
+        return self.backend.scroll, (amount, step.x, step.y), f"  Scrolling {amount}"
+    
+    def _compile_set_clipboard(self, step: SetClipboard) -> Tuple[Callable, tuple, str]:
+        text = step.text
+        if 'text' in self._fields:
+            return self._set_clipboard_row, (self._fields['text'],), f"  Setting clipboard: {_preview(text)}"
+        return self.backend.set_clipboard, (text,), f"  Setting clipboard: {_preview(text)}"
+    
+    def _compile_paste(self, step: Step) -> Tuple[Callable, tuple, str]:
+        return self.backend.hotkey, ('ctrl', 'v'), "  Pasting from clipboard"
+    
+    def _compile_screenshot(self, step: Screenshot) -> Tuple[Callable, tuple, str]:
+        filename = step.filename
+        region = tuple(step.region) if step.region else None
+        
+        options = {
+            key: getattr(step, key) for key in ('format', 'compress_level', 'quality')
+            if getattr(step, key) is not None
+        }
+        
+        label = filename if filename else f"screenshot_<timestamp>.{step.format or 'png'}"
+        filename = self._fields.get('filename', filename)
+        return self._take_screenshot, (filename, region, options), f"  Taking screenshot: {label}"
+    
+    def _compile_message(self, step: Message) -> Tuple[Callable, tuple, str]:
+        message = step.text
+        # This would need GUI integration
+        return print, (f"MESSAGE: {message}",), f"  Showing message: {message}"
+    
+    def _compile_input(self, step: Input) -> Tuple[Callable, tuple, str]:
+        prompt = step.prompt
+        # This would need GUI integration
+        return print, (f"INPUT NEEDED: {prompt}",), f"  Requesting input: {prompt}"
+    
+    def _sleep(self, seconds: float) -> None:
+        """
+        Sleep without blocking stop or pause.
+        
+        Time spent paused does not count towards the duration. In 'scheduled'
+        timing the sleep ends at the next absolute deadline rather than a
+        fixed time from now, so step overhead is absorbed instead of adding up.
+        
+        Args:
+            seconds: Duration to sleep, before the speed multiplier
+            
+        Raises:
+            ExecutionStopped: If stop() is called while sleeping
+        """
+        if self.speed != 1.0:
+            seconds /= self.speed
+        
+        scheduler = self._scheduler
+        if scheduler is None:
+            self._sleep_until(time.perf_counter() + seconds, 0.0)
+            return
+        
+        end = scheduler.advance(seconds)
+        self._sleep_until(end, SPIN_THRESHOLD)
+        scheduler.record(time.perf_counter() - scheduler.deadline)
+    
+    def _sleep_until(self, end: float, spin: float) -> float:
+        """
+        Sleep until a perf_counter deadline, honouring pause and stop.
+        
+        Args:
+            end: Deadline on time.perf_counter()
+            spin: Seconds before the deadline to busy-wait
+            
+        Returns:
+            Seconds spent paused; the deadline is pushed back by this much
+            
+        Raises:
+            ExecutionStopped: If stop() is called while sleeping
+        """
+        tracer = self.tracer
+        if tracer is None:
+            return self._wait_for_deadline(end, spin)
+        
+        with tracer.span('sleep', 'sleep'):
+            return self._wait_for_deadline(end, spin)
+    
+    def _wait_for_deadline(self, end: float, spin: float) -> float:
+        """Untraced body of _sleep_until."""
+        paused_total = 0.0
+        
+        while not sleep_until(end, self._interrupt_event.wait, spin=spin):
+            if self._stop_event.is_set():
+                raise ExecutionStopped()
+            
+            paused_at = time.perf_counter()
+            self._resume_event.wait()
+            if self._stop_event.is_set():
+                raise ExecutionStopped()
+            
+            paused = time.perf_counter() - paused_at
+            paused_total += paused
+            end += paused
+            if self._scheduler is not None:
+                self._scheduler.shift(paused)
+        
+        if self._stop_event.is_set():
+            raise ExecutionStopped()
+        
+        return paused_total
+    
+    def _report_timing(self) -> None:
+        """Store and log the drift figures of a scheduled run."""
+        report = self._scheduler.report()
+        self.timing_report = report
+        self._log(
+            f"Timing: planned {report['planned_ms']:.1f}ms, "
+            f"drift {report['drift_ms']:+.3f}ms, "
+            f"max lateness {report['max_lateness_ms']:.3f}ms"
+        )
+    
+    def _report_metrics(self) -> None:
+        """Log the slowest actions and export the metrics if requested."""
+        for action, stats in self.metrics.slowest_actions():
+            self._log(
+                f"Timing: {action} x{stats['count']} took {stats['total_ms']:.1f}ms "
+                f"(p50 {stats['p50_ms']:.1f}ms, p95 {stats['p95_ms']:.1f}ms, max {stats['max_ms']:.1f}ms)"
+            )
+        
+        if self.metrics_file:
+            try:
+                self.metrics.export(self.metrics_file)
+                self._log(f"Step timings written to {self.metrics_file}")
+            except OSError as e:
+                self._log(f"Could not write step timings: {e}")
+    
+    def _end_trace_step(self, args: Optional[Dict[str, Any]] = None) -> None:
+        """Close the span of the step being traced."""
+        start, number, action = self._trace_step
+        self._trace_step = None
+        self.tracer.complete(f"Step {number}: {action}", 'step', start, {'step': number, **(args or {})})
+    
+    def _finish_trace(self) -> None:
+        """Close any open step span and write the trace file."""
+        if self._trace_step is not None:
+            self._end_trace_step({'interrupted': True})
+        
+        try:
+            self.tracer.write(self.trace_file)
+            self._log(f"Trace written to {self.trace_file}")
+        except OSError as e:
+            self._log(f"Could not write trace: {e}")
+    
+    def _glide(self, x: int, y: int, duration: float) -> None:
+        """
+        Move the cursor in a straight line over a duration, in small
+        interruptible segments.
+        
+        Args:
+            x: Target X coordinate
+            y: Target Y coordinate
+            duration: Seconds the movement should take
+        """
+        backend = self.backend
+        segments = int(duration / self.MOTION_INTERVAL)
+        
+        if segments > 1:
+            start_x, start_y = backend.position()
+            interval = duration / segments
+            for n in range(1, segments):
+                t = n / segments
+                backend.move_to(round(start_x + (x - start_x) * t), round(start_y + (y - start_y) * t))
+                self._sleep(interval)
+        elif duration > 0:
+            self._sleep(duration)
+        
+        backend.move_to(x, y)
+    
+    def _move_to(self, x: int, y: int, duration: float) -> None:
+        """Move the cursor, optionally over a duration."""
+        self._glide(x, y, duration)
+    
+    def _drag_to(self, x: int, y: int, duration: float) -> None:
+        """Drag from the current position, releasing the button even if stopped."""
+        self.backend.mouse_down()
+        try:
+            self._glide(x, y, duration)
+        finally:
+            self.backend.mouse_up()
+    
+    def _write(self, text: str, interval: float) -> None:
+        """Type text, sleeping interruptibly between characters when interval is set."""
+        if interval <= 0:
+            self.backend.write(text)
+            return
+        
+        write = self.backend.write
+        for char in text:
+            write(char)
+            self._sleep(interval)
+    
+    def _write_row(self, template: Template, interval: float) -> None:
+        """Type a template rendered with the current row."""
+        self._write(template.render(self._row), interval)
+    
+    def _set_clipboard_row(self, template: Template) -> None:
+        """Set the clipboard to a template rendered with the current row."""
+        self.backend.set_clipboard(template.render(self._row))
+    
+    def _hotkey_row(self, keys: Tuple[Any, ...]) -> None:
+        """Press a hotkey whose keys are rendered with the current row."""
+        self.backend.hotkey(*render_value(keys, self._row))
+    
+    def _compile_wait_until_stable(self, step: WaitUntilStable) -> Tuple[Callable, tuple, str]:
+        region = tuple(step.region) if step.region else None
+        timeout_ms = step.timeout_ms
+        where = f" in region {list(region)}" if region else ""
+        args = (region, step.stable_ms / 1000.0, timeout_ms / 1000.0, step.poll_ms / 1000.0)
+        return self._wait_until_stable, args, f"  Waiting for screen to settle{where} (up to {timeout_ms}ms)"
+    
+    def _frame_digest(self, region: Optional[Tuple[int, int, int, int]]) -> bytes:
+        """
+        Capture the screen and reduce it to a short digest.
+        
+        Args:
+            region: Optional (left, top, width, height) to capture
+            
+        Returns:
+            Digest of the captured pixels
+        """
+        frame = self._capture(region)
+        return hashlib.blake2b(frame.tobytes(), digest_size=16).digest()
+    
+    def _wait_until_stable(
+        self,
+        region: Optional[Tuple[int, int, int, int]],
+        stable: float,
+        timeout: float,
+        poll: float
+    ) -> None:
+        """
+        Wait until the screen (or a region of it) stops changing.
+        
+        Args:
+            region: Optional (left, top, width, height) to watch
+            stable: Seconds the pixels must stay unchanged
+            timeout: Seconds to wait before giving up
+            poll: Seconds between captures
+            
+        Raises:
+            TimeoutError: If the region is still changing after the timeout
+        """
+        clock = time.perf_counter
+        start = clock()
+        deadline = start + timeout
+        
+        last = self._frame_digest(region)
+        stable_since = clock()
+        
+        while clock() - stable_since < stable:
+            now = clock()
+            if now >= deadline:
+                raise TimeoutError(f"Screen did not settle within {timeout * 1000:.0f}ms")
+            
+            # Paused time does not count towards the timeout
+            deadline += self._sleep_until(now + min(poll, deadline - now), 0.0)
+            
+            digest = self._frame_digest(region)
+            if digest != last:
+                last = digest
+                stable_since = clock()
+        
+        # The wait has no fixed length, so re-anchor the schedule here
+        if self._scheduler is not None:
+            self._scheduler.resync()
+        
+        self._log(f"  Screen stable after {(clock() - start) * 1000:.0f}ms")
+    
+    def _compile_click_image(self, step: ClickImage) -> Tuple[Callable, tuple, str]:
+        template = self._load_template(step.image)
+        args = self._image_search_args(step, template) + (tuple(step.offset),)
+        return self._click_image, args, f"  Clicking image: {step.image}"
+    
+    def _compile_wait_for_image(self, step: WaitForImage) -> Tuple[Callable, tuple, str]:
+        template = self._load_template(step.image)
+        args = self._image_search_args(step, template)
+        return self._wait_for_image, args, f"  Waiting for image: {step.image}"
+    
+    def _image_search_args(self, step: WaitForImage, template: Any) -> tuple:
+        """Common (template, confidence, region, timeout, poll) arguments of image steps."""
+        return (
+            template,
+            step.confidence,
+            tuple(step.region) if step.region else None,
+            step.timeout_ms / 1000.0,
+            step.poll_ms / 1000.0,
+        )
+    
+    def _load_template(self, image_path: str) -> Any:
+        """
+        Load a prepared template image through the template cache.
+        
+        Args:
+            image_path: Image file path, relative to base_dir if not absolute
+            
+        Returns:
+            Prepared Template
+        
+        Raises:
+            OSError: If the image is missing or cannot be decoded
+        """
+        from src.lib.template_cache import CACHE_DIR_NAME, TemplateCache
+        
+        if self.template_cache is None:
+            self.template_cache = TemplateCache()
+        
+        path = Path(image_path)
+        cache_dir = None
+        if self.base_dir:
+            cache_dir = Path(self.base_dir) / CACHE_DIR_NAME
+            if not path.is_absolute():
+                path = Path(self.base_dir) / path
+        
+        try:
+            return self.template_cache.load(path, image_path, cache_dir)
+        except OSError as e:
+            raise OSError(f"Cannot load image '{image_path}': {e}") from e
+    
+    def _locate(
+        self,
+        template: Any,
+        confidence: float,
+        region: Optional[Tuple[int, int, int, int]],
+        timeout: float,
+        poll: float
+    ) -> Any:
+        """
+        Poll the screen until a template is found.
+        
+        Args:
+            template: Prepared Template
+            confidence: Minimum match confidence
+            region: Optional (left, top, width, height) to search
+            timeout: Seconds to keep searching
+            poll: Seconds between captures
+            
+        Returns:
+            Match for the template
+            
+        Raises:
+            TimeoutError: If the template is not found in time
+        """
+        from src.lib.image_matcher import find_template
+        
+        clock = time.perf_counter
+        deadline = clock() + timeout
+        offset = region[:2] if region else (0, 0)
+        
+        tracer = self.tracer
+        
+        while True:
+            frame = self._capture(region)
+            if tracer is None:
+                match = find_template(frame, template, confidence, offset)
+            else:
+                with tracer.span(template.name, 'match'):
+                    match = find_template(frame, template, confidence, offset)
+            if match is not None:
+                break
+            
+            now = clock()
+            if now >= deadline:
+                raise TimeoutError(
+                    f"Image '{template.name}' not found within {timeout * 1000:.0f}ms"
+                )
+            
+            # Paused time does not count towards the timeout
+            deadline += self._sleep_until(now + min(poll, deadline - now), 0.0)
+        
+        if self._scheduler is not None:
+            self._scheduler.resync()
+        
+        self._log(f"  Found at {match.center} (confidence {match.confidence:.2f})")
+        return match
+    
+    def _click_image(
+        self,
+        template: Any,
+        confidence: float,
+        region: Optional[Tuple[int, int, int, int]],
+        timeout: float,
+        poll: float,
+        offset: Tuple[int, int]
+    ) -> None:
+        """Find a template on screen and click its center plus an offset."""
+        match = self._locate(template, confidence, region, timeout, poll)
+        x, y = match.center
+        
+        if self.tracer is None:
+            self.backend.click(x + offset[0], y + offset[1])
+        else:
+            with self.tracer.span('click', 'input'):
+                self.backend.click(x + offset[0], y + offset[1])
+    
+    def _wait_for_image(
+        self,
+        template: Any,
+        confidence: float,
+        region: Optional[Tuple[int, int, int, int]],
+        timeout: float,
+        poll: float
+    ) -> None:
+        """Wait until a template appears on screen."""
+        self._locate(template, confidence, region, timeout, poll)
+    
+    def _take_screenshot(
+        self,
+        filename: Union[str, Template, None],
+        region: Optional[Tuple[int, int, int, int]],
+        options: Dict[str, Any]
+    ) -> None:
+        """
+        Capture the screen and hand it to the background writer.
+        
+        Args:
+            filename: Output path, a template rendered with the current
+                dataset row, or None for a timestamped name
+            region: Optional (left, top, width, height) to capture
+            options: Encoder settings ('format', 'compress_level', 'quality')
+        """
+        if isinstance(filename, Template):
+            filename = filename.render(self._row)
+        elif not filename:
+            extension = options.get('format', 'png')
+            filename = f'screenshot_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{extension}'
+        
+        screenshot = self._capture(region)
+        
+        if self._screenshot_writer is None:
+            from src.lib.screenshot_writer import ScreenshotWriter
+            self._screenshot_writer = ScreenshotWriter(
+                self.screenshot_workers,
+                self.screenshot_queue_size,
+                on_error=self._log
+            )
+        
+        if not self._screenshot_writer.submit(screenshot, filename, options, self._stop_event):
+            raise ExecutionStopped()
+    
+    def _capture(self, region: Optional[Tuple[int, int, int, int]]) -> Any:
+        """
+        Grab the screen through the backend, traced as a capture span.
+        
+        Args:
+            region: Optional (left, top, width, height) to capture
+            
+        Returns:
+            Screenshot from the backend
+        """
+        tracer = self.tracer
+        if tracer is None:
+            return self.backend.screenshot(region)
+        
+        with tracer.span('screenshot', 'capture', {'region': list(region)} if region else None):
+            return self.backend.screenshot(region)
+    
+    def _close_screenshot_writer(self) -> None:
+        """Wait for queued screenshots to be written and stop the writer."""
+        if self._screenshot_writer is not None:
+            self._screenshot_writer.close()
+            self._screenshot_writer = None
+    
     def stop(self) -> None:
         """Stop script execution."""
         self.is_running = False
         self.is_paused = False
+        self._stop_event.set()
+        self._interrupt_event.set()
+        self._resume_event.set()
+        writer = self._screenshot_writer
+        if writer is not None:
+            writer.interrupt()
+        if self.tracer is not None:
+            self.tracer.instant('stop')
         self._log("Stop requested")
     
     def pause(self) -> None:
         """Pause script execution."""
         self.is_paused = True
+        self._resume_event.clear()
+        self._interrupt_event.set()
+        self.progress.pause()
+        if self.tracer is not None:
+            self.tracer.instant('pause')
         self._log("Paused")
     
     def resume(self) -> None:
         """Resume script execution."""
         self.is_paused = False
+        # Close the paused interval before the executor can wake and read it
+        self.progress.resume()
+        if not self._stop_event.is_set():
+            self._interrupt_event.clear()
+        self._resume_event.set()
+        if self.tracer is not None:
+            self.tracer.instant('resume')
         self._log("Resumed")
     
     def _log(self, message: str) -> None:
@@ -269,3 +1404,16 @@ class ScriptExecutor:
         """
         return (self.current_step, self.total_steps)
 
+
+def _preview(text: str) -> str:
+    """Shorten text for log output."""
+    return f"{text[:50]}{'...' if len(text) > 50 else ''}"
+
+
+def _text_matches(text: str, equals: Optional[Any], contains: Optional[Any]) -> bool:
+    """Compare text against a condition's 'equals' or 'contains'; with neither, test for non-empty."""
+    if equals is not None:
+        return text == str(equals)
+    if contains is not None:
+        return str(contains) in text
+    return bool(text)
@@ -4,55 +4,182 @@ Script Parser and Validator
 Parses automation scripts written in YAML format.
 """
 
-import yaml
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from pathlib import Path
 
+from src.lib.control_flow import CONDITION_TYPES, Program, compile_program, parse_color, walk
+from src.lib.dataset import DATASET_FORMATS, ON_ERROR_MODES, dataset_format, read_columns
+from src.lib.pacing import resolve_pacing
+from src.lib.script_cache import ScriptCache
+from src.lib.steps import CONFIDENCE, FIELD_RULES, MILLISECONDS, REGION, STEP_TYPES, Step, steps_from_dicts
+from src.lib.templates import compile_field, compile_templates, referenced_columns
+from src.lib.timing import TIMING_MODES
+from src.lib.validation_cache import ValidationCache
+
+
+# Bump whenever validation or the structure of parsed scripts changes, so
+# cached scripts validated by an older parser are not reused
+PARSER_VERSION = 3
+
+_shared_cache: Optional[ScriptCache] = None
+
+
+def _default_cache() -> ScriptCache:
+    """Cache shared by parsers created without one."""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = ScriptCache()
+    return _shared_cache
+
+
+def load_yaml(content: Any) -> Any:
+    """
+    Load YAML safely, using the libyaml-based CSafeLoader when PyYAML was
+    built with it.
+    
+    Args:
+        content: YAML text, bytes or an open file
+        
+    Returns:
+        Loaded data
+        
+    Raises:
+        yaml.YAMLError: If the content is not valid YAML
+    """
+    import yaml
+    
+    return yaml.load(content, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader))
+
+
+# Listed in the error for an unknown action
+_VALID_ACTIONS_TEXT = ', '.join(sorted(STEP_TYPES))
+
+
+def _variable_conditions(steps: List[Any], start: int = 1) -> List[Tuple[int, str]]:
+    """
+    Find the variable conditions of while and if steps.
+    
+    Args:
+        steps: Validated top-level steps
+        start: Number of the first step
+    
+    Returns:
+        (step number, column name) of each variable condition
+    """
+    return [
+        (i, step['condition'].get('name'))
+        for i, step in enumerate(walk(steps), start)
+        if isinstance(step, dict) and step.get('action') in ('while', 'if')
+        and isinstance(step.get('condition'), dict) and step['condition'].get('type') == 'variable'
+    ]
+
+
+def _image_paths(steps: List[Any], start: int = 1) -> List[Tuple[int, str]]:
+    """
+    Find the template images of click_image, wait_for_image and image
+    conditions.
+    
+    Args:
+        steps: Top-level steps
+        start: Number of the first step
+    
+    Returns:
+        (step number, image path as written) of each image
+    """
+    images = []
+    for i, step in enumerate(walk(steps), start):
+        if not isinstance(step, dict):
+            continue
+        if step.get('action') in ('click_image', 'wait_for_image'):
+            image = step.get('image')
+        elif step.get('action') in ('while', 'if') and isinstance(step.get('condition'), dict):
+            image = step['condition'].get('image') if step['condition'].get('type') == 'image' else None
+        else:
+            continue
+        if isinstance(image, str) and image:
+            images.append((i, image))
+    return images
+
 
 class ScriptParser:
     """Handles parsing and validation of automation scripts."""
     
-    VALID_ACTIONS = {
-        'click', 'double_click', 'right_click',
-        'type', 'hotkey', 'press',
-        'delay', 'wait',
-        'move_to', 'drag_to',
-        'scroll',
-        'set_clipboard', 'paste',
-        'screenshot',
-        'message', 'input'
-    }
-    
-    def __init__(self):
-        """Initialize the script parser."""
+    VALID_ACTIONS = set(STEP_TYPES)
+    
+    def __init__(self, cache: Optional[ScriptCache] = None, use_cache: bool = True):
+        """
+        Initialize the script parser.
+        
+        Args:
+            cache: Cache of validated scripts used by parse_file; defaults to
+                one shared cache in ~/.automation_studio/script_cache
+            use_cache: Set to False to always parse and validate from scratch
+        """
         self.script_data: Optional[Dict] = None
         self.errors: List[str] = []
+        self.cache = (cache or _default_cache()) if use_cache else None
+        # Whether the last parse_file was served from the cache
+        self.cache_hit = False
+        # Directory a relative dataset path is resolved against; parse_file
+        # sets it to the script's directory
+        self.base_dir: Optional[str] = None
+        # Compiled ${column} fields per step, for scripts with a dataset
+        self.templates: List[Dict[str, Any]] = []
+        # Flat instruction list of the validated script
+        self.program: Optional[Program] = None
     
     def parse_file(self, file_path: str) -> bool:
         """
         Parse a script file.
         
+        A script whose content was validated before is loaded from the
+        cache; only the checks that depend on other files are repeated.
+        
         Args:
             file_path: Path to the YAML script file
             
         Returns:
             True if parsing successful, False otherwise
         """
+        self.base_dir = str(Path(file_path).resolve().parent)
+        self.cache_hit = False
+        
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                self.script_data = yaml.safe_load(f)
-            
-            return self.validate()
-            
+            content = Path(file_path).read_bytes()
         except FileNotFoundError:
             self.errors.append(f"File not found: {file_path}")
             return False
+        except OSError as e:
+            self.errors.append(f"Error parsing file: {str(e)}")
+            return False
+        
+        key = None
+        if self.cache is not None:
+            key = ScriptCache.key(content, PARSER_VERSION)
+            cached = self.cache.load(key)
+            if cached is not None:
+                self.script_data = cached
+                self.cache_hit = True
+                return self._revalidate()
+        
+        # Only imported on a cache miss
+        import yaml
+        
+        try:
+            self.script_data = load_yaml(content)
+            if not self.validate():
+                return False
+            
         except yaml.YAMLError as e:
             self.errors.append(f"YAML parsing error: {str(e)}")
             return False
         except Exception as e:
             self.errors.append(f"Error parsing file: {str(e)}")
             return False
+        
+        if key is not None:
+            self.cache.store(key, self.script_data)
+        return True
     
     def parse_string(self, script_content: str) -> bool:
         """
@@ -64,8 +191,10 @@ class ScriptParser:
         Returns:
             True if parsing successful, False otherwise
         """
+        import yaml
+        
         try:
-            self.script_data = yaml.safe_load(script_content)
+            self.script_data = load_yaml(script_content)
             return self.validate()
             
         except yaml.YAMLError as e:
@@ -75,14 +204,20 @@ class ScriptParser:
             self.errors.append(f"Error parsing script: {str(e)}")
             return False
     
-    def validate(self) -> bool:
+    def validate(self, step_cache: Optional[ValidationCache] = None) -> bool:
         """
         Validate the parsed script data.
         
+        Args:
+            step_cache: Per-step results kept by an editor; only the steps it
+                has marked dirty are validated again
+        
         Returns:
             True if valid, False otherwise
         """
         self.errors.clear()
+        self.templates = []
+        self.program = None
         
         if not self.script_data:
             self.errors.append("Script data is empty")
@@ -96,6 +231,11 @@ class ScriptParser:
             self.errors.append("Missing required field: 'steps'")
             return False
         
+        self._validate_settings(self.script_data)
+        
+        if 'dataset' in self.script_data:
+            self._validate_dataset(self.script_data['dataset'])
+        
         # Validate steps
         steps = self.script_data.get('steps', [])
         
@@ -107,10 +247,149 @@ class ScriptParser:
             self.errors.append("'steps' cannot be empty")
             return False
         
-        # Validate each step
-        for i, step in enumerate(steps, 1):
-            self._validate_step(step, i)
+        # Validate each step, nested steps numbered in document order
+        if step_cache is None:
+            for i, step in enumerate(walk(steps), 1):
+                self._validate_step(step, i)
+        else:
+            self.errors.extend(step_cache.check(steps, self.step_errors))
+        
+        if self.errors:
+            return False
         
+        return self._compile_steps()
+    
+    def validate_header(self, header: Dict[str, Any]) -> List[str]:
+        """
+        Validate the header of a streamed script (everything but the steps).
+        
+        Args:
+            header: Header record
+            
+        Returns:
+            Validation errors; empty if the header is valid
+        """
+        self.errors.clear()
+        self._validate_settings(header)
+        
+        if 'steps' in header:
+            self.errors.append("A streamed script's header cannot contain 'steps'")
+        if 'dataset' in header:
+            self.errors.append("'dataset' is not supported when streaming a script")
+        
+        return list(self.errors)
+    
+    def validate_step(self, step: Any, step_number: int) -> List[str]:
+        """
+        Validate one top-level step of a streamed script, with its nested steps.
+        
+        Args:
+            step: Step value
+            step_number: Number of the step; nested steps are numbered after it
+            
+        Returns:
+            Validation errors; empty if the step is valid
+        """
+        self.errors.clear()
+        self.errors.extend(self.step_errors(step, step_number))
+        
+        for i, nested in enumerate(walk([step]), step_number):
+            if isinstance(nested, dict) and nested.get('action') in ('label', 'goto'):
+                self.errors.append(
+                    f"Step {i}: '{nested['action']}' is not supported when streaming a script"
+                )
+        
+        for i, _ in _variable_conditions([step], step_number):
+            self.errors.append(
+                f"Step {i}: Variable conditions are not supported when streaming a script"
+            )
+        
+        self._validate_images(_image_paths([step], step_number))
+        return list(self.errors)
+    
+    def step_errors(self, step: Any, step_number: int) -> List[str]:
+        """
+        Validate one top-level step and the steps nested in it.
+        
+        Args:
+            step: Step value
+            step_number: Number of the step; nested steps are numbered after it
+            
+        Returns:
+            Validation errors; empty if the step is valid
+        """
+        errors, self.errors = self.errors, []
+        try:
+            for i, nested in enumerate(walk([step]), step_number):
+                self._validate_step(nested, i)
+            return self.errors
+        finally:
+            self.errors = errors
+    
+    def _validate_settings(self, data: Dict[str, Any]) -> None:
+        """
+        Validate the script-level pacing and timing settings.
+        
+        Args:
+            data: Script data or stream header
+        """
+        if 'pacing' in data:
+            try:
+                resolve_pacing(data['pacing'])
+            except ValueError as e:
+                self.errors.append(f"Invalid 'pacing': {e}")
+        
+        if 'timing' in data and data['timing'] not in TIMING_MODES:
+            self.errors.append(
+                f"Invalid 'timing': '{data['timing']}'. "
+                f"Valid modes: {', '.join(TIMING_MODES)}"
+            )
+    
+    def _revalidate(self) -> bool:
+        """
+        Finish loading a script taken from the cache.
+        
+        The cached data passed validate() already; this compiles it again
+        and repeats the checks against the dataset file, which may have
+        changed since.
+        
+        Returns:
+            True if valid, False otherwise
+        """
+        self.errors.clear()
+        return self._compile_steps()
+    
+    def _compile_steps(self) -> bool:
+        """
+        Compile the validated steps into a program and templates, and check
+        placeholder columns against the dataset.
+        
+        Returns:
+            True if valid, False otherwise
+        """
+        steps = self.script_data['steps']
+        self.templates = []
+        self.program = None
+        
+        try:
+            self.program = compile_program(steps)
+        except ValueError as e:
+            self.errors.append(str(e))
+            return False
+        
+        dataset = self.script_data.get('dataset')
+        if dataset is not None:
+            self.templates = compile_templates(list(walk(steps)))
+            columns = self._dataset_columns(dataset)
+            if columns is not None:
+                self._validate_columns(columns, _variable_conditions(steps))
+        else:
+            for i, _ in _variable_conditions(steps):
+                self.errors.append(
+                    f"Step {i}: Variable conditions test dataset columns and need a 'dataset'"
+                )
+        
+        self._validate_images(_image_paths(steps))
         return len(self.errors) == 0
     
     def _validate_step(self, step: Dict[str, Any], step_number: int) -> None:
@@ -131,47 +410,197 @@ class ScriptParser:
         
         action = step['action']
         
-        if action not in self.VALID_ACTIONS:
+        if 'pacing' in step:
+            try:
+                resolve_pacing(step['pacing'])
+            except ValueError as e:
+                self.errors.append(f"Step {step_number}: Invalid 'pacing': {e}")
+        
+        checks = FIELD_RULES.get(action) if isinstance(action, str) else None
+        if checks is None:
             self.errors.append(
-                f"Step {step_number}: Invalid action '{action}'. "
-                f"Valid actions: {', '.join(sorted(self.VALID_ACTIONS))}"
+                f"Step {step_number}: Invalid action '{action}'. Valid actions: {_VALID_ACTIONS_TEXT}"
             )
+            return
+        
+        for key, required, nullable, rule in checks:
+            if key not in step:
+                if required:
+                    self.errors.append(f"Step {step_number}: Action '{action}' requires '{key}' field")
+                continue
+            
+            value = step[key]
+            if value is None and nullable:
+                continue
+            if not rule.check(value):
+                self.errors.append(f"Step {step_number}: '{key}' must be {rule.expected}")
+        
+        if action in ('while', 'if') and isinstance(step.get('condition'), dict):
+            self._validate_condition(step['condition'], step_number)
+    
+    def _validate_condition(self, condition: Any, step_number: int) -> None:
+        """
+        Validate the condition of a while or if step.
         
-        # Validate action-specific requirements
-        if action in ['click', 'double_click', 'right_click', 'move_to']:
-            if 'x' not in step or 'y' not in step:
+        Args:
+            condition: Condition dictionary
+            step_number: Step number for error reporting
+        """
+        if not isinstance(condition, dict) or condition.get('type') not in CONDITION_TYPES:
+            self.errors.append(
+                f"Step {step_number}: 'condition' requires a 'type'. "
+                f"Valid types: {', '.join(CONDITION_TYPES)}"
+            )
+            return
+        
+        kind = condition['type']
+        
+        if kind == 'pixel':
+            if not isinstance(condition.get('x'), int) or not isinstance(condition.get('y'), int):
                 self.errors.append(
-                    f"Step {step_number}: Action '{action}' requires 'x' and 'y' coordinates"
+                    f"Step {step_number}: Pixel condition requires 'x' and 'y' coordinates"
                 )
-        
-        elif action == 'type':
-            if 'text' not in step:
+            if parse_color(condition.get('color')) is None:
                 self.errors.append(
-                    f"Step {step_number}: Action 'type' requires 'text' field"
+                    f"Step {step_number}: Pixel condition requires 'color' as '#rrggbb' or [r, g, b]"
                 )
-        
-        elif action == 'hotkey':
-            if 'keys' not in step:
+            tolerance = condition.get('tolerance', 0)
+            if isinstance(tolerance, bool) or not isinstance(tolerance, int) or not 0 <= tolerance <= 255:
                 self.errors.append(
-                    f"Step {step_number}: Action 'hotkey' requires 'keys' field"
+                    f"Step {step_number}: 'tolerance' must be an integer from 0 to 255"
                 )
-            elif not isinstance(step['keys'], list):
+        
+        elif kind == 'image':
+            if not isinstance(condition.get('image'), str) or not condition['image']:
                 self.errors.append(
-                    f"Step {step_number}: 'keys' must be a list"
+                    f"Step {step_number}: Image condition requires 'image' field"
                 )
+            if not CONFIDENCE.check(condition.get('confidence', 0.9)):
+                self.errors.append(f"Step {step_number}: 'confidence' must be {CONFIDENCE.expected}")
+            for key in ('timeout_ms', 'poll_ms'):
+                if key in condition and not MILLISECONDS.check(condition[key]):
+                    self.errors.append(f"Step {step_number}: '{key}' must be {MILLISECONDS.expected}")
+            self._validate_region(condition, step_number)
         
-        elif action in ['delay', 'wait']:
-            if 'milliseconds' not in step:
+        elif kind == 'variable':
+            if not isinstance(condition.get('name'), str) or not condition['name']:
                 self.errors.append(
-                    f"Step {step_number}: Action '{action}' requires 'milliseconds' field"
+                    f"Step {step_number}: Variable condition requires 'name' field"
                 )
         
-        elif action == 'scroll':
-            if 'amount' not in step:
+        if 'equals' in condition and 'contains' in condition:
+            self.errors.append(
+                f"Step {step_number}: A condition can use 'equals' or 'contains', not both"
+            )
+    
+    def _validate_dataset(self, dataset: Any) -> None:
+        """
+        Validate the optional 'dataset' section.
+        
+        Args:
+            dataset: Section value
+        """
+        if not isinstance(dataset, dict):
+            self.errors.append("'dataset' must be a mapping with at least a 'file'")
+            return
+        
+        if not isinstance(dataset.get('file'), str) or not dataset['file']:
+            self.errors.append("Dataset: missing required field 'file'")
+            return
+        
+        if dataset_format(dataset) is None:
+            self.errors.append(
+                f"Dataset: cannot determine the format of '{dataset['file']}'. "
+                f"Set 'format' to one of: {', '.join(DATASET_FORMATS)}"
+            )
+        
+        on_error = dataset.get('on_error', 'continue')
+        if on_error not in ON_ERROR_MODES:
+            self.errors.append(
+                f"Dataset: invalid 'on_error': '{on_error}'. Valid modes: {', '.join(ON_ERROR_MODES)}"
+            )
+        
+        if 'results' in dataset and not isinstance(dataset['results'], str):
+            self.errors.append("Dataset: 'results' must be a file path")
+    
+    def _dataset_columns(self, dataset: Dict[str, Any]) -> Optional[List[str]]:
+        """
+        Read the column names of a validated dataset section.
+        
+        Args:
+            dataset: Section value
+            
+        Returns:
+            The dataset's column names, or None if they cannot be read
+        """
+        path = Path(dataset['file'])
+        if not path.is_absolute() and self.base_dir:
+            path = Path(self.base_dir) / path
+        try:
+            return read_columns(path, dataset_format(dataset))
+        except (OSError, ValueError) as e:
+            self.errors.append(f"Dataset: cannot read '{dataset['file']}': {e}")
+            return None
+    
+    def _validate_columns(self, columns: List[str], variables: List[Tuple[int, str]]) -> None:
+        """
+        Check that every ${column} reference and variable condition names a
+        dataset column.
+        
+        Args:
+            columns: Column names read from the dataset
+            variables: (step number, column name) of each variable condition
+        """
+        known = set(columns)
+        listed = ', '.join(columns) or '(none)'
+        for i, fields in enumerate(self.templates, 1):
+            for name, value in fields.items():
+                for column in referenced_columns(value):
+                    if column not in known:
+                        self.errors.append(
+                            f"Step {i}: '{name}' refers to unknown column '${{{column}}}'. "
+                            f"Dataset columns: {listed}"
+                        )
+        
+        for i, column in variables:
+            if column not in known:
                 self.errors.append(
-                    f"Step {step_number}: Action 'scroll' requires 'amount' field"
+                    f"Step {i}: Variable condition refers to unknown column '{column}'. "
+                    f"Dataset columns: {listed}"
                 )
     
+    def _validate_images(self, images: List[Tuple[int, str]]) -> None:
+        """
+        Check that template images exist, relative to base_dir if not absolute.
+        
+        Paths with ${column} placeholders are only known per dataset row and
+        are not checked.
+        
+        Args:
+            images: (step number, image path) pairs
+        """
+        for i, image in images:
+            if next(referenced_columns(compile_field(image)), None) is not None:
+                continue
+            
+            path = Path(image)
+            if not path.is_absolute() and self.base_dir:
+                path = Path(self.base_dir) / path
+            if not path.is_file():
+                self.errors.append(f"Step {i}: Image file not found: '{image}'")
+    
+    def _validate_region(self, step: Dict[str, Any], step_number: int) -> None:
+        """
+        Validate an optional screen region field.
+        
+        Args:
+            step: Step dictionary
+            step_number: Step number for error reporting
+        """
+        region = step.get('region')
+        if region is not None and not REGION.check(region):
+            self.errors.append(f"Step {step_number}: 'region' must be {REGION.expected}")
+    
     def get_script_data(self) -> Optional[Dict]:
         """
         Get the parsed script data.
@@ -181,6 +610,39 @@ class ScriptParser:
         """
         return self.script_data
     
+    def get_templates(self) -> List[Dict[str, Any]]:
+        """
+        Get the compiled ${column} fields of the validated script.
+        
+        Returns:
+            One dictionary per step mapping a field name to its compiled
+            value, or an empty list for scripts without a dataset
+        """
+        return self.templates
+    
+    def get_steps(self) -> List[Step]:
+        """
+        Get the steps of the validated script as typed step objects.
+        
+        Returns:
+            Typed top-level steps, with nested steps inside their blocks
+            
+        Raises:
+            ValueError: If no valid script is loaded
+        """
+        if self.program is None:
+            raise ValueError("No valid script loaded")
+        return steps_from_dicts(self.script_data['steps'])
+    
+    def get_program(self) -> Optional[Program]:
+        """
+        Get the compiled instruction list of the validated script.
+        
+        Returns:
+            Program, or None if the script has not validated
+        """
+        return self.program
+    
     def get_errors(self) -> List[str]:
         """
         Get validation errors.
@@ -205,6 +667,7 @@ class ScriptParser:
             'description': self.script_data.get('description', ''),
             'author': self.script_data.get('author', ''),
             'version': self.script_data.get('version', '1.0'),
+            'pacing': self.script_data.get('pacing', 'default'),
             'step_count': len(self.script_data.get('steps', []))
         }
 
@@ -0,0 +1,208 @@
+"""
+Script Stream
+
+Reads very large scripts one step at a time from JSON Lines or multi-document
+YAML, validating each step as it is read, so memory use does not depend on
+the length of the script.
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from src.lib.control_flow import walk
+from src.lib.script_parser import ScriptParser
+
+
+STREAM_FORMATS = ('jsonl', 'yaml')
+
+# File extensions recognised when a stream does not name its format
+FORMAT_EXTENSIONS = {
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+    '.yaml': 'yaml',
+    '.yml': 'yaml',
+}
+
+
+def stream_format(path: str) -> Optional[str]:
+    """
+    Work out a streamed script's format from its extension.
+    
+    Args:
+        path: Script file path
+    
+    Returns:
+        'jsonl' or 'yaml', or None for other extensions
+    """
+    return FORMAT_EXTENSIONS.get(Path(path).suffix.lower())
+
+
+class ScriptStream:
+    """
+    A script read record by record.
+    
+    The first record may be a header (a mapping without 'action' holding
+    name, pacing and timing); every other record is one top-level step.
+    In YAML each record is a document separated by '---'. Iterating reopens
+    the file, so a stream can be run more than once.
+    """
+    
+    def __init__(self, path: str, fmt: Optional[str] = None):
+        """
+        Initialize the stream.
+        
+        Args:
+            path: Script file path
+            fmt: 'jsonl' or 'yaml'; taken from the extension when omitted
+        
+        Raises:
+            ValueError: If the format cannot be determined
+        """
+        self.path = Path(path)
+        self.fmt = fmt or stream_format(path)
+        if self.fmt not in STREAM_FORMATS:
+            raise ValueError(
+                f"Cannot stream '{self.path.name}': use a .jsonl or .yaml file, "
+                f"or one of the formats {', '.join(STREAM_FORMATS)}"
+            )
+        self._header: Optional[Dict[str, Any]] = None
+        # Steps in the script, nested ones included; counted by validate()
+        self.total_steps: Optional[int] = None
+    
+    @property
+    def header(self) -> Dict[str, Any]:
+        """
+        Header record, or an empty mapping if the stream starts with a step.
+        
+        Raises:
+            ValueError: If the header is invalid, so a run fails before any
+                step is read
+        """
+        if self._header is None:
+            header: Dict[str, Any] = {}
+            for location, record in self._records():
+                if isinstance(record, dict) and 'action' not in record:
+                    errors = ScriptParser(use_cache=False).validate_header(record)
+                    if errors:
+                        raise ValueError(f"{location}: {errors[0]}")
+                    header = record
+                break
+            self._header = header
+        return self._header
+    
+    @property
+    def name(self) -> str:
+        """Script name from the header, or the file name."""
+        return self.header.get('name') or self.path.stem
+    
+    def __iter__(self) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Read and validate the steps.
+        
+        Yields:
+            (step number, step) for each top-level step; nested steps take
+            the numbers after their parent's
+        
+        Raises:
+            ValueError: If the header or a step is invalid; the message names
+                the step number and the line or document it came from
+        """
+        parser = ScriptParser(use_cache=False)
+        parser.base_dir = str(self.path.resolve().parent)
+        number = 0
+        
+        for index, (location, record) in enumerate(self._records()):
+            if index == 0 and isinstance(record, dict) and 'action' not in record:
+                errors = parser.validate_header(record)
+                if errors:
+                    raise ValueError(f"{location}: {errors[0]}")
+                continue
+            
+            errors = parser.validate_step(record, number + 1)
+            if errors:
+                raise ValueError(f"{location}: {errors[0]}")
+            
+            yield number + 1, record
+            number += sum(1 for _ in walk([record]))
+    
+    def validate(self, max_errors: int = 50) -> List[str]:
+        """
+        Validate the whole stream without keeping it in memory.
+        
+        A pass that reads the whole file also sets total_steps, so a run of
+        the stream can report its progress against the script's length.
+        
+        Args:
+            max_errors: Stop after this many errors
+        
+        Returns:
+            Validation errors, each prefixed with its line or document
+        """
+        parser = ScriptParser(use_cache=False)
+        parser.base_dir = str(self.path.resolve().parent)
+        errors: List[str] = []
+        number = 0
+        steps = 0
+        
+        try:
+            for index, (location, record) in enumerate(self._records()):
+                if index == 0 and isinstance(record, dict) and 'action' not in record:
+                    found = parser.validate_header(record)
+                else:
+                    found = parser.validate_step(record, number + 1)
+                    number += sum(1 for _ in walk([record]))
+                    steps += 1
+                
+                errors.extend(f"{location}: {error}" for error in found)
+                if len(errors) >= max_errors:
+                    return errors[:max_errors]
+        except (OSError, ValueError) as e:
+            errors.append(str(e))
+            return errors
+        
+        self.total_steps = number
+        if steps == 0:
+            errors.append("Script has no steps")
+        return errors
+    
+    def _records(self) -> Iterator[Tuple[str, Any]]:
+        """
+        Read raw records one at a time.
+        
+        Yields:
+            (location, record) where location is 'line N' or 'document N'
+        
+        Raises:
+            OSError: If the file cannot be read
+            ValueError: If a record cannot be decoded
+        """
+        if self.fmt == 'jsonl':
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line_number, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError as e:
+                        raise ValueError(f"line {line_number}: invalid JSON: {e}") from None
+                    yield f"line {line_number}", record
+            return
+        
+        import yaml
+        
+        loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+        with open(self.path, 'r', encoding='utf-8') as f:
+            documents = yaml.load_all(f, Loader=loader)
+            document = 0
+            while True:
+                try:
+                    record = next(documents)
+                except StopIteration:
+                    return
+                except yaml.YAMLError as e:
+                    raise ValueError(f"document {document + 1}: YAML parsing error: {e}") from None
+                
+                document += 1
+                if record is not None:
+                    yield f"document {document}", record
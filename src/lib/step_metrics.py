@@ -0,0 +1,347 @@
+"""
+Step Metrics
+
+Per-step latency samples for a script run, aggregated into per-action and
+per-step-index histograms and exportable as JSON or CSV.
+"""
+
+import copy
+import csv
+import json
+import math
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+
+# Upper bounds (ms) of the histogram buckets; the last bucket is open-ended
+HISTOGRAM_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+CSV_FIELDS = (
+    'group', 'key', 'count', 'total_ms', 'p50_ms', 'p95_ms', 'max_ms',
+    'action_p50_ms', 'action_p95_ms', 'pause_p50_ms', 'pause_p95_ms',
+)
+
+# Raw samples kept; when a run reaches this many, the oldest half is folded
+# into per-group aggregates so memory stays bounded
+MAX_SAMPLES = 50000
+
+# Folded percentiles are read from log-scale buckets 1% wide
+_BUCKET_SCALE = 1.0 / math.log1p(0.01)
+_SMALLEST_MS = 1e-6
+
+
+def percentile(values: List[float], q: float) -> float:
+    """
+    Percentile by linear interpolation between closest ranks.
+    
+    Args:
+        values: Sorted values
+        q: Percentile from 0 to 100
+    
+    Returns:
+        Interpolated value, or 0.0 for an empty list
+    """
+    if not values:
+        return 0.0
+    
+    position = (len(values) - 1) * q / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    fraction = position - lower
+    return values[lower] + (values[upper] - values[lower]) * fraction
+
+
+def histogram(values: List[float]) -> List[int]:
+    """
+    Count values into HISTOGRAM_BOUNDS_MS buckets.
+    
+    Args:
+        values: Durations in milliseconds
+    
+    Returns:
+        One count per bound plus one for values above the last bound
+    """
+    counts = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+    for value in values:
+        counts[bisect_left(HISTOGRAM_BOUNDS_MS, value)] += 1
+    return counts
+
+
+class _Series:
+    """Extremes and log-scale bucket counts of one duration series."""
+    
+    __slots__ = ('low', 'high', 'buckets')
+    
+    def __init__(self):
+        self.low = math.inf
+        self.high = 0.0
+        self.buckets: Dict[int, int] = {}
+    
+    def add(self, ms: float) -> None:
+        if ms < self.low:
+            self.low = ms
+        if ms > self.high:
+            self.high = ms
+        key = math.floor(math.log(max(ms, _SMALLEST_MS)) * _BUCKET_SCALE)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+    
+    def percentile(self, count: int, q: float) -> float:
+        """
+        Percentile as percentile() computes it, reading each rank from its
+        bucket, so the result is within 1% of the exact value.
+        
+        Args:
+            count: Number of values added
+            q: Percentile from 0 to 100
+        
+        Returns:
+            Estimated value, or 0.0 if nothing was added
+        """
+        if count == 0:
+            return 0.0
+        
+        position = (count - 1) * q / 100.0
+        lower = int(position)
+        ranks = (lower, min(lower + 1, count - 1))
+        values: List[float] = []
+        seen = 0
+        
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            while len(values) < 2 and ranks[len(values)] < seen:
+                middle = math.exp((key + 0.5) / _BUCKET_SCALE)
+                values.append(min(max(middle, self.low), self.high))
+            if len(values) == 2:
+                break
+        
+        return values[0] + (values[1] - values[0]) * (position - lower)
+
+
+class _Group:
+    """Running statistics of the samples sharing an action or step number."""
+    
+    __slots__ = ('count', 'total_ms', 'total', 'action', 'pause', 'histogram')
+    
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.total = _Series()
+        self.action = _Series()
+        self.pause = _Series()
+        self.histogram = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+    
+    def add(self, action_ms: float, pause_ms: float) -> None:
+        total_ms = action_ms + pause_ms
+        self.count += 1
+        self.total_ms += total_ms
+        self.total.add(total_ms)
+        self.action.add(action_ms)
+        self.pause.add(pause_ms)
+        self.histogram[bisect_left(HISTOGRAM_BOUNDS_MS, total_ms)] += 1
+    
+    def stats(self) -> Dict[str, Any]:
+        count = self.count
+        return {
+            'count': count,
+            'total_ms': self.total_ms,
+            'p50_ms': self.total.percentile(count, 50),
+            'p95_ms': self.total.percentile(count, 95),
+            'max_ms': self.total.high,
+            'action_p50_ms': self.action.percentile(count, 50),
+            'action_p95_ms': self.action.percentile(count, 95),
+            'action_max_ms': self.action.high,
+            'pause_p50_ms': self.pause.percentile(count, 50),
+            'pause_p95_ms': self.pause.percentile(count, 95),
+            'pause_max_ms': self.pause.high,
+            'histogram': list(self.histogram),
+        }
+
+
+class StepMetrics:
+    """
+    Collects one sample per executed step.
+    
+    Each sample splits the step into the time spent performing the action
+    (backend calls, motion and typing intervals) and the time spent in the
+    pause that follows it. Time the run spent paused by the user is excluded.
+    
+    Up to MAX_SAMPLES samples are kept raw and give exact statistics. Beyond
+    that the oldest half is folded into per-action and per-step aggregates,
+    so dataset runs and long loops do not grow memory with every step; the
+    percentiles of folded groups are then estimated to within 1%.
+    """
+    
+    def __init__(self):
+        """Initialize an empty collection."""
+        # (step number, action, action seconds, pause seconds)
+        self.samples: List[Tuple[int, str, float, float]] = []
+        self._folded = 0
+        self._folded_total = 0.0
+        self._by_action: Dict[str, _Group] = {}
+        self._by_step: Dict[int, _Group] = {}
+    
+    def __len__(self) -> int:
+        """Number of samples recorded, folded ones included."""
+        return self._folded + len(self.samples)
+    
+    def clear(self) -> None:
+        """Drop all samples."""
+        self.samples.clear()
+        self._folded = 0
+        self._folded_total = 0.0
+        self._by_action.clear()
+        self._by_step.clear()
+    
+    def record(self, number: int, action: str, action_time: float, pause_time: float) -> None:
+        """
+        Add a sample.
+        
+        Args:
+            number: 1-based step number
+            action: Action name
+            action_time: Seconds spent performing the action
+            pause_time: Seconds spent in the pause after it
+        """
+        samples = self.samples
+        samples.append((number, action, action_time, pause_time))
+        if len(samples) >= MAX_SAMPLES:
+            self._fold(MAX_SAMPLES // 2)
+    
+    def _fold(self, count: int) -> None:
+        """Move the oldest count samples into the aggregates."""
+        by_action = self._by_action
+        by_step = self._by_step
+        
+        for number, action, action_time, pause_time in self.samples[:count]:
+            action_ms = action_time * 1000.0
+            pause_ms = pause_time * 1000.0
+            
+            group = by_action.get(action)
+            if group is None:
+                group = by_action[action] = _Group()
+            group.add(action_ms, pause_ms)
+            
+            group = by_step.get(number)
+            if group is None:
+                group = by_step[number] = _Group()
+            group.add(action_ms, pause_ms)
+            
+            self._folded_total += action_time + pause_time
+        
+        self._folded += count
+        del self.samples[:count]
+    
+    def summary(self) -> Dict[str, Any]:
+        """
+        Aggregate the samples.
+        
+        Returns:
+            Dictionary with 'steps' (sample count), 'total_ms', 'by_action'
+            and 'by_step'; each group maps a key to count, total, p50/p95/max
+            figures and a histogram over HISTOGRAM_BOUNDS_MS
+        """
+        total = self._folded_total + sum(a + p for _, _, a, p in self.samples)
+        return {
+            'steps': len(self),
+            'total_ms': total * 1000.0,
+            'histogram_bounds_ms': list(HISTOGRAM_BOUNDS_MS),
+            'by_action': self._grouped(1, self._by_action),
+            'by_step': {str(key): stats for key, stats in self._grouped(0, self._by_step).items()},
+        }
+    
+    def _grouped(self, field: int, folded: Dict[Any, _Group]) -> Dict[Any, Dict[str, Any]]:
+        """Statistics per distinct value of one sample field (0 = step, 1 = action)."""
+        groups: Dict[Any, List[Tuple[float, float]]] = {}
+        for sample in self.samples:
+            groups.setdefault(sample[field], []).append((sample[2], sample[3]))
+        
+        stats = {}
+        for key in sorted(groups.keys() | folded.keys()):
+            if key not in folded:
+                stats[key] = self._aggregate(groups[key])
+                continue
+            
+            group = copy.deepcopy(folded[key])
+            for action_time, pause_time in groups.get(key, ()):
+                group.add(action_time * 1000.0, pause_time * 1000.0)
+            stats[key] = group.stats()
+        return stats
+    
+    @staticmethod
+    def _aggregate(times: List[Tuple[float, float]]) -> Dict[str, Any]:
+        """Statistics for one group of (action, pause) samples."""
+        action_ms = sorted(a * 1000.0 for a, _ in times)
+        pause_ms = sorted(p * 1000.0 for _, p in times)
+        total_ms = sorted((a + p) * 1000.0 for a, p in times)
+        
+        return {
+            'count': len(times),
+            'total_ms': sum(total_ms),
+            'p50_ms': percentile(total_ms, 50),
+            'p95_ms': percentile(total_ms, 95),
+            'max_ms': total_ms[-1],
+            'action_p50_ms': percentile(action_ms, 50),
+            'action_p95_ms': percentile(action_ms, 95),
+            'action_max_ms': action_ms[-1],
+            'pause_p50_ms': percentile(pause_ms, 50),
+            'pause_p95_ms': percentile(pause_ms, 95),
+            'pause_max_ms': pause_ms[-1],
+            'histogram': histogram(total_ms),
+        }
+    
+    def slowest_actions(self, count: int = 3) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Actions ranked by the total time they took.
+        
+        Args:
+            count: Number of actions to return
+        
+        Returns:
+            List of (action, statistics) pairs, slowest first
+        """
+        by_action = self._grouped(1, self._by_action)
+        ranked = sorted(by_action.items(), key=lambda item: item[1]['total_ms'], reverse=True)
+        return ranked[:count]
+    
+    def export(self, file_path: str) -> None:
+        """
+        Write the metrics to a file; the format follows the extension.
+        
+        '.csv' writes one row per action and per step index; anything else
+        writes JSON with the summary and the raw samples still kept.
+        
+        Args:
+            file_path: Output path
+        
+        Raises:
+            OSError: If the file cannot be written
+        """
+        path = Path(file_path)
+        summary = self.summary()
+        
+        if path.suffix.lower() == '.csv':
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction='ignore')
+                writer.writeheader()
+                for group in ('action', 'step'):
+                    for key, stats in summary[f'by_{group}'].items():
+                        writer.writerow({'group': group, 'key': key, **self._rounded(stats)})
+            return
+        
+        summary['samples_dropped'] = self._folded
+        summary['samples'] = [
+            {
+                'step': number,
+                'action': action,
+                'action_ms': round(action_time * 1000.0, 3),
+                'pause_ms': round(pause_time * 1000.0, 3),
+            }
+            for number, action, action_time, pause_time in self.samples
+        ]
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+    
+    @staticmethod
+    def _rounded(stats: Dict[str, Any]) -> Dict[str, Any]:
+        return {key: round(value, 3) if isinstance(value, float) else value for key, value in stats.items()}
@@ -0,0 +1,485 @@
+"""
+Step Model
+
+Typed, slot-based step classes, one per action. Each class declares its
+fields, their defaults and their type rules once, for the parser, executor
+and editor to share, and converts to and from the dictionary form scripts
+are written in.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from src.lib.schema import (
+    Rule, compile_rules, integer, integer_list, mapping, number, one_of, step_list, string, string_list
+)
+from src.lib.screenshot_writer import SCREENSHOT_FORMATS
+
+
+class _Required:
+    """Marker default of a field that every step of the action must have."""
+    
+    __slots__ = ()
+    
+    def __repr__(self) -> str:
+        return 'REQUIRED'
+
+
+REQUIRED: Any = _Required()
+
+# Rules shared by fields of several actions
+COORDINATE = integer()
+MILLISECONDS = number(0)
+CONFIDENCE = Rule(
+    lambda value: type(value) in (int, float) and 0 < value <= 1,
+    "a number between 0 and 1"
+)
+REGION = integer_list(4, "a list of 4 integers [left, top, width, height]")
+
+
+class Step:
+    """
+    Base class of all steps.
+    
+    Subclasses list their fields in FIELDS as (attribute, default, rule)
+    triples, in the order they are written out; __slots__ holds the
+    attributes a class adds to its base. A default of REQUIRED makes the
+    field mandatory and a default of None lets it be null. Keys a step has
+    but its action does not use are kept in 'extra' so editing a step never
+    loses them.
+    """
+    
+    __slots__ = ('description', 'pacing', 'extra')
+    
+    action = ''
+    FIELDS: Tuple[Tuple[str, Any, Rule], ...] = ()
+    # Attributes holding nested step lists
+    BLOCKS: Tuple[str, ...] = ()
+    # Attributes written under a different key (keywords cannot be attributes)
+    KEYS: Dict[str, str] = {}
+    
+    description: str
+    pacing: Optional[Any]
+    extra: Optional[Dict[str, Any]]
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # (attribute, key, default, holds nested steps) for from_dict
+        cls._SPEC = tuple(
+            (name, cls.KEYS.get(name, name), default, name in cls.BLOCKS) for name, default, _ in cls.FIELDS
+        )
+        cls._KNOWN = frozenset(('action', 'description', 'pacing') + tuple(key for _, key, _, _ in cls._SPEC))
+    
+    def __init__(self, description: str = '', pacing: Optional[Any] = None, **fields: Any):
+        """
+        Initialize a step.
+        
+        Args:
+            description: Optional note shown in logs and the editor
+            pacing: Per-step pacing override
+            **fields: The action's fields; omitted ones take their defaults
+        
+        Raises:
+            TypeError: If a required field is missing or a field is unknown
+        """
+        self.description = description
+        self.pacing = pacing
+        self.extra = None
+        
+        for name, default, _ in self.FIELDS:
+            value = fields.pop(name, default)
+            if value is REQUIRED:
+                raise TypeError(f"{type(self).__name__} requires '{name}'")
+            setattr(self, name, value)
+        
+        if fields:
+            raise TypeError(f"{type(self).__name__} has no field '{next(iter(fields))}'")
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Step':
+        """
+        Build a step of this class from its dictionary form.
+        
+        Args:
+            data: Step dictionary
+        
+        Returns:
+            Step instance
+        
+        Raises:
+            KeyError: If a required field is missing
+            ValueError: If a nested step uses an unknown action
+        """
+        step = cls.__new__(cls)
+        step.description = data.get('description', '')
+        step.pacing = data.get('pacing')
+        
+        for name, key, default, block in cls._SPEC:
+            value = data.get(key, default)
+            if value is REQUIRED:
+                raise KeyError(key)
+            if block and value is not None:
+                value = [step_from_dict(nested) for nested in value]
+            setattr(step, name, value)
+        
+        known = cls._KNOWN
+        if known.issuperset(data):
+            step.extra = None
+        else:
+            step.extra = {key: value for key, value in data.items() if key not in known}
+        return step
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Dictionary form of the step.
+        
+        Fields left at their default, and optional fields set to None, are
+        not written.
+        
+        Returns:
+            Step dictionary
+        """
+        data: Dict[str, Any] = {'action': self.action}
+        if self.description:
+            data['description'] = self.description
+        if self.pacing is not None:
+            data['pacing'] = self.pacing
+        
+        for name, default, _ in self.FIELDS:
+            value = getattr(self, name)
+            if value is None or (default is not REQUIRED and value == default):
+                continue
+            if name in self.BLOCKS:
+                value = [nested.to_dict() for nested in value]
+            data[self.KEYS.get(name, name)] = value
+        
+        if self.extra:
+            data.update(self.extra)
+        return data
+    
+    @classmethod
+    def defaults(cls) -> Dict[str, Any]:
+        """Default value of every optional field."""
+        return {name: default for name, default, _ in cls.FIELDS if default is not REQUIRED}
+    
+    def __repr__(self) -> str:
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name, _, _ in self.FIELDS)
+        return f"{type(self).__name__}({fields})"
+
+
+# Mouse
+
+class Click(Step):
+    """Left click at a screen position."""
+    
+    __slots__ = ('x', 'y')
+    action = 'click'
+    FIELDS = (('x', REQUIRED, COORDINATE), ('y', REQUIRED, COORDINATE))
+    
+    x: int
+    y: int
+
+
+class DoubleClick(Click):
+    """Double click at a screen position."""
+    
+    __slots__ = ()
+    action = 'double_click'
+
+
+class RightClick(Click):
+    """Right click at a screen position."""
+    
+    __slots__ = ()
+    action = 'right_click'
+
+
+class MoveTo(Click):
+    """Move the cursor, optionally gliding over a duration in seconds."""
+    
+    __slots__ = ('duration',)
+    action = 'move_to'
+    FIELDS = Click.FIELDS + (('duration', 0, number(0)),)
+    
+    duration: float
+
+
+class DragTo(MoveTo):
+    """Drag from the cursor position to a screen position."""
+    
+    __slots__ = ()
+    action = 'drag_to'
+    FIELDS = Click.FIELDS + (('duration', 0.5, number(0)),)
+
+
+class Scroll(Step):
+    """Scroll the wheel, optionally at a screen position."""
+    
+    __slots__ = ('amount', 'x', 'y')
+    action = 'scroll'
+    FIELDS = (('amount', REQUIRED, integer()), ('x', None, COORDINATE), ('y', None, COORDINATE))
+    
+    amount: int
+    x: Optional[int]
+    y: Optional[int]
+
+
+# Keyboard
+
+class TypeText(Step):
+    """Type text, with an optional interval in seconds between keys."""
+    
+    __slots__ = ('text', 'interval')
+    action = 'type'
+    FIELDS = (('text', REQUIRED, string()), ('interval', 0, number(0)))
+    
+    text: str
+    interval: float
+
+
+class Hotkey(Step):
+    """Press a key combination."""
+    
+    __slots__ = ('keys',)
+    action = 'hotkey'
+    FIELDS = (('keys', REQUIRED, string_list()),)
+    
+    keys: List[str]
+
+
+class Press(Step):
+    """Press a single key one or more times."""
+    
+    __slots__ = ('key', 'presses')
+    action = 'press'
+    FIELDS = (('key', REQUIRED, string(allow_empty=False)), ('presses', 1, integer(1)))
+    
+    key: str
+    presses: int
+
+
+# Timing
+
+class Delay(Step):
+    """Wait a fixed number of milliseconds."""
+    
+    __slots__ = ('milliseconds',)
+    action = 'delay'
+    FIELDS = (('milliseconds', REQUIRED, MILLISECONDS),)
+    
+    milliseconds: int
+
+
+class Wait(Delay):
+    """Alias of delay."""
+    
+    __slots__ = ()
+    action = 'wait'
+
+
+class WaitUntilStable(Step):
+    """Wait until the screen, or a region of it, stops changing."""
+    
+    __slots__ = ('region', 'stable_ms', 'timeout_ms', 'poll_ms')
+    action = 'wait_until_stable'
+    FIELDS = (
+        ('region', None, REGION), ('stable_ms', 300, MILLISECONDS),
+        ('timeout_ms', 10000, MILLISECONDS), ('poll_ms', 100, MILLISECONDS),
+    )
+    
+    region: Optional[List[int]]
+    stable_ms: int
+    timeout_ms: int
+    poll_ms: int
+
+
+# Clipboard
+
+class SetClipboard(Step):
+    """Put text on the clipboard."""
+    
+    __slots__ = ('text',)
+    action = 'set_clipboard'
+    FIELDS = (('text', REQUIRED, string()),)
+    
+    text: str
+
+
+class Paste(Step):
+    """Paste from the clipboard."""
+    
+    __slots__ = ()
+    action = 'paste'
+
+
+# Screen
+
+class Screenshot(Step):
+    """Capture the screen or a region; None fields use the writer's defaults."""
+    
+    __slots__ = ('filename', 'format', 'region', 'compress_level', 'quality')
+    action = 'screenshot'
+    FIELDS = (
+        ('filename', None, string()), ('format', None, one_of(SCREENSHOT_FORMATS)),
+        ('region', None, REGION), ('compress_level', None, integer(0, 9)), ('quality', None, integer(1, 100)),
+    )
+    
+    filename: Optional[str]
+    format: Optional[str]
+    region: Optional[List[int]]
+    compress_level: Optional[int]
+    quality: Optional[int]
+
+
+class WaitForImage(Step):
+    """Wait until a template image appears on screen."""
+    
+    __slots__ = ('image', 'confidence', 'region', 'timeout_ms', 'poll_ms')
+    action = 'wait_for_image'
+    FIELDS = (
+        ('image', REQUIRED, string(allow_empty=False)), ('confidence', 0.9, CONFIDENCE),
+        ('region', None, REGION), ('timeout_ms', 10000, MILLISECONDS), ('poll_ms', 100, MILLISECONDS),
+    )
+    
+    image: str
+    confidence: float
+    region: Optional[List[int]]
+    timeout_ms: int
+    poll_ms: int
+
+
+class ClickImage(WaitForImage):
+    """Click the centre of a template image, plus an optional offset."""
+    
+    __slots__ = ('offset',)
+    action = 'click_image'
+    FIELDS = (
+        ('image', REQUIRED, string(allow_empty=False)), ('confidence', 0.9, CONFIDENCE),
+        ('region', None, REGION), ('timeout_ms', 5000, MILLISECONDS), ('poll_ms', 100, MILLISECONDS),
+        ('offset', (0, 0), integer_list(2, "a list of 2 integers [dx, dy]")),
+    )
+    
+    offset: Tuple[int, int]
+
+
+# Interaction
+
+class Message(Step):
+    """Show a message."""
+    
+    __slots__ = ('text',)
+    action = 'message'
+    FIELDS = (('text', REQUIRED, string()),)
+    
+    text: str
+
+
+class Input(Step):
+    """Ask for input."""
+    
+    __slots__ = ('prompt',)
+    action = 'input'
+    FIELDS = (('prompt', REQUIRED, string()),)
+    
+    prompt: str
+
+
+# Control flow
+
+class Repeat(Step):
+    """Run nested steps a fixed number of times."""
+    
+    __slots__ = ('times', 'steps')
+    action = 'repeat'
+    FIELDS = (('times', REQUIRED, integer(0)), ('steps', REQUIRED, step_list()))
+    BLOCKS = ('steps',)
+    
+    times: int
+    steps: List[Step]
+
+
+class While(Step):
+    """Run nested steps for as long as a condition holds."""
+    
+    __slots__ = ('condition', 'steps')
+    action = 'while'
+    FIELDS = (('condition', REQUIRED, mapping()), ('steps', REQUIRED, step_list()))
+    BLOCKS = ('steps',)
+    
+    condition: Dict[str, Any]
+    steps: List[Step]
+
+
+class If(While):
+    """Run nested steps if a condition holds, or the 'else' steps if not."""
+    
+    __slots__ = ('orelse',)
+    action = 'if'
+    FIELDS = While.FIELDS + (('orelse', None, step_list()),)
+    BLOCKS = ('steps', 'orelse')
+    KEYS = {'orelse': 'else'}
+    
+    orelse: Optional[List[Step]]
+
+
+class Label(Step):
+    """Mark a position for goto."""
+    
+    __slots__ = ('name',)
+    action = 'label'
+    FIELDS = (('name', REQUIRED, string(allow_empty=False)),)
+    
+    name: str
+
+
+class Goto(Step):
+    """Continue at a label."""
+    
+    __slots__ = ('label',)
+    action = 'goto'
+    FIELDS = (('label', REQUIRED, string(allow_empty=False)),)
+    
+    label: str
+
+
+# Step class of each action
+STEP_TYPES: Dict[str, Type[Step]] = {
+    cls.action: cls
+    for cls in (
+        Click, DoubleClick, RightClick, MoveTo, DragTo, Scroll,
+        TypeText, Hotkey, Press,
+        Delay, Wait, WaitUntilStable,
+        SetClipboard, Paste,
+        Screenshot, WaitForImage, ClickImage,
+        Message, Input,
+        Repeat, While, If, Label, Goto,
+    )
+}
+
+
+# Field checks of each action, for the parser's validator
+FIELD_RULES = compile_rules(STEP_TYPES, REQUIRED)
+
+
+def step_from_dict(data: Dict[str, Any]) -> Step:
+    """
+    Build a typed step from its dictionary form.
+    
+    Args:
+        data: Step dictionary
+    
+    Returns:
+        Instance of the action's step class
+    
+    Raises:
+        KeyError: If a required field is missing
+        ValueError: If the action is unknown
+    """
+    cls = STEP_TYPES.get(data.get('action'))
+    if cls is None:
+        raise ValueError(f"Unknown action: {data.get('action')}")
+    return cls.from_dict(data)
+
+
+def steps_from_dicts(steps: List[Dict[str, Any]]) -> List[Step]:
+    """Build typed steps from a list of step dictionaries."""
+    return [step_from_dict(step) for step in steps]
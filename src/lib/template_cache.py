@@ -0,0 +1,147 @@
+"""
+Template Cache
+
+Two-tier cache of prepared template images: an in-memory LRU keyed by file
+path and modification time, backed by on-disk entries keyed by the file's
+content hash.
+"""
+
+import hashlib
+import io
+import json
+import os
+import zipfile
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from src.lib.image_matcher import Template
+
+
+# Bump when the stored layout or the template preparation changes
+CACHE_FORMAT = 1
+
+CACHE_DIR_NAME = '.template_cache'
+
+INDEX_FILE = 'index.json'
+
+
+class TemplateCache:
+    """Loads templates, reusing decoded pyramids from memory or disk."""
+    
+    def __init__(self, max_memory: int = 64):
+        """
+        Initialize the cache.
+        
+        Args:
+            max_memory: Number of templates kept in memory
+        """
+        self.max_memory = max_memory
+        self._memory: 'OrderedDict[Tuple[str, int, int], Template]' = OrderedDict()
+        self.stats: Dict[str, int] = {'memory': 0, 'disk': 0, 'decoded': 0}
+    
+    def load(self, path: Path, name: str, cache_dir: Optional[Path] = None) -> Template:
+        """
+        Load a prepared template.
+        
+        Args:
+            path: Image file path
+            name: Label for the template (as written in the script)
+            cache_dir: Directory for on-disk entries; defaults to a
+                '.template_cache' folder next to the image
+        
+        Returns:
+            Prepared Template
+        """
+        stat = path.stat()
+        memory_key = (str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+        
+        template = self._memory.get(memory_key)
+        if template is not None:
+            self._memory.move_to_end(memory_key)
+            self.stats['memory'] += 1
+            return template
+        
+        data = path.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+        
+        if cache_dir is None:
+            cache_dir = path.parent / CACHE_DIR_NAME
+        entry = cache_dir / f"{digest}.v{CACHE_FORMAT}.npz"
+        
+        template = self._read_entry(entry, name)
+        if template is not None:
+            self.stats['disk'] += 1
+        else:
+            from PIL import Image
+            
+            with Image.open(io.BytesIO(data)) as image:
+                template = Template(image.convert('RGB'), name)
+            self.stats['decoded'] += 1
+            self._write_entry(cache_dir, entry, template, memory_key[0])
+        
+        self._memory[memory_key] = template
+        while len(self._memory) > self.max_memory:
+            self._memory.popitem(last=False)
+        
+        return template
+    
+    def clear(self) -> None:
+        """Drop all in-memory templates."""
+        self._memory.clear()
+    
+    def _read_entry(self, entry: Path, name: str) -> Optional[Template]:
+        """Read a template from disk, or None if missing or unreadable."""
+        if not entry.exists():
+            return None
+        
+        try:
+            with np.load(entry, allow_pickle=False) as stored:
+                norms = stored['norms']
+                levels = [(stored[f'level_{i}'], float(norms[i])) for i in range(len(norms))]
+                height, width = (int(v) for v in stored['size'])
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            return None
+        
+        return Template.from_pyramid(levels, height, width, name)
+    
+    def _write_entry(self, cache_dir: Path, entry: Path, template: Template, source: str) -> None:
+        """Store a template on disk and drop the previous entry for the same file."""
+        arrays = {f'level_{i}': level for i, (level, _) in enumerate(template.pyramid)}
+        arrays['norms'] = np.array([norm for _, norm in template.pyramid], dtype=np.float64)
+        arrays['size'] = np.array([template.height, template.width], dtype=np.int64)
+        
+        try:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            
+            temp_path = entry.with_name(entry.name + '.tmp')
+            with open(temp_path, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(temp_path, entry)
+            
+            self._update_index(cache_dir, source, entry.name)
+        except OSError:
+            # The cache is an optimisation; a read-only folder just means no reuse
+            pass
+    
+    def _update_index(self, cache_dir: Path, source: str, entry_name: str) -> None:
+        """Record which entry belongs to a source file, deleting the stale one."""
+        index_path = cache_dir / INDEX_FILE
+        try:
+            index = json.loads(index_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            index = {}
+        
+        previous = index.get(source)
+        index[source] = entry_name
+        
+        # Identical images share an entry, so only delete it once unreferenced
+        if previous and previous not in index.values():
+            try:
+                (cache_dir / previous).unlink()
+            except OSError:
+                pass
+        
+        index_path.write_text(json.dumps(index, indent=2), encoding='utf-8')
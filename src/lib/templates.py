@@ -0,0 +1,151 @@
+"""
+Step Templates
+
+${column} placeholders in step fields, compiled once into formatters so a
+dataset run does no parsing per row.
+"""
+
+import re
+from typing import Any, Dict, Iterator, List
+
+
+# ${column} references in step fields
+PLACEHOLDER = re.compile(r'\$\{([^{}]+)\}')
+
+# Step fields that may contain placeholders
+TEMPLATE_FIELDS = ('text', 'keys', 'filename')
+
+
+class Template:
+    """A string with ${column} placeholders, pre-split into a format string."""
+    
+    __slots__ = ('source', 'columns', '_format')
+    
+    def __init__(self, source: str):
+        """
+        Compile a template.
+        
+        Args:
+            source: Text containing at least one placeholder
+        """
+        self.source = source
+        columns: List[str] = []
+        parts: List[str] = []
+        last = 0
+        
+        for match in PLACEHOLDER.finditer(source):
+            parts.append(_escape(source[last:match.start()]))
+            column = match.group(1).strip()
+            if column not in columns:
+                columns.append(column)
+            parts.append(f"{{{columns.index(column)}}}")
+            last = match.end()
+        parts.append(_escape(source[last:]))
+        
+        # Column names in first-use order; placeholders refer to them by index
+        self.columns = tuple(columns)
+        self._format = ''.join(parts)
+    
+    def render(self, row: Dict[str, Any]) -> str:
+        """
+        Substitute a row's values.
+        
+        Args:
+            row: Column values
+        
+        Returns:
+            Rendered text
+        
+        Raises:
+            ValueError: If the row has no such column
+        """
+        try:
+            values = [row[column] for column in self.columns]
+        except KeyError as e:
+            raise ValueError(f"Dataset row has no column '{e.args[0]}'") from None
+        return self._format.format(*values)
+    
+    def __repr__(self) -> str:
+        return f"Template({self.source!r})"
+
+
+def _escape(text: str) -> str:
+    """Escape literal braces for str.format."""
+    return text.replace('{', '{{').replace('}', '}}')
+
+
+def compile_field(value: Any) -> Any:
+    """
+    Compile one field value.
+    
+    Args:
+        value: A string, or a list of strings for 'keys'
+    
+    Returns:
+        A Template, a tuple mixing Templates and plain strings, or None when
+        the value has no placeholders and is static
+    """
+    if isinstance(value, str):
+        return Template(value) if PLACEHOLDER.search(value) else None
+    
+    if isinstance(value, list):
+        items = [compile_field(item) for item in value]
+        if any(item is not None for item in items):
+            return tuple(value[i] if item is None else item for i, item in enumerate(items))
+    
+    return None
+
+
+def compile_templates(steps: List[Any]) -> List[Dict[str, Any]]:
+    """
+    Compile the placeholder fields of every step.
+    
+    Args:
+        steps: Step dictionaries
+    
+    Returns:
+        One dictionary per step mapping a field name to its compiled value;
+        fields that are absent are static and used exactly as written
+    """
+    compiled = []
+    for step in steps:
+        fields = {}
+        if isinstance(step, dict):
+            for name in TEMPLATE_FIELDS:
+                value = compile_field(step.get(name))
+                if value is not None:
+                    fields[name] = value
+        compiled.append(fields)
+    return compiled
+
+
+def render_value(value: Any, row: Dict[str, Any]) -> Any:
+    """
+    Render a compiled field value.
+    
+    Args:
+        value: Template or tuple from compile_field
+        row: Column values
+    
+    Returns:
+        The rendered string, or a list of strings for a tuple
+    """
+    if isinstance(value, Template):
+        return value.render(row)
+    return [item.render(row) if isinstance(item, Template) else item for item in value]
+
+
+def referenced_columns(value: Any) -> Iterator[str]:
+    """
+    Columns referenced by a compiled field value.
+    
+    Args:
+        value: Template or tuple from compile_field
+    
+    Yields:
+        Column names
+    """
+    items = value if isinstance(value, tuple) else (value,)
+    for item in items:
+        if isinstance(item, Template):
+            yield from item.columns
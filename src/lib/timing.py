@@ -0,0 +1,126 @@
+"""
+Timing Scheduler
+
+Absolute-deadline scheduling and high-precision sleeping for script runs.
+"""
+
+import time
+from typing import Callable, Dict
+
+
+# 'relative' sleeps each delay from when the previous step finished;
+# 'scheduled' sleeps until absolute deadlines so overhead never accumulates
+TIMING_MODES = ('relative', 'scheduled')
+
+DEFAULT_TIMING = 'relative'
+
+# Final stretch of a precise sleep that is busy-waited instead of slept
+SPIN_THRESHOLD = 0.002
+
+
+def sleep_until(
+    deadline: float,
+    wait: Callable[[float], bool],
+    clock: Callable[[], float] = time.perf_counter,
+    spin: float = SPIN_THRESHOLD
+) -> bool:
+    """
+    Sleep until a deadline using a coarse wait followed by a short spin.
+    
+    Args:
+        deadline: Target time on the clock
+        wait: Interruptible wait, returning True if woken early (Event.wait)
+        clock: Monotonic clock the deadline refers to
+        spin: Seconds before the deadline to switch to busy-waiting
+    
+    Returns:
+        True if the deadline was reached, False if the wait was interrupted
+    """
+    remaining = deadline - clock()
+    if remaining > spin:
+        if wait(remaining - spin):
+            return False
+    
+    while clock() < deadline:
+        pass
+    
+    return True
+
+
+class DeadlineScheduler:
+    """Tracks a run's timeline as absolute deadlines on a monotonic clock."""
+    
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        """
+        Initialize the scheduler.
+        
+        Args:
+            clock: Monotonic clock in seconds
+        """
+        self.clock = clock
+        self.start()
+    
+    def start(self) -> None:
+        """Anchor the timeline at the current time."""
+        self.origin = self.clock()
+        self.deadline = self.origin
+        self.last_lateness = 0.0
+        self.max_lateness = 0.0
+        self.total_lateness = 0.0
+        self.samples = 0
+    
+    def advance(self, seconds: float) -> float:
+        """
+        Extend the timeline by a planned wait.
+        
+        Args:
+            seconds: Planned duration
+        
+        Returns:
+            New absolute deadline
+        """
+        self.deadline += seconds
+        return self.deadline
+    
+    def shift(self, seconds: float) -> None:
+        """
+        Move the whole timeline later, e.g. after a pause.
+        
+        Args:
+            seconds: Offset to apply
+        """
+        self.origin += seconds
+        self.deadline += seconds
+    
+    def resync(self) -> None:
+        """Move the next deadline to now, after a wait of unknown length."""
+        self.deadline = max(self.deadline, self.clock())
+    
+    def record(self, lateness: float) -> None:
+        """
+        Record how late a deadline was met.
+        
+        Args:
+            lateness: Seconds between the deadline and the actual wake-up
+        """
+        self.last_lateness = lateness
+        self.total_lateness += lateness
+        self.samples += 1
+        if lateness > self.max_lateness:
+            self.max_lateness = lateness
+    
+    def report(self) -> Dict[str, float]:
+        """
+        Summarize drift for the run so far.
+        
+        Returns:
+            Dictionary with planned and elapsed time and lateness figures in ms
+        """
+        return {
+            'planned_ms': (self.deadline - self.origin) * 1000.0,
+            'elapsed_ms': (self.clock() - self.origin) * 1000.0,
+            'drift_ms': self.last_lateness * 1000.0,
+            'max_lateness_ms': self.max_lateness * 1000.0,
+            'mean_lateness_ms': (self.total_lateness / self.samples * 1000.0) if self.samples else 0.0,
+            'deadlines': self.samples,
+        }
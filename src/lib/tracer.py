@@ -0,0 +1,173 @@
+"""
+Run Tracer
+
+Records script runs in the Chrome trace-event format, viewable in
+chrome://tracing, Perfetto or any compatible trace viewer.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, IO, Iterator, List, Optional
+
+
+# Events held in memory; beyond this they are spilled to a temporary file
+MAX_EVENTS = 10000
+
+
+class Tracer:
+    """
+    Collects trace events for one run.
+    
+    Spans are stored as complete ('X') events, so nesting is implied by
+    timestamps and spans from different threads never need matching. Every
+    MAX_EVENTS events are spilled to a temporary file, so long runs do not
+    hold the whole trace in memory.
+    """
+    
+    def __init__(self, name: str = 'Automation Studio', clock: Callable[[], float] = time.perf_counter):
+        """
+        Initialize the tracer.
+        
+        Args:
+            name: Process name shown in the viewer
+            clock: Monotonic clock in seconds
+        """
+        self.clock = clock
+        self.pid = os.getpid()
+        self._origin = clock()
+        self.events: List[Dict[str, Any]] = [
+            {'name': 'process_name', 'ph': 'M', 'pid': self.pid, 'args': {'name': name}},
+        ]
+        self._lock = threading.Lock()
+        self._spool: Optional[IO[str]] = None
+        self._spilled = 0
+    
+    def now(self) -> float:
+        """
+        Current trace timestamp.
+        
+        Returns:
+            Microseconds since the tracer was created
+        """
+        return (self.clock() - self._origin) * 1e6
+    
+    def complete(self, name: str, category: str, start: float, args: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Record a span that started at a timestamp from now() and ends now.
+        
+        Args:
+            name: Span name
+            category: Span category ('step', 'capture', 'match', 'input', 'sleep')
+            start: Start timestamp from now()
+            args: Extra details shown in the viewer
+        """
+        event = {
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': start,
+            'dur': self.now() - start,
+            'pid': self.pid,
+            'tid': threading.get_ident(),
+        }
+        if args:
+            event['args'] = args
+        self._add(event)
+    
+    @contextmanager
+    def span(self, name: str, category: str, args: Optional[Dict[str, Any]] = None) -> Iterator[None]:
+        """
+        Record the enclosed block as a span.
+        
+        Args:
+            name: Span name
+            category: Span category
+            args: Extra details shown in the viewer
+        """
+        start = self.now()
+        try:
+            yield
+        finally:
+            self.complete(name, category, start, args)
+    
+    def instant(self, name: str, args: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Record a point-in-time event spanning all threads.
+        
+        Args:
+            name: Event name ('pause', 'resume', 'stop', ...)
+            args: Extra details shown in the viewer
+        """
+        event = {
+            'name': name,
+            'ph': 'i',
+            's': 'g',
+            'ts': self.now(),
+            'pid': self.pid,
+            'tid': threading.get_ident(),
+        }
+        if args:
+            event['args'] = args
+        self._add(event)
+    
+    def _add(self, event: Dict[str, Any]) -> None:
+        """Store an event, spilling the buffer once it holds MAX_EVENTS."""
+        with self._lock:
+            self.events.append(event)
+            if len(self.events) >= MAX_EVENTS:
+                self._spill()
+    
+    def _spill(self) -> None:
+        """Append the buffered events to the temporary file; call with the lock held."""
+        if self._spool is None:
+            # Imported here; most runs never spill
+            import tempfile
+            self._spool = tempfile.TemporaryFile('w+', encoding='utf-8')
+        
+        spool = self._spool
+        for event in self.events:
+            if self._spilled:
+                spool.write(',\n')
+            spool.write(json.dumps(event))
+            self._spilled += 1
+        self.events.clear()
+    
+    def write(self, file_path: str) -> None:
+        """
+        Write the trace as JSON, spilled events first, and close the spill
+        file; the tracer records nothing more after this.
+        
+        Args:
+            file_path: Output path
+        
+        Raises:
+            OSError: If the file cannot be written
+        """
+        try:
+            with self._lock, open(file_path, 'w', encoding='utf-8') as f:
+                f.write('{"traceEvents": [')
+                if self._spool is not None:
+                    import shutil
+                    
+                    self._spool.seek(0)
+                    shutil.copyfileobj(self._spool, f)
+                
+                for index, event in enumerate(self.events):
+                    if index or self._spilled:
+                        f.write(',\n')
+                    f.write(json.dumps(event))
+                f.write('], "displayTimeUnit": "ms"}')
+        finally:
+            self.close()
+    
+    def close(self) -> None:
+        """Discard the events and delete the spill file."""
+        with self._lock:
+            self.events.clear()
+            if self._spool is not None:
+                self._spool.close()
+                self._spool = None
+            self._spilled = 0
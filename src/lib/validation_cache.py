@@ -0,0 +1,107 @@
+"""
+Validation Cache
+
+Validation results of each top-level step of a script being edited, so an
+edit only re-checks the steps it touched instead of the whole script.
+"""
+
+from typing import Any, Callable, List, Optional, Tuple
+
+from src.lib.control_flow import walk
+
+
+class ValidationCache:
+    """
+    Per-step validation results with dirty flags.
+    
+    Editors call mark(), insert(), remove() or swap() as they change the
+    step list, mirroring the change. check() then validates the dirty steps
+    only. Error messages name step numbers, so a step that had errors is also
+    re-checked when its number has shifted; valid steps are not.
+    """
+    
+    def __init__(self):
+        """Initialize an empty cache."""
+        # (step number used, steps including nested, errors) per top-level
+        # step, or None while the step is dirty
+        self._entries: List[Optional[Tuple[int, int, List[str]]]] = []
+        # Indexes of the steps validated by the last check(), so a view only
+        # repaints those
+        self.changed: List[int] = []
+    
+    def reset(self, count: int) -> None:
+        """
+        Mark every step dirty, e.g. after loading or replacing the script.
+        
+        Args:
+            count: Number of top-level steps
+        """
+        self._entries = [None] * count
+    
+    def mark(self, index: int) -> None:
+        """Mark the step at index dirty after editing it."""
+        self._entries[index] = None
+    
+    def insert(self, index: int) -> None:
+        """Record a new, dirty step inserted at index (len() to append)."""
+        self._entries.insert(index, None)
+    
+    def remove(self, index: int) -> None:
+        """Record the deletion of the step at index."""
+        del self._entries[index]
+    
+    def swap(self, first: int, second: int) -> None:
+        """Record two steps trading places."""
+        entries = self._entries
+        entries[first], entries[second] = entries[second], entries[first]
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def errors_at(self, index: int) -> Optional[List[str]]:
+        """
+        Errors of the step at index from the last check.
+        
+        Args:
+            index: Top-level step index
+        
+        Returns:
+            Error messages, or None if the step is dirty
+        """
+        entry = self._entries[index]
+        return None if entry is None else entry[2]
+    
+    def check(self, steps: List[Any], validate: Callable[[Any, int], List[str]]) -> List[str]:
+        """
+        Bring the results up to date and collect every error.
+        
+        Args:
+            steps: Current top-level steps
+            validate: Returns the errors of a step and the steps nested in
+                it, given the step and its number
+        
+        Returns:
+            Errors of all steps in document order
+        """
+        entries = self._entries
+        if len(entries) != len(steps):
+            # The editor lost track of a change; start over
+            self.reset(len(steps))
+            entries = self._entries
+        
+        errors: List[str] = []
+        number = 1
+        changed = []
+        
+        for index, step in enumerate(steps):
+            entry = entries[index]
+            if entry is None or (entry[2] and entry[0] != number):
+                entry = (number, sum(1 for _ in walk([step])), validate(step, number))
+                entries[index] = entry
+                changed.append(index)
+            
+            errors.extend(entry[2])
+            number += entry[1]
+        
+        self.changed = changed
+        return errors
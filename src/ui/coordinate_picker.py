@@ -6,7 +6,6 @@ Captures mouse coordinates with live tracking and F2 hotkey.
 
 import tkinter as tk
 from tkinter import ttk
-import pyautogui
 import threading
 from typing import Optional, Tuple
 
@@ -141,6 +140,9 @@ class CoordinatePickerDialog:
         # Bind F2 key
         self.dialog.bind('<F2>', self._capture_coordinate)
         
+        # pyautogui is imported on first use; it is slow to load
+        import pyautogui
+        
         def update_coordinates():
             """Update coordinates in real-time."""
             while self.picker_running:
@@ -169,6 +171,8 @@ class CoordinatePickerDialog:
     
     def _capture_coordinate(self, event=None) -> None:
         """Capture current mouse position."""
+        import pyautogui
+        
         pos = pyautogui.position()
         self.result = (pos.x, pos.y)
         
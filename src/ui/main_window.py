@@ -9,13 +9,18 @@ from tkinter import ttk, scrolledtext, messagebox, filedialog
 import threading
 import sys
 from pathlib import Path
-import yaml
-import keyboard
 
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
+from src.lib.log_buffer import LogArchive, LogBuffer
+from src.lib.log_queue import LogQueue
 from src.lib.script_parser import ScriptParser
 from src.lib.script_executor import ScriptExecutor
+from src.lib.validation_cache import ValidationCache
+from src.lib.steps import (
+    Click, Delay, Goto, Hotkey, If, Label, MoveTo, Repeat, SetClipboard, TypeText, WaitForImage,
+    WaitUntilStable, While, step_from_dict
+)
 from src.ui.coordinate_picker import CoordinatePickerDialog
 from src.ui.script_editor import ScriptEditorDialog
 
@@ -23,6 +28,21 @@ from src.ui.script_editor import ScriptEditorDialog
 class AutomationStudio:
     """Main application window for Automation Studio."""
     
+    # How often queued log lines are moved into the log panel
+    LOG_FLUSH_MS = 50
+    
+    # Most lines inserted per flush, so a burst cannot freeze the window
+    LOG_FLUSH_LIMIT = 2000
+    
+    # Lines kept in the log panel; older ones are moved to the log archive
+    LOG_MAX_LINES = 5000
+    
+    # Lines fetched from the archive per "Load Older" click
+    LOG_PAGE_LINES = 500
+    
+    # How often the progress display samples the executor (about 30 Hz)
+    PROGRESS_INTERVAL_MS = 33
+    
     def __init__(self, root: tk.Tk):
         """
         Initialize Automation Studio.
@@ -39,19 +59,31 @@ class AutomationStudio:
         self.executor = ScriptExecutor(fail_safe=True)
         self.is_modified = False
         self.hotkey_registered = False
-        
-        # Setup executor callbacks
-        self.executor.on_step_start = self._on_step_start
+        self.log_queue = LogQueue()
+        self._run_thread = None
+        self._progress_job = None
+        self.log_buffer = LogBuffer(self.LOG_MAX_LINES, LogArchive())
+        
+        # Validation results per step, kept current as steps are edited so
+        # Play only re-checks what changed
+        self.step_checks = ValidationCache()
+        self._step_parser = ScriptParser(use_cache=False)
+        self._showing_step_error = False
+        
+        # Setup executor callbacks (progress is sampled, not pushed)
         self.executor.on_step_complete = self._on_step_complete
         self.executor.on_script_complete = self._on_script_complete
         self.executor.on_error = self._on_error
-        self.executor.on_log = self._log
+        self.executor.on_log = self.log_queue.push
         
         self._setup_styles()
         self._create_widgets()
         self._setup_layout()
         self._create_new_script()
-        self._setup_hotkeys()
+        self._flush_log()
+        
+        # Registered once the window is up; importing keyboard is slow
+        self.root.after_idle(self._setup_hotkeys)
     
     def _setup_styles(self) -> None:
         """Configure ttk styles."""
@@ -183,6 +215,9 @@ class AutomationStudio:
         self.steps_tree.column('Action', width=150, minwidth=100)
         self.steps_tree.column('Details', width=400, minwidth=200, stretch=True)
         
+        self.steps_tree.tag_configure('invalid', background='#ffd6d6')
+        self.steps_tree.bind('<<TreeviewSelect>>', self._on_step_select)
+        
         # Step controls
         self.steps_controls = ttk.Frame(self.steps_frame)
         
@@ -252,6 +287,12 @@ class AutomationStudio:
             width=15
         )
         
+        self.btn_export_timings = ttk.Button(
+            self.player_controls,
+            text="📊 Export Timings",
+            command=self._export_timings
+        )
+        
         # Progress
         self.progress_frame = ttk.Frame(self.player_frame)
         
@@ -282,6 +323,14 @@ class AutomationStudio:
             variable=self.failsafe_var
         )
         
+        # Trace option
+        self.trace_var = tk.BooleanVar(value=False)
+        self.trace_check = ttk.Checkbutton(
+            self.player_frame,
+            text="Record trace (Chrome trace JSON next to the script)",
+            variable=self.trace_var
+        )
+        
         # Log
         self.log_frame = ttk.LabelFrame(
             self.right_panel,
@@ -299,8 +348,16 @@ class AutomationStudio:
             state='disabled'
         )
         
+        self.log_controls = ttk.Frame(self.log_frame)
+        
+        self.btn_load_older = ttk.Button(
+            self.log_controls,
+            text="Load Older",
+            command=self._load_older_log
+        )
+        
         self.btn_clear_log = ttk.Button(
-            self.log_frame,
+            self.log_controls,
             text="Clear Log",
             command=self._clear_log
         )
@@ -366,6 +423,7 @@ class AutomationStudio:
         self.btn_play.pack(side='left', padx=5)
         self.btn_pause.pack(side='left', padx=5)
         self.btn_stop.pack(side='left', padx=5)
+        self.btn_export_timings.pack(side='left', padx=5)
         
         self.progress_frame.pack(fill='x', pady=(0, 10))
         self.progress_label.pack(anchor='w')
@@ -373,10 +431,13 @@ class AutomationStudio:
         self.progress_detail.pack(anchor='w')
         
         self.failsafe_check.pack(anchor='w')
+        self.trace_check.pack(anchor='w')
         
         self.log_frame.pack(fill='both', expand=True)
         self.log_text.pack(fill='both', expand=True, pady=(0, 10))
-        self.btn_clear_log.pack()
+        self.log_controls.pack()
+        self.btn_load_older.pack(side='left', padx=2)
+        self.btn_clear_log.pack(side='left', padx=2)
         
         # Status bar
         self.status_bar.grid(row=3, column=0, sticky='ew', pady=(10, 0))
@@ -442,6 +503,8 @@ class AutomationStudio:
         
         self._update_script_from_ui()
         
+        import yaml
+        
         try:
             with open(self.script_file_path, 'w', encoding='utf-8') as f:
                 yaml.dump(self.current_script, f, default_flow_style=False, sort_keys=False)
@@ -490,38 +553,123 @@ class AutomationStudio:
         
         # Add steps
         steps = self.current_script.get('steps', [])
-        for i, step in enumerate(steps, 1):
-            action = step.get('action', 'unknown')
-            details = self._format_step_details(step)
-            self.steps_tree.insert('', 'end', text=str(i), values=(action, details))
+        self.step_checks.reset(len(steps))
+        self.step_checks.check(steps, self._step_parser.step_errors)
+        for i, step in enumerate(steps):
+            self.steps_tree.insert(
+                '', 'end', text=str(i + 1), values=self._step_row(step), tags=self._step_tags(i)
+            )
+    
+    def _step_row(self, step: dict) -> tuple:
+        """Action and details columns of a step's row."""
+        return (step.get('action', 'unknown'), self._format_step_details(step))
+    
+    def _check_steps(self) -> None:
+        """Validate the steps marked dirty and highlight the invalid rows."""
+        steps = self.current_script.get('steps', [])
+        self.step_checks.check(steps, self._step_parser.step_errors)
+        self._show_step_checks()
+    
+    def _show_step_checks(self) -> None:
+        """Update the highlight of the rows validated by the last check."""
+        items = self.steps_tree.get_children()
+        if len(items) != len(self.step_checks):
+            return
+        
+        for index in self.step_checks.changed:
+            self.steps_tree.item(items[index], tags=self._step_tags(index))
+        self._on_step_select()
+    
+    def _step_tags(self, index: int) -> tuple:
+        """Row tags for the step at index from its last check."""
+        return ('invalid',) if self.step_checks.errors_at(index) else ()
+    
+    def _on_step_select(self, event=None) -> None:
+        """Show the first error of the selected step in the status bar."""
+        selection = self.steps_tree.selection()
+        index = self.steps_tree.index(selection[0]) if selection else None
+        errors = (
+            self.step_checks.errors_at(index)
+            if index is not None and index < len(self.step_checks) else None
+        )
+        
+        if errors:
+            more = f" (+{len(errors) - 1} more)" if len(errors) > 1 else ""
+            self.status_label.config(text=f"{errors[0]}{more}")
+            self._showing_step_error = True
+        elif self._showing_step_error:
+            self.status_label.config(text="Ready")
+            self._showing_step_error = False
+    
+    def _renumber_steps(self, start: int) -> None:
+        """Renumber the rows from index start on after an insert or delete."""
+        items = self.steps_tree.get_children()
+        for i in range(start, len(items)):
+            self.steps_tree.item(items[i], text=str(i + 1))
+    
+    def _swap_step_rows(self, index: int, other: int) -> None:
+        """Show two swapped steps in each other's rows and select the moved one."""
+        steps = self.current_script['steps']
+        items = self.steps_tree.get_children()
+        
+        self.step_checks.swap(index, other)
+        for i in (index, other):
+            self.steps_tree.item(items[i], values=self._step_row(steps[i]))
+        
+        self._check_steps()
+        for i in (index, other):
+            self.steps_tree.item(items[i], tags=self._step_tags(i))
+        
+        self.steps_tree.selection_set(items[other])
+        self.steps_tree.see(items[other])
     
     def _format_step_details(self, step: dict) -> str:
         """Format step details for display."""
-        action = step.get('action')
+        try:
+            model = step_from_dict(step)
+        except (AttributeError, KeyError, TypeError, ValueError):
+            # Incomplete or unknown steps are shown as written
+            return str(step)
+        desc = model.description
         
-        if action in ['click', 'double_click', 'right_click']:
-            x, y = step.get('x', 0), step.get('y', 0)
-            desc = step.get('description', '')
-            return f"({x}, {y}) - {desc}" if desc else f"({x}, {y})"
+        if isinstance(model, Click) and not isinstance(model, MoveTo):
+            return f"({model.x}, {model.y}) - {desc}" if desc else f"({model.x}, {model.y})"
         
-        elif action == 'type':
-            text = step.get('text', '')
+        elif isinstance(model, (TypeText, SetClipboard)):
+            text = model.text
             return f"{text[:50]}{'...' if len(text) > 50 else ''}"
         
-        elif action == 'hotkey':
-            keys = step.get('keys', [])
-            return '+'.join(keys)
+        elif isinstance(model, Hotkey):
+            return '+'.join(model.keys)
         
-        elif action in ['delay', 'wait']:
-            ms = step.get('milliseconds', 0)
-            return f"{ms}ms"
+        elif isinstance(model, Delay):
+            return f"{model.milliseconds}ms"
         
-        elif action == 'set_clipboard':
-            text = step.get('text', '')
-            return f"{text[:50]}{'...' if len(text) > 50 else ''}"
+        elif isinstance(model, WaitForImage):
+            return f"{model.image} - {desc}" if desc else model.image
+        
+        elif isinstance(model, WaitUntilStable):
+            where = f"{model.region} " if model.region else "full screen "
+            return f"{where}stable {model.stable_ms}ms, timeout {model.timeout_ms}ms"
+        
+        elif isinstance(model, Repeat):
+            return f"{model.times}x, {len(model.steps or [])} steps"
+        
+        elif isinstance(model, While):
+            condition = model.condition or {}
+            negate = "not " if condition.get('negate') else ""
+            summary = f"{negate}{condition.get('type', '?')}, {len(model.steps or [])} steps"
+            if isinstance(model, If) and model.orelse:
+                summary += f", else {len(model.orelse)} steps"
+            return summary
+        
+        elif isinstance(model, Label):
+            return f"{model.name}:"
+        
+        elif isinstance(model, Goto):
+            return f"→ {model.label}"
         
         else:
-            desc = step.get('description', '')
             return desc if desc else str(step)
     
     def _show_add_step_menu(self) -> None:
@@ -531,12 +679,15 @@ class AutomationStudio:
         menu.add_command(label="Click", command=lambda: self._add_step_dialog('click'))
         menu.add_command(label="Double Click", command=lambda: self._add_step_dialog('double_click'))
         menu.add_command(label="Right Click", command=lambda: self._add_step_dialog('right_click'))
+        menu.add_command(label="Click Image", command=lambda: self._add_step_dialog('click_image'))
         menu.add_separator()
         menu.add_command(label="Type Text", command=lambda: self._add_step_dialog('type'))
         menu.add_command(label="Hotkey", command=lambda: self._add_step_dialog('hotkey'))
         menu.add_command(label="Press Key", command=lambda: self._add_step_dialog('press'))
         menu.add_separator()
         menu.add_command(label="Delay/Wait", command=lambda: self._add_step_dialog('delay'))
+        menu.add_command(label="Wait Until Stable", command=lambda: self._add_step_dialog('wait_until_stable'))
+        menu.add_command(label="Wait For Image", command=lambda: self._add_step_dialog('wait_for_image'))
         menu.add_separator()
         menu.add_command(label="Set Clipboard", command=lambda: self._add_step_dialog('set_clipboard'))
         menu.add_command(label="Paste", command=lambda: self._add_step_dialog('paste'))
@@ -549,8 +700,11 @@ class AutomationStudio:
         
         dialog = StepDialog(self.root, action_type)
         if dialog.result:
-            self.current_script['steps'].append(dialog.result)
-            self._refresh_steps_tree()
+            steps = self.current_script['steps']
+            steps.append(dialog.result)
+            self.step_checks.insert(len(steps) - 1)
+            self.steps_tree.insert('', 'end', text=str(len(steps)), values=self._step_row(dialog.result))
+            self._check_steps()
             self._mark_modified()
             self._log(f"Added step: {action_type}")
     
@@ -565,11 +719,13 @@ class AutomationStudio:
         step = self.current_script['steps'][index]
         
         from src.ui.step_dialog import StepDialog
-        dialog = StepDialog(self.root, step['action'], step)
+        dialog = StepDialog(self.root, step.get('action', ''), step)
         
         if dialog.result:
             self.current_script['steps'][index] = dialog.result
-            self._refresh_steps_tree()
+            self.step_checks.mark(index)
+            self.steps_tree.item(selection[0], values=self._step_row(dialog.result))
+            self._check_steps()
             self._mark_modified()
             self._log(f"Edited step #{index + 1}")
     
@@ -584,7 +740,10 @@ class AutomationStudio:
         
         if messagebox.askyesno("Confirm Delete", f"Delete step #{index + 1}?"):
             del self.current_script['steps'][index]
-            self._refresh_steps_tree()
+            self.step_checks.remove(index)
+            self.steps_tree.delete(selection[0])
+            self._renumber_steps(index)
+            self._check_steps()
             self._mark_modified()
             self._log(f"Deleted step #{index + 1}")
     
@@ -600,7 +759,7 @@ class AutomationStudio:
         
         steps = self.current_script['steps']
         steps[index], steps[index - 1] = steps[index - 1], steps[index]
-        self._refresh_steps_tree()
+        self._swap_step_rows(index, index - 1)
         self._mark_modified()
     
     def _move_step_down(self) -> None:
@@ -616,7 +775,7 @@ class AutomationStudio:
             return
         
         steps[index], steps[index + 1] = steps[index + 1], steps[index]
-        self._refresh_steps_tree()
+        self._swap_step_rows(index, index + 1)
         self._mark_modified()
     
     def _pick_coordinate(self) -> None:
@@ -641,14 +800,25 @@ class AutomationStudio:
         self._update_script_from_ui()
         
         # Validate
+        base_dir = str(Path(self.script_file_path).parent) if self.script_file_path else None
         parser = ScriptParser()
         parser.script_data = self.current_script
+        parser.base_dir = base_dir
         
-        if not parser.validate():
+        valid = parser.validate(self.step_checks)
+        self._show_step_checks()
+        if not valid:
             errors = '\n'.join(parser.get_errors())
             messagebox.showerror("Validation Error", f"Script has errors:\n\n{errors}")
             return
         
+        self.executor.base_dir = base_dir
+        try:
+            plan = self.executor.compile(self.current_script, parser.get_templates(), parser.get_program())
+        except (KeyError, OSError, ValueError) as e:
+            messagebox.showerror("Validation Error", f"Script has errors:\n\n{e}")
+            return
+        
         # Disable controls
         self.btn_play.config(state='disabled')
         self.btn_pause.config(state='normal')
@@ -657,12 +827,24 @@ class AutomationStudio:
         
         # Update executor settings
         self.executor.fail_safe = self.failsafe_var.get()
+        self.executor.trace_file = self._trace_path() if self.trace_var.get() else None
         
         # Run in thread
         def run():
-            self.executor.execute_script(self.current_script)
+            self.executor.execute_script(plan)
+        
+        self._run_thread = threading.Thread(target=run, daemon=True)
+        self._run_thread.start()
         
-        threading.Thread(target=run, daemon=True).start()
+        if self._progress_job is not None:
+            self.root.after_cancel(self._progress_job)
+        self._poll_progress()
+    
+    def _trace_path(self) -> str:
+        """Trace file for the current script: '<script>.trace.json', or in the working directory."""
+        if self.script_file_path:
+            return str(Path(self.script_file_path).with_suffix('.trace.json'))
+        return 'trace.json'
     
     def _pause_script(self) -> None:
         """Pause script execution."""
@@ -680,11 +862,6 @@ class AutomationStudio:
         # Schedule UI update after a short delay to ensure executor has stopped
         self.root.after(100, self._script_stopped)
     
-    def _on_step_start(self, step_num: int, step: dict) -> None:
-        """Callback when step starts."""
-        total = self.executor.total_steps
-        self.root.after(0, lambda: self._update_progress(step_num, total))
-    
     def _on_step_complete(self, step_num: int, step: dict) -> None:
         """Callback when step completes."""
         pass
@@ -697,11 +874,51 @@ class AutomationStudio:
         """Callback on error."""
         self.root.after(0, lambda: self._script_error(error))
     
-    def _update_progress(self, current: int, total: int) -> None:
+    def _export_timings(self) -> None:
+        """Export the step timings of the last run."""
+        if not len(self.executor.metrics):
+            messagebox.showinfo("Export Timings", "No timing data yet - run the script first.")
+            return
+        
+        file_path = filedialog.asksaveasfilename(
+            title="Export Step Timings",
+            filetypes=[("JSON files", "*.json"), ("CSV files", "*.csv"), ("All files", "*.*")],
+            defaultextension=".json"
+        )
+        
+        if not file_path:
+            return
+        
+        try:
+            self.executor.metrics.export(file_path)
+            self._log(f"Exported step timings: {file_path}")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to export timings:\n{str(e)}")
+    
+    def _poll_progress(self) -> None:
+        """Sample executor progress and redraw, repeating while a run is active."""
+        self._update_progress(self.executor.progress.snapshot())
+        
+        if self._run_thread is not None and self._run_thread.is_alive():
+            self._progress_job = self.root.after(self.PROGRESS_INTERVAL_MS, self._poll_progress)
+        else:
+            self._progress_job = None
+    
+    def _update_progress(self, progress: dict) -> None:
         """Update progress bar."""
-        self.progress_bar['maximum'] = total
-        self.progress_bar['value'] = current
-        self.progress_detail.config(text=f"Step {current} of {total}")
+        current, total = progress['current'], progress['total']
+        self.progress_bar['maximum'] = max(total, 1)
+        self.progress_bar['value'] = progress['completed']
+        
+        text = f"Step {current} of {total}"
+        if progress['row']:
+            text = f"Row {progress['row']}  •  {text}"
+        if progress['steps_per_sec'] > 0:
+            text += f"  •  {progress['steps_per_sec']:.1f} steps/s"
+        if progress['running'] and progress['eta'] is not None:
+            minutes, seconds = divmod(int(progress['eta'] + 0.5), 60)
+            text += f"  •  ETA {minutes}:{seconds:02d}"
+        self.progress_detail.config(text=text)
     
     def _script_finished(self) -> None:
         """Handle script completion."""
@@ -731,16 +948,39 @@ class AutomationStudio:
         messagebox.showerror("Error", f"Script execution failed:\n{error}")
     
     def _log(self, message: str) -> None:
-        """Log a message."""
+        """Log a message (safe to call from any thread)."""
+        self.log_queue.push(message)
+    
+    def _flush_log(self) -> None:
+        """Move queued log lines into the log panel in one insert."""
+        lines = self.log_queue.drain(self.LOG_FLUSH_LIMIT)
+        if lines:
+            removed = self.log_buffer.append(lines)
+            
+            self.log_text.configure(state='normal')
+            self.log_text.insert(tk.END, '\n'.join(lines) + '\n')
+            if removed:
+                self.log_text.delete('1.0', f'{removed + 1}.0')
+            self.log_text.see(tk.END)
+            self.log_text.configure(state='disabled')
+        
+        self.root.after(self.LOG_FLUSH_MS, self._flush_log)
+    
+    def _load_older_log(self) -> None:
+        """Show archived log lines above the ones in the panel."""
+        older = self.log_buffer.load_older(self.LOG_PAGE_LINES)
+        if not older:
+            self.status_label.config(text="No older log entries")
+            return
+        
         self.log_text.configure(state='normal')
-        from datetime import datetime
-        timestamp = datetime.now().strftime('%H:%M:%S')
-        self.log_text.insert(tk.END, f"[{timestamp}] {message}\n")
-        self.log_text.see(tk.END)
+        self.log_text.insert('1.0', '\n'.join(older) + '\n')
         self.log_text.configure(state='disabled')
+        self.log_text.see('1.0')
     
     def _clear_log(self) -> None:
-        """Clear the log."""
+        """Clear the log (archived lines stay on disk)."""
+        self.log_buffer.clear()
         self.log_text.configure(state='normal')
         self.log_text.delete('1.0', tk.END)
         self.log_text.configure(state='disabled')
@@ -759,6 +999,8 @@ class AutomationStudio:
     def _setup_hotkeys(self) -> None:
         """Setup global hotkeys."""
         try:
+            import keyboard
+            
             # Register CTRL+Q to stop automation
             keyboard.add_hotkey('ctrl+q', self._hotkey_stop_handler)
             self.hotkey_registered = True
@@ -776,6 +1018,7 @@ class AutomationStudio:
         """Cleanup hotkeys on exit."""
         if self.hotkey_registered:
             try:
+                import keyboard
                 keyboard.unhook_all_hotkeys()
             except:
                 pass
@@ -6,9 +6,10 @@ Allows direct editing of script YAML code.
 
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
-import yaml
 from typing import Optional, Dict, Any
 
+from src.lib.script_parser import load_yaml
+
 
 class ScriptEditorDialog:
     """Dialog for editing script code directly."""
@@ -113,14 +114,18 @@ class ScriptEditorDialog:
     
     def _load_script(self) -> None:
         """Load script data into editor."""
+        import yaml
+        
         yaml_str = yaml.dump(self.original_data, default_flow_style=False, sort_keys=False)
         self.editor_text.insert('1.0', yaml_str)
     
     def _validate(self) -> None:
         """Validate the YAML syntax."""
+        import yaml
+        
         try:
             code = self.editor_text.get('1.0', 'end-1c')
-            data = yaml.safe_load(code)
+            data = load_yaml(code)
             
             # Basic validation
             if not isinstance(data, dict):
@@ -144,9 +149,11 @@ class ScriptEditorDialog:
     
     def _ok(self) -> None:
         """Handle Save button."""
+        import yaml
+        
         try:
             code = self.editor_text.get('1.0', 'end-1c')
-            self.result = yaml.safe_load(code)
+            self.result = load_yaml(code)
             
             # Basic validation
             if not isinstance(self.result, dict):
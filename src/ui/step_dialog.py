@@ -4,12 +4,14 @@ Step Dialog
 Dialog for adding/editing automation steps.
 """
 
+import json
 import tkinter as tk
-from tkinter import ttk
+from tkinter import ttk, filedialog
 from typing import Optional, Dict, Any
-import pyautogui
 import threading
 
+from src.lib.steps import STEP_TYPES
+
 
 class StepDialog:
     """Dialog for creating/editing automation steps."""
@@ -27,12 +29,17 @@ class StepDialog:
         self.action_type = action_type
         self.existing_step = existing_step
         
+        # Field defaults come from the step model, shared with the executor;
+        # a step with an unknown or missing action is edited as raw fields
+        self.step_class = STEP_TYPES.get(action_type)
+        self.defaults = self.step_class.defaults() if self.step_class else {}
+        
         # Initialize picker variables
         self.picker_running = False
         self.picker_thread = None
         
         self.dialog = tk.Toplevel(parent)
-        self.dialog.title(f"{'Edit' if existing_step else 'Add'} Step - {action_type}")
+        self.dialog.title(f"{'Edit' if existing_step else 'Add'} Step - {action_type or 'unknown'}")
         self.dialog.geometry("500x400")
         self.dialog.transient(parent)
         self.dialog.grab_set()
@@ -58,7 +65,7 @@ class StepDialog:
         # Action type label
         self.action_label = ttk.Label(
             self.main_frame,
-            text=f"Action: {self.action_type}",
+            text=f"Action: {self.action_type or 'unknown'}",
             font=('Segoe UI', 12, 'bold')
         )
         
@@ -95,6 +102,15 @@ class StepDialog:
         elif self.action_type == 'scroll':
             self._create_scroll_fields()
         
+        elif self.action_type == 'wait_until_stable':
+            self._create_stable_fields()
+        
+        elif self.action_type in ['click_image', 'wait_for_image']:
+            self._create_image_fields()
+        
+        elif self.step_class is None:
+            self._create_generic_fields()
+        
         # Buttons
         self.button_frame = ttk.Frame(self.main_frame)
         
@@ -166,7 +182,7 @@ class StepDialog:
         if self.action_type in ['move_to', 'drag_to']:
             ttk.Label(coord_frame, text="Duration (seconds):", font=('Segoe UI', 9, 'bold')).grid(row=4, column=0, sticky='w', pady=5)
             self.duration_entry = ttk.Entry(coord_frame, width=15)
-            self.duration_entry.insert(0, "0")
+            self.duration_entry.insert(0, str(self.defaults['duration']))
             self.duration_entry.grid(row=4, column=1, sticky='w', padx=(10, 0), pady=5)
     
     def _create_type_fields(self) -> None:
@@ -178,7 +194,7 @@ class StepDialog:
         
         ttk.Label(self.fields_frame, text="Interval between keys (seconds, 0 for instant):", font=('Segoe UI', 9)).pack(anchor='w', pady=5)
         self.interval_entry = ttk.Entry(self.fields_frame, width=15)
-        self.interval_entry.insert(0, "0")
+        self.interval_entry.insert(0, str(self.defaults['interval']))
         self.interval_entry.pack(anchor='w')
     
     def _create_hotkey_fields(self) -> None:
@@ -222,7 +238,7 @@ class StepDialog:
         
         ttk.Label(self.fields_frame, text="Number of Presses:", font=('Segoe UI', 9, 'bold')).pack(anchor='w', pady=5)
         self.presses_entry = ttk.Entry(self.fields_frame, width=15)
-        self.presses_entry.insert(0, "1")
+        self.presses_entry.insert(0, str(self.defaults['presses']))
         self.presses_entry.pack(anchor='w')
     
     def _create_delay_fields(self) -> None:
@@ -268,99 +284,218 @@ class StepDialog:
         self.amount_entry = ttk.Entry(self.fields_frame, width=15)
         self.amount_entry.pack(anchor='w', pady=5)
     
+    def _create_stable_fields(self) -> None:
+        """Create screen-stability wait fields."""
+        ttk.Label(self.fields_frame, text="Region (optional, leave empty for full screen):", font=('Segoe UI', 9, 'bold')).pack(anchor='w', pady=5)
+        
+        region_frame = ttk.Frame(self.fields_frame)
+        region_frame.pack(fill='x', pady=5)
+        
+        self.region_entries = []
+        for i, label in enumerate(("Left:", "Top:", "Width:", "Height:")):
+            ttk.Label(region_frame, text=label).grid(row=0, column=i * 2, sticky='w')
+            entry = ttk.Entry(region_frame, width=8)
+            entry.grid(row=0, column=i * 2 + 1, sticky='w', padx=(5, 10))
+            self.region_entries.append(entry)
+        
+        ttk.Label(self.fields_frame, text="Stable for (milliseconds):", font=('Segoe UI', 9, 'bold')).pack(anchor='w', pady=5)
+        self.stable_entry = ttk.Entry(self.fields_frame, width=15)
+        self.stable_entry.insert(0, str(self.defaults['stable_ms']))
+        self.stable_entry.pack(anchor='w', pady=5)
+        
+        ttk.Label(self.fields_frame, text="Timeout (milliseconds):", font=('Segoe UI', 9, 'bold')).pack(anchor='w', pady=5)
+        self.timeout_entry = ttk.Entry(self.fields_frame, width=15)
+        self.timeout_entry.insert(0, str(self.defaults['timeout_ms']))
+        self.timeout_entry.pack(anchor='w', pady=5)
+    
+    def _create_image_fields(self) -> None:
+        """Create image matching fields."""
+        ttk.Label(self.fields_frame, text="Template Image:", font=('Segoe UI', 9, 'bold')).pack(anchor='w', pady=5)
+        
+        image_frame = ttk.Frame(self.fields_frame)
+        image_frame.pack(fill='x', pady=5)
+        
+        self.image_entry = ttk.Entry(image_frame, width=40)
+        self.image_entry.pack(side='left', fill='x', expand=True)
+        
+        ttk.Button(
+            image_frame,
+            text="Browse...",
+            command=self._browse_image
+        ).pack(side='left', padx=(10, 0))
+        
+        ttk.Label(self.fields_frame, text="Confidence (0-1):", font=('Segoe UI', 9, 'bold')).pack(anchor='w', pady=5)
+        self.confidence_entry = ttk.Entry(self.fields_frame, width=15)
+        self.confidence_entry.insert(0, str(self.defaults['confidence']))
+        self.confidence_entry.pack(anchor='w', pady=5)
+        
+        ttk.Label(self.fields_frame, text="Timeout (milliseconds):", font=('Segoe UI', 9, 'bold')).pack(anchor='w', pady=5)
+        self.timeout_entry = ttk.Entry(self.fields_frame, width=15)
+        self.timeout_entry.insert(0, str(self.defaults['timeout_ms']))
+        self.timeout_entry.pack(anchor='w', pady=5)
+    
+    def _create_generic_fields(self) -> None:
+        """Create a raw field editor for steps of an unknown action."""
+        ttk.Label(self.fields_frame, text="Fields (JSON object):", font=('Segoe UI', 9, 'bold')).pack(anchor='w', pady=5)
+        
+        self.fields_widget = tk.Text(self.fields_frame, width=50, height=10, font=('Consolas', 10))
+        self.fields_widget.pack(fill='both', expand=True, pady=5)
+    
+    def _browse_image(self) -> None:
+        """Choose a template image file."""
+        file_path = filedialog.askopenfilename(
+            parent=self.dialog,
+            title="Select Template Image",
+            filetypes=[("Images", "*.png *.jpg *.jpeg *.bmp"), ("All files", "*.*")]
+        )
+        if file_path:
+            self.image_entry.delete(0, tk.END)
+            self.image_entry.insert(0, file_path)
+    
     def _load_existing(self) -> None:
         """Load existing step data into fields."""
         if not self.existing_step:
             return
         
+        # Fields the step leaves out show their defaults
+        step = {**self.defaults, **self.existing_step}
+        
         # Description
-        desc = self.existing_step.get('description', '')
+        desc = step.get('description', '')
         if desc:
             self.desc_entry.insert(0, desc)
         
         # Action-specific fields
         if self.action_type in ['click', 'double_click', 'right_click', 'move_to']:
-            self.x_entry.insert(0, str(self.existing_step.get('x', '')))
-            self.y_entry.insert(0, str(self.existing_step.get('y', '')))
+            self.x_entry.insert(0, str(step.get('x', '')))
+            self.y_entry.insert(0, str(step.get('y', '')))
             if hasattr(self, 'duration_entry'):
                 self.duration_entry.delete(0, tk.END)
-                self.duration_entry.insert(0, str(self.existing_step.get('duration', 0)))
+                self.duration_entry.insert(0, str(step['duration']))
         
         elif self.action_type == 'type':
-            self.text_widget.insert('1.0', self.existing_step.get('text', ''))
+            self.text_widget.insert('1.0', step.get('text', ''))
             self.interval_entry.delete(0, tk.END)
-            self.interval_entry.insert(0, str(self.existing_step.get('interval', 0)))
+            self.interval_entry.insert(0, str(step['interval']))
         
         elif self.action_type == 'hotkey':
-            keys = self.existing_step.get('keys', [])
+            keys = step.get('keys', [])
             self.keys_entry.insert(0, ', '.join(keys))
         
         elif self.action_type == 'press':
-            self.key_entry.insert(0, self.existing_step.get('key', ''))
+            self.key_entry.insert(0, step.get('key', ''))
             self.presses_entry.delete(0, tk.END)
-            self.presses_entry.insert(0, str(self.existing_step.get('presses', 1)))
+            self.presses_entry.insert(0, str(step['presses']))
         
         elif self.action_type in ['delay', 'wait']:
-            self.ms_entry.insert(0, str(self.existing_step.get('milliseconds', '')))
+            self.ms_entry.insert(0, str(step.get('milliseconds', '')))
         
         elif self.action_type == 'set_clipboard':
-            self.text_widget.insert('1.0', self.existing_step.get('text', ''))
+            self.text_widget.insert('1.0', step.get('text', ''))
         
         elif self.action_type == 'scroll':
-            self.amount_entry.insert(0, str(self.existing_step.get('amount', '')))
+            self.amount_entry.insert(0, str(step.get('amount', '')))
+        
+        elif self.action_type == 'wait_until_stable':
+            region = step['region'] or []
+            for entry, value in zip(self.region_entries, region):
+                entry.insert(0, str(value))
+            self.stable_entry.delete(0, tk.END)
+            self.stable_entry.insert(0, str(step['stable_ms']))
+            self.timeout_entry.delete(0, tk.END)
+            self.timeout_entry.insert(0, str(step['timeout_ms']))
+        
+        elif self.action_type in ['click_image', 'wait_for_image']:
+            self.image_entry.insert(0, step.get('image', ''))
+            self.confidence_entry.delete(0, tk.END)
+            self.confidence_entry.insert(0, str(step['confidence']))
+            self.timeout_entry.delete(0, tk.END)
+            self.timeout_entry.insert(0, str(step['timeout_ms']))
+        
+        elif self.step_class is None:
+            fields = {key: value for key, value in step.items() if key != 'description'}
+            self.fields_widget.insert('1.0', json.dumps(fields, indent=2))
     
     def _ok(self) -> None:
         """Handle OK button."""
         try:
-            step = {'action': self.action_type}
+            if self.step_class is None:
+                self.result = self._generic_result()
+                self.dialog.destroy()
+                return
+            
+            fields: Dict[str, Any] = {'action': self.action_type}
             
             # Description
-            desc = self.desc_entry.get().strip()
-            if desc:
-                step['description'] = desc
+            fields['description'] = self.desc_entry.get().strip()
             
             # Action-specific fields
             if self.action_type in ['click', 'double_click', 'right_click', 'move_to']:
-                step['x'] = int(self.x_entry.get())
-                step['y'] = int(self.y_entry.get())
+                fields['x'] = int(self.x_entry.get())
+                fields['y'] = int(self.y_entry.get())
                 if hasattr(self, 'duration_entry'):
-                    duration = float(self.duration_entry.get())
-                    if duration > 0:
-                        step['duration'] = duration
+                    fields['duration'] = max(float(self.duration_entry.get()), 0)
             
             elif self.action_type == 'type':
-                step['text'] = self.text_widget.get('1.0', 'end-1c')
-                interval = float(self.interval_entry.get())
-                if interval > 0:
-                    step['interval'] = interval
+                fields['text'] = self.text_widget.get('1.0', 'end-1c')
+                fields['interval'] = max(float(self.interval_entry.get()), 0)
             
             elif self.action_type == 'hotkey':
                 keys_str = self.keys_entry.get()
-                keys = [k.strip() for k in keys_str.split(',')]
-                step['keys'] = keys
+                fields['keys'] = [k.strip() for k in keys_str.split(',')]
             
             elif self.action_type == 'press':
-                step['key'] = self.key_entry.get()
-                step['presses'] = int(self.presses_entry.get())
+                fields['key'] = self.key_entry.get()
+                fields['presses'] = int(self.presses_entry.get())
             
             elif self.action_type in ['delay', 'wait']:
-                step['milliseconds'] = int(self.ms_entry.get())
+                fields['milliseconds'] = int(self.ms_entry.get())
             
             elif self.action_type == 'set_clipboard':
-                step['text'] = self.text_widget.get('1.0', 'end-1c')
+                fields['text'] = self.text_widget.get('1.0', 'end-1c')
             
             elif self.action_type == 'paste':
                 pass  # No additional fields
             
             elif self.action_type == 'scroll':
-                step['amount'] = int(self.amount_entry.get())
+                fields['amount'] = int(self.amount_entry.get())
+            
+            elif self.action_type == 'wait_until_stable':
+                region = [entry.get().strip() for entry in self.region_entries]
+                fields['region'] = [int(value) for value in region] if any(region) else None
+                fields['stable_ms'] = int(self.stable_entry.get())
+                fields['timeout_ms'] = int(self.timeout_entry.get())
             
-            self.result = step
+            elif self.action_type in ['click_image', 'wait_for_image']:
+                fields['image'] = self.image_entry.get().strip()
+                fields['confidence'] = float(self.confidence_entry.get())
+                fields['timeout_ms'] = int(self.timeout_entry.get())
+            
+            # Fields the dialog does not show (pacing, poll_ms, ...) are kept
+            # from the step being edited; defaults are left out of the result
+            step = self.step_class.from_dict({**(self.existing_step or {}), **fields})
+            self.result = step.to_dict()
             self.dialog.destroy()
             
         except ValueError as e:
             tk.messagebox.showerror("Invalid Input", f"Please check your input:\n{str(e)}", parent=self.dialog)
     
+    def _generic_result(self) -> Dict[str, Any]:
+        """
+        Step dictionary from the raw field editor.
+        
+        Raises:
+            ValueError: If the fields are not a JSON object
+        """
+        fields = json.loads(self.fields_widget.get('1.0', 'end-1c') or '{}')
+        if not isinstance(fields, dict):
+            raise ValueError("Fields must be a JSON object")
+        
+        description = self.desc_entry.get().strip()
+        if description:
+            fields['description'] = description
+        return fields
+    
     def _cancel(self) -> None:
         """Handle Cancel button."""
         if hasattr(self, 'picker_running') and self.picker_running:
@@ -379,6 +514,9 @@ class StepDialog:
         # Bind F2 key globally
         self.dialog.bind('<F2>', self._capture_coordinate)
         
+        # pyautogui is imported on first use; it is slow to load
+        import pyautogui
+        
         def update_coordinates():
             """Update coordinates in real-time."""
             while self.picker_running:
@@ -406,6 +544,8 @@ class StepDialog:
     
     def _capture_coordinate(self, event=None) -> None:
         """Capture current mouse position and set it in the entry fields."""
+        import pyautogui
+        
         pos = pyautogui.position()
         
         # Update entry fields